@@ -1,8 +1,18 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, Response, stream_with_context
 import os
 import csv
 from datetime import datetime
-from rag_hr.query import call_llm, retrieve_hr_answer
+from contextlib import closing
+from rag_hr.query import retrieve_hr_answer, stream_hr_answer, scope_for, answer_cache, hr_lookup, INDEX_PATH, META_PATH
+from rag_hr.utils.retriever import get_retriever
+from rag_hr.utils.reranker import get_reranker
+from rag_hr.utils import context_packer
+from rag_hr.utils.request_classifier import (RequestClassifier, retriever_encoder, classify_with_fallback,
+                                            aclassify_with_fallback, CLASSIFY_LOCAL_THRESHOLD)
+from rag_hr.utils.directory import EmployeeDirectory, get_directory
+from rag_hr.utils.store import get_store, import_once
+from rag_hr.utils.analytics import AnalyticsAggregator
+from rag_hr.utils.hr_frames import HRFrames, SLA_BUSINESS_DAYS
 import hashlib
 import re
 import requests
@@ -12,154 +22,65 @@ import json
 import re
 
 app = Flask(__name__)
-app.secret_key = os.urandom(24)
+# Set FLASK_SECRET_KEY to keep sessions valid across workers and restarts
+app.secret_key = os.getenv('FLASK_SECRET_KEY') or os.urandom(24)
 roles = ['Employee', 'Manager', 'HR', 'Director']
 USERS_CSV = 'users.csv'
 REQUESTS_CSV = 'requests.csv'
+EMPLOYEES_CSV = 'rag_hr/data/rag_seed_data/data/employees.csv'
+ATTENDANCE_CSV = 'rag_hr/data/rag_seed_data/data/attendance_sample.csv'
+REQUESTS_SAMPLE_CSV = 'rag_hr/data/rag_seed_data/data/requests_sample.csv'
+PERFORMANCE_CSV = 'rag_hr/data/rag_seed_data/data/performance_metrics_sample.csv'
+# Indexed by email / employee_id and reloaded when the file changes; all writes go through it
+employees = get_directory(EmployeeDirectory, EMPLOYEES_CSV)
+# Accounts, requests and attendance live in SQLite; the CSVs above are imported once into a new database
+store = get_store(os.getenv('HR_DB_PATH', 'hr.db'))
+import_once(store, users_csv=USERS_CSV, requests_csv=REQUESTS_CSV, attendance_csv=ATTENDANCE_CSV)
+# /analytics and /hr_analytics rollups, updated from new rows only
+analytics_rollups = AnalyticsAggregator(REQUESTS_SAMPLE_CSV, PERFORMANCE_CSV, store)
+# Typed, cached frames of the HR data tables for department/SLA aggregates
+hr_frames = HRFrames(store=store)
+# Entity questions in /chat see live check-ins
+hr_lookup.use_store(store)
 
 load_dotenv()
-GROQ_API_KEY = os.getenv('GROQ_API_KEY')
-GROQ_MODEL = os.getenv('GROQ_MODEL')
 
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
 def save_user(name, email, password, role):
-    exists = os.path.exists(USERS_CSV)
-    with open(USERS_CSV, 'a') as f:
-        if not exists:
-            f.write('name,email,password,role\n')
-        f.write(f'{name},{email},{hash_password(password)},{role}\n')
+    return store.add_user(name, email, hash_password(password), role)
 
 def get_user(email):
-    if not os.path.exists(USERS_CSV):
-        return None
-    with open(USERS_CSV) as f:
-        for line in f:
-            if line.startswith('name,'): continue
-            name, em, pw, role = line.strip().split(',')
-            if em == email:
-                return {'name': name, 'email': em, 'password': pw, 'role': role}
-    return None
+    return store.get_user(email)
 
 def get_employee_id_by_email(email):
-    with open('rag_hr/data/rag_seed_data/data/employees.csv') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row['email'] == email:
-                return row['employee_id']
-    return None
+    row = employees.by_email(email)
+    return row['employee_id'] if row else None
 
 def get_employee_by_email_and_id(email, emp_id):
-    with open('rag_hr/data/rag_seed_data/data/employees.csv') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row['email'] == email and row['employee_id'] == emp_id:
-                return row
-    return None
+    row = employees.find(email, emp_id)
+    return dict(row) if row else None
 
 def validate_signup(email, emp_id, role):
-    with open('rag_hr/data/rag_seed_data/data/employees.csv') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row['email'] == email and row['employee_id'] == emp_id and row['role'] == role:
-                return True
-    return False
-
-def add_employee_to_csv(employee_id, name, email, phone, role, department, location, joining_date, employment_type, manager_id):
-    exists = False
-    with open('rag_hr/data/rag_seed_data/data/employees.csv') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row['email'] == email or row['employee_id'] == employee_id:
-                exists = True
-                break
-    if not exists:
-        with open('rag_hr/data/rag_seed_data/data/employees.csv', 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([employee_id, name, email, phone, role, department, location, joining_date, employment_type, manager_id])
-        return True
-    return False
+    return employees.find(email, emp_id, role) is not None
+
+def add_employee_to_csv(employee_id, name, email, phone='', role='', department='', location='', joining_date='', employment_type='', manager_id=''):
+    return employees.add(employee_id=employee_id, name=name, email=email, phone=phone, role=role, department=department,
+                         location=location, joining_date=joining_date, employment_type=employment_type, manager_id=manager_id)
+
+# Local tier tried before the LLM: memo, keyword rules, then nearest centroid on embeddings
+request_classifier = RequestClassifier(
+    retriever_encoder(INDEX_PATH, META_PATH),
+    labelled_fn=store.labelled_requests,
+    threshold=CLASSIFY_LOCAL_THRESHOLD,
+)
 
 def classify_request(details):
-    """
-    Classify request using Groq model API.
-    Returns: category string (leave, expense, attendance, overtime, promotion, transfer, resignation, travel, other)
-    """
-    # Check if Groq API is available
-    try:
-        if not GROQ_API_KEY or not GROQ_MODEL:
-            return 'other'
-    except NameError:
-        return 'other'
+    return classify_with_fallback(request_classifier, details)
 
-    # Use the same Groq client as the chatbot
-    from groq import Groq
-    try:
-        client = Groq(api_key="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")
-        
-        system_prompt = (
-            "You are an HR request classifier. Your SOLE output MUST be a JSON object "
-            "with a single key named 'category'. The value must be ONE of these exact words: "
-            "leave, expense, attendance, overtime, promotion, transfer, resignation, travel, loan, other.\n\n"
-            "Classification guidelines:\n"
-            "- leave: time off, vacation, sick days, absence, holidays\n"
-            "- expense: reimbursement, claims, travel costs, meals, accommodation\n"
-            "- attendance: late arrival, early departure, check-in/out issues\n"
-            "- overtime: extra hours, weekend work, after-hours work, overtime pay, extra hours pay\n"
-            "- promotion: career advancement, salary increase, raise\n"
-            "- transfer: department change, relocation, move to different role\n"
-            "- resignation: quitting, leaving job, termination\n"
-            "- travel: business trips, conferences, work-related travel\n"
-            "- loan: financial assistance, advance salary, emergency funds\n"
-            "- other: anything that doesn't fit the above categories\n\n"
-            "Examples:\n"
-            "- 'I want to claim my extra hours pay' → overtime\n"
-            "- 'I need a loan of 10,000' → loan\n"
-            "- 'I want 3 days off' → leave"
-        )
-        user_prompt = f"Request to classify: {details}"
-
-        response = client.chat.completions.create(
-            model=GROQ_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            response_format={"type": "json_object"},
-            max_tokens=50,
-            temperature=0.0
-        )
-        
-        result = response.choices[0].message.content.strip()
-        print(f"DEBUG: Raw API response: {result}")
-        
-        # Parse JSON response
-        import json
-        try:
-            parsed_data = json.loads(result)
-            category = parsed_data.get('category', '').strip().lower()
-            print(f"DEBUG: Parsed category: {category}")
-            
-            # Validate category
-            valid_categories = ['leave', 'expense', 'attendance', 'overtime', 'promotion', 'transfer', 'resignation', 'travel', 'loan', 'other']
-            if category in valid_categories:
-                return category
-            else:
-                print(f"DEBUG: Invalid category '{category}', returning 'other'")
-                return 'other'
-                
-        except json.JSONDecodeError as je:
-            print(f"DEBUG: JSON decode error: {je}")
-            return 'other'
-            
-    except Exception as e:
-        # Log error but continue with fallback
-        with open('groq_classification.log', 'a') as logf:
-            logf.write(f"Groq classification error: {e}\n")
-        print(f"DEBUG: Classification failed with error: {e}")
-        print(f"DEBUG: Request details: {details}")
-        return 'other'
+async def classify_request_async(details):
+    return await aclassify_with_fallback(request_classifier, details)
 
 def validate_leave_policy(req_type, details):
     # Load leave policy rules
@@ -265,10 +186,36 @@ def chat():
     ref = None
     if request.method == 'POST':
         question = request.form.get('question')
-        answer, citations = retrieve_hr_answer(question)
+        employee_id = session.get('employee_id')
+        answer, citations = retrieve_hr_answer(question, where=scope_for(role, employee_id), employee_id=employee_id)
         ref = ', '.join(citations)
     return render_template('chat.html', role=role, answer=answer, ref=ref)
 
+@app.route('/chat/stream')
+def chat_stream():
+    # Server-sent events: citations as soon as retrieval finishes, then answer tokens
+    question = request.args.get('question', '')
+    employee_id = session.get('employee_id')
+    where = scope_for(session.get('role'), employee_id)
+    def events():
+        # werkzeug closes this generator when the client disconnects; pass that on to the LLM stream
+        with closing(stream_hr_answer(question, where=where, employee_id=employee_id)) as answer:
+            for event, data in answer:
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        yield "event: done\ndata: {}\n\n"
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/chat_stats')
+def chat_stats():
+    # Cache hit rate, embedding batch, reranker, context packing and request classifier counters, for tuning
+    if session.get('role') != 'HR':
+        return redirect(url_for('dashboard'))
+    retriever = get_retriever(INDEX_PATH, META_PATH)
+    return jsonify({'answer_cache': answer_cache.stats(), 'embed_batcher': retriever.batcher.stats.snapshot(),
+                    'reranker': get_reranker().stats.snapshot(), 'context_packer': context_packer.stats.snapshot(),
+                    'request_classifier': request_classifier.stats()})
+
 @app.route('/attendance', methods=['GET', 'POST'])
 def attendance():
     role = session.get('role')
@@ -281,83 +228,90 @@ def attendance():
         action = request.form.get('action')
         if action == 'check_in':
             message = f'Checked in at {now}'
-            with open('rag_hr/data/rag_seed_data/data/attendance_sample.csv', 'a') as f:
-                f.write(f"{employee_id},{now[:10]},{now},,,0.0,Present\n")
+            store.check_in(employee_id, now)
         elif action == 'check_out':
             message = f'Checked out at {now}'
-            with open('rag_hr/data/rag_seed_data/data/attendance_sample.csv', 'a') as f:
-                f.write(f"{employee_id},{now[:10]},,{now},,,0.0,Present\n")
-    with open('rag_hr/data/rag_seed_data/data/attendance_sample.csv') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if employee_id and row.get('employee_id') == employee_id:
-                attendance_records.append(row)
+            store.check_out(employee_id, now)
+    if employee_id:
+        attendance_records = store.attendance_for(employee_id)
     return render_template('attendance.html', role=role, employee_id=employee_id, attendance_records=attendance_records, message=message)
 
+def submit_request(user, details, classified_type):
+    """Validate and store a classified request. Returns (message, approver, accepted)."""
+    # Leave request validation and approval chain
+    if classified_type == 'leave':
+        valid, msg = validate_leave_policy(classified_type, details)
+        if not valid:
+            return f"Leave request invalid: {msg}", None, False
+    approval_chain = get_approval_chain(classified_type)
+    approver = approval_chain[0] if approval_chain else 'HR'
+    status = f"Pending ({' > '.join(approval_chain)})"
+    store.add_request(user['email'], details, classified_type, status, approver)
+    return 'Request submitted!', approver, True
+
+def load_user_requests(email):
+    return store.requests_for(email)
+
 @app.route('/requests', methods=['GET', 'POST'])
 def requests_page():
     role = session.get('role')
     user = session.get('user')
     if not user:
         return redirect(url_for('role_login'))
-    requests_list = []
     message = None
     classified_type = None
     approver = None
     if request.method == 'POST':
         details = request.form['details']
         classified_type = classify_request(details)
-        status = 'Pending'
-        # Leave request validation and approval chain
-        if classified_type == 'leave':
-            valid, msg = validate_leave_policy(classified_type, details)
-            if not valid:
-                message = f"Leave request invalid: {msg}"
-                return render_template('requests.html', role=role, requests_list=requests_list, message=message, classified_type=classified_type, approver=approver)
-        approval_chain = get_approval_chain(classified_type)
-        approver = approval_chain[0] if approval_chain else 'HR'
-        status = f"Pending ({' > '.join(approval_chain)})"
-        with open(REQUESTS_CSV, 'a') as f:
-            if os.stat(REQUESTS_CSV).st_size == 0:
-                f.write('email,details,classified_type,status,approver\n')
-            f.write(f"{user['email']},{details},{classified_type},{status},{approver}\n")
-        message = 'Request submitted!'
+        message, approver, accepted = submit_request(user, details, classified_type)
+        if not accepted:
+            return render_template('requests.html', role=role, requests_list=[], message=message, classified_type=classified_type, approver=approver)
     # Load requests for this user
-    if os.path.exists(REQUESTS_CSV):
-        with open(REQUESTS_CSV) as f:
-            for line in f:
-                if line.startswith('email,'): continue
-                parts = line.strip().split(',', 4)
-                if len(parts) == 5:
-                    email, details, classified_type, status, approver = parts
-                else:
-                    email, details, classified_type, status = parts
-                    approver = 'HR'
-                if user and email == user['email']:
-                    requests_list.append({'details': details, 'classified_type': classified_type, 'status': status, 'approver': approver})
+    requests_list = load_user_requests(user['email'])
     
     # Only show success box if a request was just submitted
     show_success = request.method == 'POST' and classified_type is not None
     return render_template('requests.html', role=role, requests_list=requests_list, message=message, classified_type=classified_type if show_success else None, approver=approver if show_success else None)
 
+REQUEST_PAGE_SIZE = 50
+
+def request_page_args(args):
+    """Listing filters and page from the query string: (filters, before, limit)."""
+    filters = {key: args.get(key, '').strip() for key in ('status', 'type', 'approver', 'date_from', 'date_to')}
+    before = args.get('before', type=int)
+    limit = min(max(args.get('limit', REQUEST_PAGE_SIZE, type=int), 1), 500)
+    return {k: v for k, v in filters.items() if v}, before, limit
+
+def load_request_page(args):
+    """(requests, next_cursor, filters, error) for an HR listing page."""
+    filters, before, limit = request_page_args(args)
+    try:
+        rows, next_cursor = store.query_requests(before=before, limit=limit, **filters)
+    except ValueError:
+        return [], None, filters, 'Dates must be YYYY-MM-DD.'
+    for r in rows:
+        r['timestamp'] = r['created_at'] or 'Imported'  # rows imported from the old CSV have no timestamp
+    return rows, next_cursor, filters, None
+
 @app.route('/hr_requests')
 def hr_requests():
     role = session.get('role')
     if role != 'HR':
         return redirect(url_for('dashboard'))
-    all_requests = []
-    if os.path.exists(REQUESTS_CSV):
-        with open(REQUESTS_CSV) as f:
-            for line in f:
-                if line.startswith('email,'): continue
-                parts = line.strip().split(',', 4)
-                if len(parts) == 5:
-                    email, details, classified_type, status, approver = parts
-                else:
-                    email, details, classified_type, status = parts
-                    approver = 'HR'
-                all_requests.append({'email': email, 'details': details, 'classified_type': classified_type, 'status': status, 'approver': approver})
-    return render_template('hr_requests.html', role=role, all_requests=all_requests)
+    all_requests, next_cursor, filters, error = load_request_page(request.args)
+    return render_template('hr_requests.html', role=role, all_requests=all_requests, next_cursor=next_cursor,
+                           filters=filters, error=error)
+
+@app.route('/api/requests')
+def api_requests():
+    # Same filters as the HR pages; follow next_cursor (?before=...) for older requests
+    if session.get('role') != 'HR':
+        return jsonify({'error': 'forbidden'}), 403
+    rows, next_cursor, filters, error = load_request_page(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    return jsonify({'requests': rows, 'next_cursor': next_cursor, 'filters': filters})
 
 @app.route('/approvals', methods=['GET', 'POST'])
 def approvals():
@@ -373,146 +327,38 @@ def approvals():
         request_id = request.form.get('request_id')
         
         if action and request_id:
-            # Update request status in CSV
-            if os.path.exists(REQUESTS_CSV):
-                # Read all requests
-                requests_data = []
-                with open(REQUESTS_CSV, 'r') as f:
-                    lines = f.readlines()
-                
-                # Process each line
-                for i, line in enumerate(lines):
-                    if line.startswith('email,'):
-                        requests_data.append(line)
-                        continue
-                    
-                    parts = line.strip().split(',', 4)
-                    if len(parts) >= 4:
-                        email, details, classified_type, status, approver = parts[0], parts[1], parts[2], parts[3], parts[4] if len(parts) > 4 else 'HR'
-                        
-                        # Check if this is the request to update
-                        if str(i) == request_id:
-                            if action == 'approve':
-                                new_status = 'Approved'
-                                message = f"Request approved successfully!"
-                            elif action == 'disapprove':
-                                new_status = 'Disapproved'
-                                message = f"Request disapproved."
-                            else:
-                                error = "Invalid action"
-                                break
-                            
-                            requests_data.append(f"{email},{details},{classified_type},{new_status},{approver}\n")
-                        else:
-                            requests_data.append(line)
-                
-                # Write back to CSV
-                with open(REQUESTS_CSV, 'w') as f:
-                    f.writelines(requests_data)
+            if action == 'approve':
+                new_status = 'Approved'
+                message = f"Request approved successfully!"
+            elif action == 'disapprove':
+                new_status = 'Disapproved'
+                message = f"Request disapproved."
             else:
-                error = "No requests file found"
+                error = "Invalid action"
+            # Update the one row in place
+            if not error and not (request_id.isdigit() and store.set_request_status(int(request_id), new_status)):
+                message = None
+                error = "Request not found"
     
-    # Load all requests for HR
-    all_requests = []
-    if os.path.exists(REQUESTS_CSV):
-        with open(REQUESTS_CSV, 'r') as f:
-            for i, line in enumerate(f):
-                if line.startswith('email,'):
-                    continue
-                
-                parts = line.strip().split(',', 4)
-                if len(parts) >= 4:
-                    email, details, classified_type, status, approver = parts[0], parts[1], parts[2], parts[3], parts[4] if len(parts) > 4 else 'HR'
-                    
-                    # Show all requests (pending, approved, disapproved)
-                    all_requests.append({
-                        'id': i,
-                        'email': email,
-                        'details': details,
-                        'classified_type': classified_type,
-                        'status': status,
-                        'approver': approver,
-                        'timestamp': 'Recently'  # You can add actual timestamp if needed
-                    })
+    # One page of requests for HR (pending, approved, disapproved), filtered from the query string
+    all_requests, next_cursor, filters, page_error = load_request_page(request.args)
     
-    return render_template('approvals.html', role=role, all_requests=all_requests, message=message, error=error)
+    return render_template('approvals.html', role=role, all_requests=all_requests, message=message,
+                           error=error or page_error, next_cursor=next_cursor, filters=filters)
 
 @app.route('/analytics', methods=['GET', 'POST'])
 def analytics():
     emp_id_search = request.args.get('search_id') or request.form.get('search_id')
-    # Requests by Type and Status
-    req_types = {}
-    req_status = {'Approved': 0, 'Pending': 0, 'Cancelled': 0}
-    req_type_status = {}
-    employee_requests = []
-    grouped_by_emp = {}
-    if os.path.exists('rag_hr/data/rag_seed_data/data/requests_sample.csv'):
-        with open('rag_hr/data/rag_seed_data/data/requests_sample.csv') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                emp_id = row.get('employee_id', 'Unknown')
-                t = row.get('request_type', 'Unknown')
-                s = row.get('status', 'Unknown')
-                req_types[t] = req_types.get(t, 0) + 1
-                if s in req_status:
-                    req_status[s] += 1
-                if t not in req_type_status:
-                    req_type_status[t] = {'Approved': 0, 'Pending': 0, 'Cancelled': 0}
-                if s in req_type_status[t]:
-                    req_type_status[t][s] += 1
-                if emp_id not in grouped_by_emp:
-                    grouped_by_emp[emp_id] = {'Approved': 0, 'Pending': 0, 'Cancelled': 0}
-                if s in grouped_by_emp[emp_id]:
-                    grouped_by_emp[emp_id][s] += 1
-                if emp_id_search and emp_id == emp_id_search:
-                    employee_requests.append(row)
-    request_types = list(req_types.keys())
-    request_counts = list(req_types.values())
-    status_labels = list(req_status.keys())
-    status_counts = list(req_status.values())
-    grouped_status = {k: [v['Approved'], v['Pending'], v['Cancelled']] for k, v in req_type_status.items()}
-    grouped_emp_status = {k: [v['Approved'], v['Pending'], v['Cancelled']] for k, v in grouped_by_emp.items()}
-    # Performance Metrics
-    perf_data = []
-    if os.path.exists('rag_hr/data/rag_seed_data/data/performance_metrics_sample.csv'):
-        with open('rag_hr/data/rag_seed_data/data/performance_metrics_sample.csv') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                perf_data.append({
-                    'employee_id': row.get('employee_id', 'Unknown'),
-                    'task_completion_rate': float(row.get('task_completion_rate', 0)),
-                    'hours_logged': float(row.get('hours_logged', 0)),
-                    'contribution_score': float(row.get('contribution_score', 0))
-                })
-    filtered_perf = None
+    rollups = analytics_rollups.overview()
+    searched_employee, employee_requests, employee_attendance = None, [], []
     if emp_id_search:
-        filtered = [emp for emp in perf_data if emp['employee_id'] == emp_id_search]
-        filtered_perf = filtered[0] if filtered else None
-    # Attendance Data
-    attendance_summary = {}
-    employee_attendance = []
-    if os.path.exists('rag_hr/data/rag_seed_data/data/attendance_sample.csv'):
-        with open('rag_hr/data/rag_seed_data/data/attendance_sample.csv') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                emp_id = row.get('employee_id', 'Unknown')
-                if row.get('status') == 'Present':
-                    attendance_summary[emp_id] = attendance_summary.get(emp_id, 0) + 1
-                if emp_id_search and emp_id == emp_id_search:
-                    employee_attendance.append(row)
+        searched_employee, employee_requests, employee_attendance = analytics_rollups.employee(emp_id_search)
     return render_template('analytics.html',
-        request_types=request_types,
-        request_counts=request_counts,
-        status_labels=status_labels,
-        status_counts=status_counts,
-        grouped_status=grouped_status,
-        grouped_emp_status=grouped_emp_status,
-        perf_data=perf_data,
         search_id=emp_id_search,
-        searched_employee=filtered_perf,
+        searched_employee=searched_employee,
         employee_requests=employee_requests,
-        attendance_summary=attendance_summary,
-        employee_attendance=employee_attendance)
+        employee_attendance=employee_attendance,
+        **rollups)
 
 @app.route('/signup', methods=['GET', 'POST'])
 def signup():
@@ -526,7 +372,7 @@ def signup():
         if get_user(email):
             error = 'Email already registered.'
         elif not validate_signup(email, emp_id, role):
-            add_employee_to_csv(name, email, emp_id, role)
+            add_employee_to_csv(emp_id, name, email, role=role)
         save_user(name, email, password, role)
         return redirect(url_for('login'))
     return render_template('signup.html', error=error)
@@ -558,30 +404,18 @@ def logout():
 
 @app.route('/hr_analytics')
 def hr_analytics():
-    # Requests by Type
-    req_types = {}
-    if os.path.exists('rag_hr/data/rag_seed_data/data/requests_sample.csv'):
-        with open('rag_hr/data/rag_seed_data/data/requests_sample.csv') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                t = row.get('request_type', 'Unknown')
-                req_types[t] = req_types.get(t, 0) + 1
-    request_types = list(req_types.keys())
-    request_counts = list(req_types.values())
-    # Performance Metrics
-    perf_names = []
-    perf_scores = []
-    if os.path.exists('rag_hr/data/rag_seed_data/data/performance_metrics_sample.csv'):
-        with open('rag_hr/data/rag_seed_data/data/performance_metrics_sample.csv') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                perf_names.append(row.get('employee_id', 'Unknown'))
-                perf_scores.append(float(row.get('score', 0)))
+    rollups = analytics_rollups.overview()
+    breached, sla_by_type, sla_by_approver = hr_frames.sla_breaches()
     return render_template('hr_analytics.html',
-        request_types=request_types,
-        request_counts=request_counts,
-        perf_names=perf_names,
-        perf_scores=perf_scores)
+        request_types=rollups['request_types'],
+        request_counts=rollups['request_counts'],
+        perf_names=[row['employee_id'] for row in rollups['perf_data']],
+        perf_scores=[row['score'] for row in rollups['perf_data']],
+        dept_attendance=hr_frames.attendance_by_department().reset_index().to_dict('records'),
+        sla_breached=len(breached),
+        sla_by_type=sla_by_type.to_dict(),
+        sla_by_approver=sla_by_approver.head(10).to_dict(),
+        sla_days=SLA_BUSINESS_DAYS)
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,106 @@
+"""Asyncio serving mode.
+
+    uvicorn asgi:app --port 5000
+
+/chat, /chat/stream and /requests are served by async handlers: retrieval
+and file access run in the default executor and LLM calls are awaited, so
+a request waiting on Groq does not pin a thread. Every other route is the
+unchanged Flask app, mounted as WSGI. Sessions are shared with it (same
+signed cookie), so set FLASK_SECRET_KEY when running several workers.
+"""
+import asyncio
+import json
+from contextlib import aclosing
+from a2wsgi import WSGIMiddleware
+from itsdangerous import BadSignature
+from flask import render_template, url_for
+from starlette.applications import Starlette
+from starlette.responses import HTMLResponse, RedirectResponse, StreamingResponse
+from starlette.routing import Route, Mount
+from app import app as flask_app, classify_request_async, submit_request, load_user_requests
+from rag_hr.query import aretrieve_hr_answer, astream_hr_answer, scope_for
+
+def flask_session(request):
+    # Decode the Flask session cookie (read-only; login/logout stay on the Flask side)
+    cookie = request.cookies.get(flask_app.config['SESSION_COOKIE_NAME'])
+    if not cookie:
+        return {}
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    try:
+        return serializer.loads(cookie, max_age=int(flask_app.permanent_session_lifetime.total_seconds()))
+    except BadSignature:
+        return {}
+
+def render(request, template, **context):
+    # Flask templates use url_for, so render inside a request context for this path
+    with flask_app.test_request_context(request.url.path):
+        return HTMLResponse(render_template(template, **context))
+
+def redirect_to(endpoint):
+    with flask_app.test_request_context():
+        return RedirectResponse(url_for(endpoint), status_code=302)
+
+async def run_blocking(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+class ClosingStreamingResponse(StreamingResponse):
+    # Starlette leaves the body generator suspended when the client disconnects;
+    # close it so the upstream LLM stream and its pooled connection are released now
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.body_iterator.aclose()
+
+async def chat(request):
+    session = flask_session(request)
+    answer = None
+    ref = None
+    if request.method == 'POST':
+        form = await request.form()
+        employee_id = session.get('employee_id')
+        answer, citations = await aretrieve_hr_answer(form.get('question'), where=scope_for(session.get('role'), employee_id),
+                                                      employee_id=employee_id)
+        ref = ', '.join(citations)
+    return render(request, 'chat.html', role=session.get('role'), answer=answer, ref=ref)
+
+async def chat_stream(request):
+    question = request.query_params.get('question', '')
+    session = flask_session(request)
+    employee_id = session.get('employee_id')
+    where = scope_for(session.get('role'), employee_id)
+    async def events():
+        async with aclosing(astream_hr_answer(question, where=where, employee_id=employee_id)) as answer:
+            async for event, data in answer:
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        yield "event: done\ndata: {}\n\n"
+    return ClosingStreamingResponse(events(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+async def requests_page(request):
+    session = flask_session(request)
+    role = session.get('role')
+    user = session.get('user')
+    if not user:
+        return redirect_to('role_login')
+    message = None
+    classified_type = None
+    approver = None
+    if request.method == 'POST':
+        form = await request.form()
+        details = form['details']
+        classified_type = await classify_request_async(details)
+        message, approver, accepted = await run_blocking(submit_request, user, details, classified_type)
+        if not accepted:
+            return render(request, 'requests.html', role=role, requests_list=[], message=message, classified_type=classified_type, approver=approver)
+    requests_list = await run_blocking(load_user_requests, user['email'])
+    show_success = request.method == 'POST' and classified_type is not None
+    return render(request, 'requests.html', role=role, requests_list=requests_list, message=message,
+                  classified_type=classified_type if show_success else None, approver=approver if show_success else None)
+
+app = Starlette(routes=[
+    Route('/chat', chat, methods=['GET', 'POST']),
+    Route('/chat/stream', chat_stream),
+    Route('/requests', requests_page, methods=['GET', 'POST']),
+    Mount('/', WSGIMiddleware(flask_app)),
+])
@@ -0,0 +1,98 @@
+"""Columnar analytics (HRFrames) against the csv.DictReader loops the views used to run.
+
+    python -m benchmarks.bench_analytics                       # 50k employees, 20 days of attendance
+    python -m benchmarks.bench_analytics --employees 5000 --days 60
+
+Synthetic tables shaped like rag_hr/data/rag_seed_data/data are written to
+a temporary directory. Both sides compute requests per type x status,
+mean performance per employee and attendance rate per department.
+"""
+import os, csv, argparse, tempfile, time
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+from rag_hr.utils.hr_frames import HRFrames
+from benchmarks.synthetic import make_tables
+
+def row_loops(frames):
+    # The shape of the old analytics code: DictReader, dict counters, float() per cell
+    type_status = defaultdict(lambda: defaultdict(int))
+    with open(frames.path("requests")) as f:
+        for row in csv.DictReader(f):
+            type_status[row.get("type", "Unknown")][row.get("status", "Unknown")] += 1
+    perf = defaultdict(list)
+    with open(frames.path("performance")) as f:
+        for row in csv.DictReader(f):
+            perf[row["employee_id"]].append(float(row.get("contribution_score", 0)))
+    perf = {k: sum(v) / len(v) for k, v in perf.items()}
+    department = {}
+    with open(frames.path("employees")) as f:
+        for row in csv.DictReader(f):
+            department.setdefault(row["employee_id"], row["department"])
+    present, dates = defaultdict(set), set()
+    with open(frames.path("attendance")) as f:
+        for row in csv.DictReader(f):
+            dates.add(row["date"])
+            if row.get("status") == "Present":
+                present[row["employee_id"]].add(row["date"])
+    headcount, days = defaultdict(int), defaultdict(int)
+    for emp, dept in department.items():
+        headcount[dept] += 1
+        days[dept] += len(present.get(emp, ()))
+    rate = {d: days[d] / (headcount[d] * max(len(dates), 1)) for d in headcount}
+    return type_status, perf, rate
+
+def columnar(frames):
+    requests = frames.frame("requests")
+    type_status = pd.crosstab(requests["type"], requests["status"])
+    perf = frames.frame("performance").groupby("employee_id", observed=True)["contribution_score"].mean()
+    rate = frames.attendance_by_department()["attendance_rate"]
+    return type_status, perf, rate
+
+def timed(fn, *args, repeat=1):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return out, best
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--employees", type=int, default=50_000)
+    ap.add_argument("--days", type=int, default=20, help="Business days of attendance per employee")
+    ap.add_argument("--requests-per-employee", type=int, default=4)
+    ap.add_argument("--projects", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=5, help="Warm (cached) runs; the best is reported")
+    ap.add_argument("--skip-old", action="store_true", help="Only time the columnar engine")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        make_tables(tmp, args.employees, args.days, args.requests_per_employee, args.projects)
+        size = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp))
+        print(f"[Bench] {args.employees} employees, {args.employees * args.days} attendance rows, "
+              f"{args.employees * args.requests_per_employee} requests, {size / 1e6:.1f} MB "
+              f"(generated in {time.perf_counter() - start:.1f}s)")
+
+        frames = HRFrames(tmp)
+        (ts, perf, rate), t_cold = timed(columnar, frames)
+        _, t_warm = timed(columnar, frames, repeat=args.repeat)
+        print(f"[Bench] columnar, cold (load + aggregate): {t_cold:.2f}s")
+        print(f"[Bench] columnar, warm (cached frames):    {t_warm * 1000:.1f}ms")
+        for name in ("requests", "attendance", "employees", "performance"):
+            df = frames.frame(name)
+            print(f"[Bench]   {name}: {len(df)} rows, {df.memory_usage(deep=True).sum() / 1e6:.1f} MB in memory")
+        breaches, t_extra = timed(frames.sla_breaches, "2025-10-01", repeat=args.repeat)
+        print(f"[Bench] SLA breaches (warm): {t_extra * 1000:.1f}ms, {len(breaches[0])} breached requests")
+        if not args.skip_old:
+            (old_ts, old_perf, old_rate), t_old = timed(row_loops, frames)
+            print(f"[Bench] DictReader loops (every page load): {t_old:.2f}s")
+            print(f"[Bench] speedup: {t_old / t_cold:.1f}x cold, {t_old / t_warm:.0f}x warm")
+            same = (all(int(ts.loc[t, s]) == n for t, row in old_ts.items() for s, n in row.items())
+                    and np.allclose(perf.sort_index().to_numpy(), pd.Series(old_perf).sort_index().to_numpy())
+                    and np.allclose(rate.sort_index().to_numpy(), pd.Series(old_rate).sort_index().to_numpy()))
+            print(f"[Bench] identical results: {same}")
+
+if __name__ == "__main__":
+    main()
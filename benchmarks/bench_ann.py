@@ -0,0 +1,64 @@
+"""Recall@k and query latency of the ANN index types against the flat baseline.
+
+    python -m benchmarks.bench_ann --n 200000 --k 10
+"""
+import argparse, time
+import numpy as np
+import faiss
+from tabulate import tabulate
+from rag_hr.utils.ann import INDEX_TYPES, DEFAULT_PARAMS, build_index, train_size, apply_search_params
+
+def make_vectors(n: int, dim: int, n_queries: int, seed: int = 0):
+    # Clustered unit vectors, a rough stand-in for MiniLM chunk embeddings
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, n // 200), dim)).astype("float32")
+    xb = centers[rng.integers(0, len(centers), n)] + 0.6 * rng.standard_normal((n, dim)).astype("float32")
+    xq = xb[rng.integers(0, n, n_queries)] + 0.3 * rng.standard_normal((n_queries, dim)).astype("float32")
+    faiss.normalize_L2(xb)
+    faiss.normalize_L2(xq)
+    return xb, xq
+
+def build(index_type, xb, params):
+    start = time.perf_counter()
+    sample = xb[np.random.default_rng(1).permutation(len(xb))[:train_size(index_type, {**DEFAULT_PARAMS, **params}) or 1]]
+    index, info = build_index(index_type, sample, params)
+    index.add_with_ids(xb, np.arange(len(xb), dtype="int64"))
+    return index, info, time.perf_counter() - start, len(faiss.serialize_index(index)) / 1e6
+
+def measure(index, xq, k):
+    start = time.perf_counter()
+    for q in xq:  # one query at a time, like /chat
+        index.search(q.reshape(1, -1), k)
+    ms = (time.perf_counter() - start) * 1000.0 / len(xq)
+    _, I = index.search(xq, k)
+    return I, ms
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200_000, help="Vectors in the index")
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--nprobe", type=int, nargs="*", default=[4, 16, 64])
+    ap.add_argument("--ef-search", type=int, nargs="*", default=[32, 64, 128])
+    args = ap.parse_args()
+
+    xb, xq = make_vectors(args.n, args.dim, args.queries)
+    faiss.omp_set_num_threads(1)
+    index, _, build_s, size_mb = build("flat", xb, {})
+    truth, ms = measure(index, xq, args.k)
+    rows = [["flat", "-", build_s, 1.0, ms, size_mb]]
+    for index_type in INDEX_TYPES[1:]:
+        index, info, build_s, size_mb = build(index_type, xb, {})
+        name, values = ("ef_search", args.ef_search) if index_type == "hnsw" else ("nprobe", args.nprobe)
+        for value in values:
+            info["params"][name] = value
+            apply_search_params(index, info)
+            I, ms = measure(index, xq, args.k)
+            recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(I, truth)])
+            rows.append([index_type, f"{name}={value}", build_s, recall, ms, size_mb])
+    print(f"[Bench] n={args.n} dim={args.dim} queries={args.queries} k={args.k}")
+    print(tabulate(rows, headers=["index", "search", "build s", f"recall@{args.k}", "ms/query", "MB"], floatfmt=".3f"))
+
+if __name__ == "__main__":
+    main()
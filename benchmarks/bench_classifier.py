@@ -0,0 +1,124 @@
+"""Accuracy and latency of request classification: LLM only, local tier only, and local-then-LLM.
+
+    python -m benchmarks.bench_classifier                      # real Groq API from .env
+    python -m benchmarks.bench_classifier --stub --llm-latency-ms 400
+    python -m benchmarks.bench_classifier --labels my_labels.csv --threshold 0.5
+
+--labels takes a CSV with `details,category` columns; by default a small
+built-in set of phrasings that do not appear in the classifier's seeds is used.
+"""
+import argparse, os, time
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+from benchmarks.stub_llm import start_stub_server
+
+EVAL_SET = [
+    ("Need two days off next week for my sister's wedding", "leave"),
+    ("I am unwell and can't come in tomorrow", "leave"),
+    ("Requesting maternity leave from March", "leave"),
+    ("Please grant me casual leave on Friday", "leave"),
+    ("I paid for the team lunch with the client, need reimbursement", "expense"),
+    ("Fuel bill for the site visit last week", "expense"),
+    ("Submitting receipts for my internet allowance", "expense"),
+    ("My check-in was not recorded yesterday", "attendance"),
+    ("I reached office at 10 because of the strike, please mark me present", "attendance"),
+    ("Correct my attendance for 3rd August", "attendance"),
+    ("I worked 6 extra hours on Sunday for the deployment", "overtime"),
+    ("Compensation for staying late during month-end closing", "overtime"),
+    ("Please pay overtime for the night shift I covered", "overtime"),
+    ("I believe I am ready for the senior engineer role", "promotion"),
+    ("Requesting a raise based on my performance review", "promotion"),
+    ("Can my designation be upgraded to manager", "promotion"),
+    ("I want to shift to the Islamabad branch", "transfer"),
+    ("Requesting a move from sales to marketing", "transfer"),
+    ("My family is relocating so I need a transfer to Karachi", "transfer"),
+    ("I have decided to leave the organisation, one month notice", "resignation"),
+    ("Please accept my resignation effective 15th", "resignation"),
+    ("I will be quitting at the end of this month", "resignation"),
+    ("Approval needed for the training workshop in Lahore", "travel"),
+    ("I have to fly to Dubai to meet a vendor", "travel"),
+    ("Business trip to the Peshawar plant next Tuesday", "travel"),
+    ("Need a salary advance for my rent", "loan"),
+    ("Can I get 50,000 as a loan for my father's treatment", "loan"),
+    ("Facing a financial emergency, need company help with money", "loan"),
+]
+
+def load_labels(path):
+    if not path:
+        return EVAL_SET
+    df = pd.read_csv(path)
+    return list(zip(df["details"].astype(str), df["category"].astype(str).str.lower()))
+
+def llm_classifier():
+    # the app's prompt and parser
+    from rag_hr.utils.request_classifier import classify_messages, parse_category
+    from rag_hr.utils.llm_client import get_llm_client
+    client, model = get_llm_client(), os.getenv("GROQ_MODEL", "llama-3.1-70b-versatile")
+
+    def classify(text):
+        result = client.chat(classify_messages(text), model=model, response_format={"type": "json_object"},
+                             max_tokens=50, temperature=0.0)
+        return parse_category(result.strip())
+    return classify
+
+def timed(fn, items):
+    out, ms = [], []
+    for item in items:
+        start = time.perf_counter()
+        out.append(fn(item))
+        ms.append((time.perf_counter() - start) * 1000.0)
+    return out, np.array(ms)
+
+def row(name, preds, truth, ms, coverage=1.0):
+    acc = np.mean([p == t for p, t in zip(preds, truth)])
+    return [name, acc, coverage, np.percentile(ms, 50), np.percentile(ms, 95), ms.mean()]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--labels", default=None, help="CSV with details,category columns")
+    ap.add_argument("--threshold", type=float, default=float(os.getenv("CLASSIFY_LOCAL_THRESHOLD", "0.6")))
+    ap.add_argument("--requests-csv", default="requests.csv", help="Labelled submissions added to the centroids ('' for none)")
+    ap.add_argument("--stub", action="store_true", help="Use benchmarks.stub_llm instead of the real API")
+    ap.add_argument("--llm-latency-ms", type=float, default=400.0, help="Stub reply latency")
+    ap.add_argument("--no-llm", action="store_true", help="Only measure the local tier")
+    args = ap.parse_args()
+
+    if args.stub:
+        _, url = start_stub_server(latency_ms=args.llm_latency_ms)
+        os.environ.update(GROQ_BASE_URL=url, GROQ_API_KEY="stub", GROQ_MODEL="stub")
+    from rag_hr.utils.retriever import Retriever
+    from rag_hr.utils.request_classifier import RequestClassifier, load_labelled_requests
+
+    data = load_labels(args.labels)
+    texts, truth = [t for t, _ in data], [c for _, c in data]
+    encoder = Retriever("unused.faiss")  # only its encoder is used
+    labelled = (lambda: load_labelled_requests(args.requests_csv)) if args.requests_csv else None
+    clf = RequestClassifier(encoder.encode, labelled_fn=labelled, threshold=args.threshold)
+    start = time.perf_counter()
+    clf.centroids()
+    warmup_s = time.perf_counter() - start
+
+    local, local_ms = timed(clf.classify, texts)
+    clf._memo.clear()  # keep later runs honest
+    confident = np.array([p.confident for p in local])
+    rows = [row("local (all)", [p.category for p in local], truth, local_ms)]
+    if confident.any():
+        rows.append(row("local (confident)", [p.category for p, c in zip(local, confident) if c],
+                        [t for t, c in zip(truth, confident) if c], local_ms[confident], confident.mean()))
+    if not args.no_llm:
+        llm, llm_ms = timed(llm_classifier(), texts)
+        rows.append(row("llm only", llm, truth, llm_ms))
+        hybrid = [p.category if p.confident else l for p, l in zip(local, llm)]
+        rows.append(row("local -> llm", hybrid, truth, local_ms + np.where(confident, 0.0, llm_ms)))
+
+    methods = pd.Series([p.method if p.confident else "deferred" for p in local]).value_counts().to_dict()
+    print(f"[Bench] {len(texts)} labelled requests, threshold {args.threshold}, centroid build {warmup_s:.2f}s")
+    print(f"[Bench] local tier decisions: {methods}")
+    print(tabulate(rows, headers=["strategy", "accuracy", "coverage", "p50 ms", "p95 ms", "mean ms"], floatfmt=".3f"))
+    misses = [(t, p.category, c) for t, p, c in zip(texts, local, truth) if p.confident and p.category != c]
+    for text, got, want in misses:
+        print(f"[Bench] local miss: {text!r} -> {got} (expected {want})")
+
+if __name__ == "__main__":
+    main()
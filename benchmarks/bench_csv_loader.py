@@ -0,0 +1,62 @@
+"""Compare load_csv_rows against the old iterrows implementation.
+
+    python -m benchmarks.bench_csv_loader --rows 1000000
+"""
+import os, argparse, tempfile, time
+import numpy as np
+import pandas as pd
+from rag_hr.utils.loaders import load_csv_rows
+
+def load_csv_rows_iterrows(path: str, max_rows: int = None):
+    # Previous implementation, kept for comparison
+    df = pd.read_csv(path)
+    rows = []
+    for i, row in df.iterrows():
+        if max_rows and i >= max_rows: break
+        kv = [f"{col}: {row[col]}" for col in df.columns]
+        text = f"TABLE ROW from {os.path.basename(path)} | " + " | ".join(kv)
+        rows.append(text)
+    return rows
+
+def make_table(path: str, n: int, seed: int = 0):
+    # Shaped like attendance_sample.csv
+    rng = np.random.default_rng(seed)
+    days = pd.to_datetime("2024-01-01") + pd.to_timedelta(rng.integers(0, 730, n), unit="D")
+    df = pd.DataFrame({
+        "employee_id": "E" + pd.Series(rng.integers(1000, 51000, n)).astype(str),
+        "date": days.strftime("%Y-%m-%d"),
+        "check_in": days.strftime("%Y-%m-%d") + "T09:" + pd.Series(rng.integers(10, 60, n)).astype(str) + ":00",
+        "late_arrival": np.where(rng.random(n) < 0.2, "Yes", "No"),
+        "overtime_hours": rng.integers(0, 40, n) / 10.0,
+        "status": np.where(rng.random(n) < 0.95, "Present", "Absent"),
+    })
+    df.to_csv(path, index=False)
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, time.perf_counter() - start
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--chunksize", type=int, default=100_000)
+    ap.add_argument("--skip-old", action="store_true", help="Only time the vectorized loader")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "attendance_synthetic.csv")
+        make_table(path, args.rows)
+        print(f"[Bench] {args.rows} rows, {os.path.getsize(path) / 1e6:.1f} MB")
+
+        new_rows, t_new = timed(load_csv_rows, path, chunksize=args.chunksize)
+        print(f"[Bench] vectorized: {t_new:.2f}s ({args.rows / t_new:,.0f} rows/s)")
+        _, t_head = timed(load_csv_rows, path, max_rows=1000)
+        print(f"[Bench] vectorized, max_rows=1000: {t_head * 1000:.1f}ms")
+        if not args.skip_old:
+            old_rows, t_old = timed(load_csv_rows_iterrows, path)
+            print(f"[Bench] iterrows: {t_old:.2f}s ({args.rows / t_old:,.0f} rows/s)")
+            print(f"[Bench] speedup: {t_old / t_new:.1f}x, identical output: {old_rows == new_rows}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Concurrent /chat load test against a stubbed LLM.
+
+    python -m benchmarks.load_test_chat --mode asgi --concurrency 200 --requests 1000
+    python -m benchmarks.load_test_chat --mode wsgi --concurrency 200 --requests 1000
+
+Starts benchmarks.stub_llm in-process and the app (uvicorn for asgi, the
+threaded Flask server for wsgi) in a subprocess pointed at it, with the
+answer cache disabled so every request reaches the LLM. Needs a built
+index under rag_hr/vectorstore. Use --url to hit an already running server.
+"""
+import argparse, asyncio, os, subprocess, sys, time
+import numpy as np
+import httpx
+from benchmarks.stub_llm import start_stub_server
+from rag_hr.utils.llm_client import POOL_SHARD_SIZE
+
+def start_app(mode: str, port: int, llm_url: str, concurrency: int):
+    env = dict(os.environ, GROQ_BASE_URL=llm_url, USE_GROQ="1", ANSWER_CACHE_SIZE="0",
+               LLM_MAX_CONCURRENCY=str(concurrency))
+    if mode == "asgi":
+        cmd = [sys.executable, "-m", "uvicorn", "asgi:app", "--port", str(port), "--log-level", "warning"]
+    else:
+        cmd = [sys.executable, "-c", f"from app import app; app.run(port={port}, threaded=True)"]
+    return subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+async def wait_ready(url: str, timeout: float = 120.0):
+    deadline = time.time() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.time() < deadline:
+            try:
+                await client.get(url + "/chat", timeout=2.0)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.5)
+    raise RuntimeError(f"server at {url} did not come up")
+
+async def run_load(url: str, n: int, concurrency: int):
+    # one worker per concurrent user; workers share small pools (see POOL_SHARD_SIZE)
+    latencies, errors = [], 0
+    todo = iter(range(n))
+    shards = -(-concurrency // POOL_SHARD_SIZE)
+    limits = httpx.Limits(max_connections=POOL_SHARD_SIZE, max_keepalive_connections=POOL_SHARD_SIZE)
+    clients = [httpx.AsyncClient(limits=limits, timeout=120.0) for _ in range(shards)]
+
+    async def worker(client):
+        nonlocal errors
+        for i in todo:
+            start = time.perf_counter()
+            try:
+                resp = await client.post(url + "/chat", data={"question": f"How many annual leave days do I get? #{i}"})
+                ok = resp.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker(clients[w % shards]) for w in range(concurrency)))
+    finally:
+        for client in clients:
+            await client.aclose()
+    wall = time.perf_counter() - start
+    return np.array(latencies) * 1000.0, errors, wall
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mode", choices=("asgi", "wsgi"), default="asgi")
+    ap.add_argument("--url", default=None, help="Target a running server instead of starting one")
+    ap.add_argument("--port", type=int, default=5055)
+    ap.add_argument("--requests", type=int, default=500)
+    ap.add_argument("--concurrency", type=int, default=200)
+    ap.add_argument("--llm-latency-ms", type=float, default=800.0)
+    args = ap.parse_args()
+
+    proc = None
+    url = args.url
+    if url is None:
+        stub, llm_url = start_stub_server(latency_ms=args.llm_latency_ms)
+        proc = start_app(args.mode, args.port, llm_url, args.concurrency)
+        url = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(wait_ready(url))
+        ms, errors, wall = asyncio.run(run_load(url, args.requests, args.concurrency))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+    print(f"[Load] {args.mode if proc else url}: {args.requests} requests, concurrency {args.concurrency}, LLM latency {args.llm_latency_ms:.0f}ms")
+    print(f"[Load] throughput {args.requests / wall:.1f} req/s, errors {errors}")
+    print(f"[Load] latency p50 {np.percentile(ms, 50):.0f}ms  p95 {np.percentile(ms, 95):.0f}ms  p99 {np.percentile(ms, 99):.0f}ms")
+
+if __name__ == "__main__":
+    main()
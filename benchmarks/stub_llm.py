@@ -0,0 +1,109 @@
+"""Local stand-in for the chat-completions API with configurable latency.
+
+    python -m benchmarks.stub_llm --port 8808 --latency-ms 300
+    GROQ_BASE_URL=http://127.0.0.1:8808/v1 python app.py
+
+Speaks enough of the OpenAI/Groq wire format for LLMClient: JSON replies,
+streamed server-sent events, and injected 429/503 errors for retry testing.
+"""
+import argparse, json, random, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CATEGORIES = ("leave", "expense", "attendance", "overtime", "promotion", "transfer", "resignation", "travel", "loan")
+
+def keyword_category(text: str):
+    text = text.lower()
+    return next((c for c in CATEGORIES if c in text), "other")
+
+def fake_reply(payload: dict):
+    if (payload.get("response_format") or {}).get("type") == "json_object":
+        # crude keyword classifier so request classification gets plausible answers
+        text = (payload.get("messages") or [{}])[-1].get("content", "")
+        if text.startswith('{"requests"'):  # batched prompt from reclassify_requests.py
+            items = json.loads(text)["requests"]
+            return json.dumps({"categories": {str(r["id"]): keyword_category(r["text"]) for r in items}})
+        return json.dumps({"category": keyword_category(text)})
+    return "This is a stubbed answer based on the provided context."
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is visible
+    disable_nagle_algorithm = True  # headers and body are separate writes; don't add a delayed-ACK stall
+    config = {"latency_ms": 0.0, "token_ms": 0.0, "fail_rate": 0.0}
+    stats = {"requests": 0, "failures": 0, "connections": set()}
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body: bytes, content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["connections"].add(self.client_address)
+        if not self.path.endswith("/chat/completions"):
+            return self._send(404, b'{"error": "not found"}')
+        if random.random() < self.config["fail_rate"]:
+            with self.lock:
+                self.stats["failures"] += 1
+            status = random.choice((429, 503))
+            return self._send(status, b'{"error": {"message": "stub overload"}}', headers={"Retry-After": "0"})
+        time.sleep(self.config["latency_ms"] / 1000.0)
+        reply = fake_reply(payload)
+        if not payload.get("stream"):
+            body = {"choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+                    "model": payload.get("model")}
+            return self._send(200, json.dumps(body).encode("utf-8"))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for word in reply.split(" "):
+            self._chunk(f"data: {json.dumps({'choices': [{'delta': {'content': word + ' '}}]})}\n\n")
+            time.sleep(self.config["token_ms"] / 1000.0)
+        self._chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, text: str):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+def start_stub_server(port: int = 0, latency_ms: float = 0.0, token_ms: float = 0.0, fail_rate: float = 0.0):
+    """Serve in a background thread; returns (server, base_url). Call server.shutdown() when done."""
+    handler = type("Handler", (StubHandler,), {
+        "config": {"latency_ms": latency_ms, "token_ms": token_ms, "fail_rate": fail_rate},
+        "stats": {"requests": 0, "failures": 0, "connections": set()},
+        "lock": threading.Lock(),
+    })
+    server_cls = type("Server", (ThreadingHTTPServer,), {"request_queue_size": 1024})  # many simultaneous connects
+    server = server_cls(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8808)
+    ap.add_argument("--latency-ms", type=float, default=300.0, help="Delay before each reply")
+    ap.add_argument("--token-ms", type=float, default=20.0, help="Delay between streamed words")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of calls answered with 429/503")
+    args = ap.parse_args()
+    server, url = start_stub_server(args.port, args.latency_ms, args.token_ms, args.fail_rate)
+    print(f"[Stub LLM] Serving {url}/chat/completions (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""End-to-end benchmark suite: ingest, retrieval, classification and web routes.
+
+    python -m benchmarks.suite --output bench.json                       # everything, stubbed LLM
+    python -m benchmarks.suite --stages chunk embed --docs 200 --employees 2000
+    python -m benchmarks.suite --output new.json --compare bench.json    # diff two runs
+
+A synthetic corpus (markdown policies + HR tables, see benchmarks.synthetic)
+is generated in a temporary directory at the requested scale and indexed
+with rag_hr/ingest.py. The LLM is benchmarks.stub_llm with --llm-latency-ms
+unless --real-llm is given. Stages:
+
+    chunk     loading + chunking throughput (single process)
+    embed     encoder throughput in batches, and single-query encode latency
+    ingest    rag_hr/ingest.py wall time on the corpus (also builds the index used below)
+    query     retriever.search and retrieve_hr_answer latency (cache misses and hits), context
+              tokens packed and saved per question; with
+              --rerank N also cross-encoder latency and prompt tokens against plain top-k
+    classify  classify_request latency and accuracy (local tier, then the LLM)
+    routes    app.py routes through the Flask test client, as an HR user
+
+Latencies are reported in ms as mean/p50/p95/p99/max. Results are written
+as JSON with the run's settings and git commit, so runs can be compared.
+"""
+import os, sys, json, time, argparse, platform, subprocess, tempfile
+from datetime import datetime
+import numpy as np
+from tabulate import tabulate
+from benchmarks.stub_llm import start_stub_server
+from benchmarks import synthetic
+
+STAGES = ["chunk", "embed", "ingest", "query", "classify", "routes"]
+EXTENSIONS = (".md", ".txt", ".yaml", ".yml", ".csv")  # as in rag_hr/ingest.py
+
+def summarize(ms):
+    ms = np.asarray(ms, dtype="float64")
+    if not len(ms):
+        return {"n": 0}
+    return {"n": int(len(ms)), "mean": float(ms.mean()), "p50": float(np.percentile(ms, 50)),
+            "p95": float(np.percentile(ms, 95)), "p99": float(np.percentile(ms, 99)), "max": float(ms.max())}
+
+def timed_calls(fn, items):
+    """(results, per-call ms) of fn over items, called one at a time."""
+    out, ms = [], []
+    for item in items:
+        start = time.perf_counter()
+        out.append(fn(item))
+        ms.append((time.perf_counter() - start) * 1000.0)
+    return out, ms
+
+def corpus_files(root):
+    return sorted(os.path.join(d, f) for d, _, files in os.walk(root) for f in files
+                  if os.path.splitext(f)[1].lower() in EXTENSIONS)
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def bench_chunk(ctx, args):
+    from rag_hr.utils.loaders import make_chunks_for_file
+    files = corpus_files(ctx["corpus"])
+    size = sum(os.path.getsize(p) for p in files)
+    start = time.perf_counter()
+    chunks = [ch["text"] for p in files for ch in make_chunks_for_file(p)]
+    seconds = time.perf_counter() - start
+    ctx["chunks"] = chunks
+    return {"files": len(files), "mb": size / 1e6, "chunks": len(chunks), "seconds": seconds,
+            "chunks_per_s": len(chunks) / seconds, "mb_per_s": size / 1e6 / seconds}
+
+def bench_embed(ctx, args):
+    from rag_hr.utils.retriever import Retriever
+    if "chunks" not in ctx:
+        bench_chunk(ctx, args)
+    texts = ctx["chunks"][:args.embed_chunks]
+    encoder = Retriever(os.path.join(ctx["tmp"], "unused.faiss"))  # only its encoder is used
+    start = time.perf_counter()
+    encoder.encode(texts[:1])
+    load_s = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(0, len(texts), args.batch_size):
+        encoder.encode(texts[i:i + args.batch_size])
+    seconds = time.perf_counter() - start
+    _, single_ms = timed_calls(lambda q: encoder.encode([q]), ctx["questions"][:args.queries])
+    return {"model_load_s": load_s, "chunks": len(texts), "batch_size": args.batch_size, "seconds": seconds,
+            "chunks_per_s": len(texts) / seconds, "query_encode_ms": summarize(single_ms)}
+
+def bench_ingest(ctx, args):
+    from rag_hr.utils.retriever import default_manifest_path
+    index_path = os.path.join(ctx["tmp"], "index", "index.faiss")
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    cmd = [sys.executable, os.path.join("rag_hr", "ingest.py"), "--data-path", ctx["corpus"], "--index-path", index_path,
+           "--no-embed-cache", "--batch-size", str(args.batch_size), "--index-type", args.index_type]
+    if args.workers:
+        cmd += ["--workers", str(args.workers)]
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"ingest failed:\n{proc.stdout}\n{proc.stderr}")
+    with open(default_manifest_path(index_path), "r", encoding="utf-8") as f:
+        chunks = json.load(f)["next_id"]
+    ctx["index_path"] = index_path
+    return {"seconds": seconds, "chunks": chunks, "chunks_per_s": chunks / seconds, "index_type": args.index_type}
+
+def use_index(ctx, args):
+    """Point rag_hr.query (and so app.py) at the benchmark index, building it if needed."""
+    import rag_hr.query as query
+    if "index_path" not in ctx:
+        ctx["results"]["ingest"] = bench_ingest(ctx, args)
+    query.INDEX_PATH = ctx["index_path"]
+    return query
+
+def bench_query(ctx, args):
+    from rag_hr.utils import context_packer
+    query = use_index(ctx, args)
+    retriever = query.get_retriever(query.INDEX_PATH, query.META_PATH)
+    questions = ctx["questions"][:args.queries]
+    retriever.search(questions[0], args.k)  # load index and model
+    _, search_ms = timed_calls(lambda q: retriever.search(q, args.k), questions)
+
+    def answer_uncached(q, rerank=False):
+        query.answer_cache.clear()
+        return query.retrieve_hr_answer(q, args.k, rerank=rerank)
+    packed = context_packer.stats
+    before = (packed.requests, packed.tokens, packed.tokens_saved)
+    _, miss_ms = timed_calls(answer_uncached, questions)
+    n = max(packed.requests - before[0], 1)
+    context = {"token_budget": context_packer.CONTEXT_TOKEN_BUDGET, "avg_tokens": (packed.tokens - before[1]) / n,
+               "avg_tokens_saved": (packed.tokens_saved - before[2]) / n}
+    query.retrieve_hr_answer(questions[0], args.k, rerank=False)
+    _, hit_ms = timed_calls(lambda q: query.retrieve_hr_answer(q, args.k, rerank=False), [questions[0]] * len(questions))
+    out = {"k": args.k, "search_ms": summarize(search_ms), "answer_miss_ms": summarize(miss_ms),
+           "answer_hit_ms": summarize(hit_ms), "context": context}
+    if args.rerank:
+        from rag_hr.utils.reranker import RerankConfig
+        from rag_hr.utils.context_packer import estimate_tokens
+        config = RerankConfig(args.rerank, args.rerank_keep, args.token_budget)
+        def prompt_tokens(q, rerank):
+            query.answer_cache.clear()
+            pending = query.prepare_hr_answer(q, args.k, rerank=rerank)[1]
+            return estimate_tokens(pending["prompt"]), pending["timings"]
+        query.get_reranker().model  # loaded on first use; not part of a request
+        base, reranked, score_ms = [], [], []
+        for q in questions:
+            base.append(prompt_tokens(q, False)[0])
+            tokens, timings = prompt_tokens(q, config)
+            reranked.append(tokens)
+            score_ms.append(timings["rerank"]["score_ms"])
+        _, rerank_miss_ms = timed_calls(lambda q: answer_uncached(q, config), questions)
+        out["rerank"] = {"candidates": args.rerank, "keep": args.rerank_keep, "token_budget": args.token_budget,
+                         "score_ms": summarize(score_ms), "answer_miss_ms": summarize(rerank_miss_ms),
+                         "prompt_tokens": float(np.mean(reranked)), "prompt_tokens_top_k": float(np.mean(base))}
+    return out
+
+def bench_classify(ctx, args):
+    import app
+    items = synthetic.make_request_texts(args.requests, seed=1)
+    app.request_classifier.centroids()  # built on first use; not part of a request
+    before = app.request_classifier.stats()
+    labels, ms = timed_calls(app.classify_request, [t for t, _ in items])
+    after = app.request_classifier.stats()
+    decided = {k: after[k] - before[k] for k in ("memo", "rules", "embedding", "deferred")}
+    return {"requests": len(items), "accuracy": float(np.mean([l == c for l, (_, c) in zip(labels, items)])),
+            "latency_ms": summarize(ms), "decided_by": decided,
+            "local_rate": 1.0 - decided["deferred"] / max(sum(decided.values()), 1)}
+
+def bench_routes(ctx, args):
+    import app
+    from rag_hr.utils.store import import_csvs
+    from rag_hr.utils.analytics import AnalyticsAggregator
+    from rag_hr.utils.hr_frames import HRFrames, TABLES
+    use_index(ctx, args)
+    data = ctx["data"]
+    # the synthetic tables stand in for the seed data behind the listing and analytics pages
+    requests_csv = os.path.join(ctx["tmp"], "requests.csv")
+    synthetic.write_requests_csv(requests_csv, synthetic.make_request_texts(args.employees * args.requests_per_employee),
+                                 [f"e{i}@examplecorp.local" for i in range(1000, 1000 + args.employees)])
+    imported = import_csvs(app.store, requests_csv=requests_csv, attendance_csv=os.path.join(data, TABLES["attendance"][0]))
+    app.analytics_rollups = AnalyticsAggregator(os.path.join(data, TABLES["requests"][0]),
+                                                os.path.join(data, TABLES["performance"][0]), app.store)
+    app.hr_frames = HRFrames(data, store=app.store)
+
+    client = app.app.test_client()
+    with client.session_transaction() as s:
+        s["user"] = {"name": "Bench HR", "email": "bench.hr@examplecorp.local", "role": "HR"}
+        s["role"] = "HR"
+        s["employee_id"] = "E1000"
+    questions, texts = ctx["questions"], synthetic.make_request_texts(args.route_requests, seed=2)
+    routes = [
+        ("GET /dashboard", lambda i: client.get("/dashboard")),
+        ("POST /chat", lambda i: client.post("/chat", data={"question": questions[i % len(questions)]})),
+        ("GET /requests", lambda i: client.get("/requests")),
+        ("POST /requests", lambda i: client.post("/requests", data={"details": texts[i][0]})),
+        ("GET /hr_requests", lambda i: client.get("/hr_requests")),
+        ("GET /hr_requests?status=Pending", lambda i: client.get("/hr_requests?status=Pending&type=travel")),
+        ("GET /api/requests", lambda i: client.get("/api/requests?limit=100")),
+        ("GET /attendance", lambda i: client.get("/attendance")),
+        ("GET /analytics", lambda i: client.get("/analytics")),
+        ("GET /analytics?search_id", lambda i: client.get(f"/analytics?search_id=E{1000 + i % args.employees}")),
+        ("GET /hr_analytics", lambda i: client.get("/hr_analytics")),
+    ]
+    out = {"imported": imported}
+    for name, call in routes:
+        call(0)  # first hit loads templates, frames and rollups
+        responses, ms = timed_calls(call, range(args.route_requests))
+        out[name] = {**summarize(ms), "errors": sum(r.status_code != 200 for r in responses)}
+    return out
+
+BENCHES = {"chunk": bench_chunk, "embed": bench_embed, "ingest": bench_ingest, "query": bench_query,
+           "classify": bench_classify, "routes": bench_routes}
+
+def flatten(results, prefix=""):
+    out = {}
+    for k, v in results.items():
+        if isinstance(v, dict):
+            out.update(flatten(v, f"{prefix}{k}."))
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            out[prefix + k] = v
+    return out
+
+def compare(old_path, new):
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    a, b = flatten(old["results"]), flatten(new["results"])
+    rows = [[k, a[k], b[k], (b[k] - a[k]) / a[k] * 100.0 if a[k] else None] for k in sorted(a.keys() & b.keys())]
+    print(f"[Bench] {old_path} ({old['meta'].get('git')}) -> this run ({new['meta'].get('git')})")
+    print(tabulate(rows, headers=["metric", "before", "after", "change %"], floatfmt=".3f"))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--stages", nargs="*", choices=STAGES, default=STAGES)
+    ap.add_argument("--output", default="bench_results.json")
+    ap.add_argument("--compare", default=None, help="Earlier --output to diff against")
+    ap.add_argument("--docs", type=int, default=50, help="Synthetic markdown policies")
+    ap.add_argument("--employees", type=int, default=200, help="Rows in the synthetic HR tables scale with this")
+    ap.add_argument("--days", type=int, default=10, help="Attendance days per employee")
+    ap.add_argument("--requests-per-employee", type=int, default=4)
+    ap.add_argument("--batch-size", type=int, default=256, help="Encoder batch (embed and ingest)")
+    ap.add_argument("--embed-chunks", type=int, default=2000, help="Chunks encoded by the embed stage")
+    ap.add_argument("--workers", type=int, default=None, help="ingest.py --workers")
+    ap.add_argument("--index-type", default="flat", help="ingest.py --index-type")
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=6)
+    ap.add_argument("--rerank", type=int, default=0, metavar="N", help="Also time reranking N candidates (query stage)")
+    ap.add_argument("--rerank-keep", type=int, default=4)
+    ap.add_argument("--token-budget", type=int, default=1200, help="Context tokens kept by the reranker")
+    ap.add_argument("--requests", type=int, default=300, help="Texts for the classify stage")
+    ap.add_argument("--route-requests", type=int, default=30, help="Calls per route")
+    ap.add_argument("--llm-latency-ms", type=float, default=300.0)
+    ap.add_argument("--real-llm", action="store_true", help="Use the API configured in .env instead of the stub")
+    args = ap.parse_args()
+
+    tmp = tempfile.TemporaryDirectory(prefix="hr_bench_")
+    # before app/query are imported, so they pick up the stub and a scratch database
+    os.environ["HR_DB_PATH"] = os.path.join(tmp.name, "hr.db")
+    if not args.real_llm:
+        _, url = start_stub_server(latency_ms=args.llm_latency_ms)
+        os.environ.update(GROQ_BASE_URL=url, GROQ_API_KEY="stub", GROQ_MODEL="stub", USE_GROQ="1")
+
+    ctx = {"tmp": tmp.name, "corpus": os.path.join(tmp.name, "corpus"), "results": {}}
+    ctx["data"] = os.path.join(ctx["corpus"], "data")
+    start = time.perf_counter()
+    synthetic.make_policies(ctx["corpus"], args.docs)
+    synthetic.make_tables(ctx["data"], args.employees, args.days, args.requests_per_employee)
+    ctx["questions"] = synthetic.make_questions(max(args.queries, 1))
+    print(f"[Bench] Corpus: {args.docs} policies, {args.employees} employees ({time.perf_counter() - start:.1f}s to generate)")
+
+    try:
+        for stage in STAGES:
+            if stage in args.stages:
+                start = time.perf_counter()
+                ctx["results"][stage] = BENCHES[stage](ctx, args)
+                print(f"[Bench] {stage}: done in {time.perf_counter() - start:.1f}s")
+    finally:
+        tmp.cleanup()
+
+    report = {"meta": {"started": datetime.now().isoformat(timespec="seconds"), "git": git_commit(),
+                       "python": platform.python_version(), "platform": platform.platform(),
+                       "cpus": os.cpu_count(), "llm": "real" if args.real_llm else f"stub {args.llm_latency_ms}ms",
+                       "args": vars(args)},
+              "results": ctx["results"]}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    rows = [[k, v] for k, v in flatten(ctx["results"]).items()
+            if not k.endswith((".n", ".mean", ".max"))]
+    print(tabulate(rows, headers=["metric", "value"], floatfmt=".3f"))
+    print(f"[Bench] Wrote {args.output}")
+    if args.compare:
+        compare(args.compare, report)
+
+if __name__ == "__main__":
+    main()
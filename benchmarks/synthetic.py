@@ -0,0 +1,142 @@
+"""Synthetic HR data at configurable scale, shaped like rag_hr/data/rag_seed_data.
+
+    make_policies(root, docs=50)            # markdown policies under root/policies
+    make_tables(root/"data", employees=500)  # employees, attendance, requests, performance CSVs
+    make_request_texts(1000)                 # (details, category) pairs for classification
+    make_questions(200)                      # chat questions about the generated policies
+
+Everything is seeded, so two runs at the same scale produce the same files.
+"""
+import os, csv
+import numpy as np
+import pandas as pd
+from rag_hr.utils.hr_frames import TABLES
+
+DEPARTMENTS = ["Admin", "Engineering", "Finance", "HR", "IT", "Marketing", "Operations", "Procurement", "Sales", "Support"]
+REQUEST_TYPES = ["expense", "leave", "official_duty", "overtime", "promotion", "relaxation", "resignation", "transfer", "travel"]
+CITIES = ["Karachi", "Lahore", "Islamabad", "Rawalpindi", "Peshawar", "Quetta"]
+TOPICS = ["leave", "attendance", "expense", "travel", "overtime", "loan", "promotion", "transfer", "resignation", "remote work"]
+
+# category -> phrasings; {n}, {city}, {day} are filled in per request
+REQUEST_TEMPLATES = {
+    "leave": ["I need {n} days of leave from {day}", "Requesting sick leave for {n} days", "Please approve my annual leave starting {day}"],
+    "expense": ["Reimbursement of PKR {n}000 for client dinner", "Submitting receipts for {n} taxi rides", "Claim for office supplies worth {n}000"],
+    "attendance": ["My check-in on {day} was not recorded", "Please correct my attendance for {day}", "Mark me present for {day}, biometric was down"],
+    "overtime": ["I worked {n} extra hours on {day}", "Overtime pay for {n} hours during release week", "Please compensate {n} hours of weekend work"],
+    "promotion": ["Requesting promotion to senior role after {n} years", "I would like to be considered for team lead", "Promotion review request for this cycle"],
+    "transfer": ["Requesting transfer to the {city} office", "I want to move to the {city} branch", "Transfer request to {city} for family reasons"],
+    "resignation": ["Please accept my resignation with {n} weeks notice", "I am resigning effective {day}", "Submitting resignation, last day {day}"],
+    "travel": ["Business trip to {city} on {day}", "Travel approval for {city} client visit", "Need flight booking to {city} for {n} days"],
+    "loan": ["Requesting a salary advance of PKR {n}0000", "Need a loan of {n}00000 for medical expenses", "Advance salary request for {n} months"],
+}
+
+def _rng(seed):
+    return np.random.default_rng(seed)
+
+def make_policies(root, docs: int = 50, sections: int = 8, paragraphs: int = 3, seed: int = 0):
+    """Write docs markdown policies (headings, paragraphs with figures) under root/policies; returns the paths."""
+    rng = _rng(seed)
+    out_dir = os.path.join(root, "policies")
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for d in range(docs):
+        topic = TOPICS[d % len(TOPICS)]
+        lines = [f"# {topic.title()} Policy {d}", ""]
+        for s in range(sections):
+            lines += [f"## Section {s}: {topic} rule {rng.integers(100, 999)}", ""]
+            for _ in range(paragraphs):
+                days, amount, level = rng.integers(1, 30), rng.integers(1, 500) * 1000, rng.integers(1, 4)
+                dept, city = rng.choice(DEPARTMENTS), rng.choice(CITIES)
+                lines += [f"Employees in {dept} ({city}) may apply for {topic} of up to {days} working days per year. "
+                          f"Claims above PKR {amount:,} need level {level} approval from the line manager and HR. "
+                          f"Requests must be submitted {rng.integers(1, 10)} business days in advance through the portal; "
+                          f"late submissions are escalated after the 2-business-day SLA.", ""]
+        path = os.path.join(out_dir, f"{topic.replace(' ', '_')}_policy_{d}.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+        paths.append(path)
+    return paths
+
+def make_tables(data_dir, employees: int = 500, days: int = 20, requests_per_employee: int = 4,
+                projects: int = 20, seed: int = 0):
+    """Write employees, attendance, requests and performance CSVs (file names from hr_frames.TABLES)."""
+    os.makedirs(data_dir, exist_ok=True)
+    rng = _rng(seed)
+    ids = pd.Series([f"E{i}" for i in range(1000, 1000 + employees)])
+    pd.DataFrame({
+        "employee_id": ids,
+        "name": "Employee " + ids,
+        "email": ids.str.lower() + "@examplecorp.local",
+        "phone": "0300" + pd.Series(rng.integers(1_000_000, 9_999_999, employees)).astype(str),
+        "role": np.where(rng.random(employees) < 0.1, "Manager", "Employee"),
+        "department": rng.choice(DEPARTMENTS, employees),
+        "location": rng.choice(CITIES[:4], employees),
+        "joining_date": (pd.to_datetime("2015-01-01") + pd.to_timedelta(rng.integers(0, 3650, employees), unit="D")).strftime("%Y-%m-%d"),
+        "employment_type": rng.choice(["Permanent", "Contract"], employees),
+        "manager_id": ids.sample(employees, replace=True, random_state=seed).to_numpy(),
+    }).to_csv(os.path.join(data_dir, TABLES["employees"][0]), index=False)
+
+    dates = pd.bdate_range("2025-01-01", periods=days)
+    n = employees * days
+    present = rng.random(n) < 0.9
+    day = np.tile(dates.strftime("%Y-%m-%d"), employees)
+    pd.DataFrame({
+        "employee_id": np.repeat(ids.to_numpy(), days),
+        "date": day,
+        "check_in": np.char.add(day.astype(str), "T09:10:00"),
+        "check_out": np.char.add(day.astype(str), "T17:30:00"),
+        "late_arrival": np.where(rng.random(n) < 0.2, "Yes", "No"),
+        "overtime_hours": rng.integers(0, 40, n) / 10.0,
+        "status": np.where(present, "Present", "Absent"),
+    }).to_csv(os.path.join(data_dir, TABLES["attendance"][0]), index=False)
+
+    m = employees * requests_per_employee
+    pd.DataFrame({
+        "request_id": [f"R{i}" for i in range(m)],
+        "employee_id": ids.sample(m, replace=True, random_state=seed + 1).to_numpy(),
+        "type": rng.choice(REQUEST_TYPES, m),
+        "amount": np.where(rng.random(m) < 0.3, rng.integers(1000, 200_000, m), np.nan),
+        "submitted_on": (pd.to_datetime("2025-01-01") + pd.to_timedelta(rng.integers(0, 270, m), unit="D")).strftime("%Y-%m-%d"),
+        "status": rng.choice(["Approved", "Pending", "Rejected"], m, p=[0.5, 0.35, 0.15]),
+        "current_approver_id": ids.sample(m, replace=True, random_state=seed + 2).to_numpy(),
+        "comments": "",
+    }).to_csv(os.path.join(data_dir, TABLES["requests"][0]), index=False)
+
+    pids = [f"P{200 + i}" for i in range(projects)]
+    pd.DataFrame({
+        "project_id": rng.choice(pids, employees * 2),
+        "employee_id": np.repeat(ids.to_numpy(), 2),
+        "task_completion_rate": rng.random(employees * 2).round(2),
+        "hours_logged": (rng.random(employees * 2) * 160).round(1),
+        "contribution_score": rng.random(employees * 2).round(2),
+    }).to_csv(os.path.join(data_dir, TABLES["performance"][0]), index=False)
+
+def make_request_texts(n: int, seed: int = 0):
+    """n (details, category) pairs drawn from REQUEST_TEMPLATES."""
+    rng = _rng(seed)
+    categories = list(REQUEST_TEMPLATES)
+    out = []
+    for _ in range(n):
+        category = categories[rng.integers(len(categories))]
+        templates = REQUEST_TEMPLATES[category]
+        text = templates[rng.integers(len(templates))].format(
+            n=rng.integers(1, 10), city=rng.choice(CITIES), day=f"2025-{rng.integers(1, 13):02d}-{rng.integers(1, 29):02d}")
+        out.append((text, category))
+    return out
+
+def write_requests_csv(path, rows, emails):
+    """A requests.csv in the app's old row layout (email,details,type,status,approver), for store.import_csvs."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(["email", "req_type", "details", "status"])
+        for i, (details, category) in enumerate(rows):
+            writer.writerow([emails[i % len(emails)], details.replace(",", ""), category, "Pending (HR)", "HR"])
+
+def make_questions(n: int, seed: int = 0):
+    """n chat questions about the generated policies (with repeats, as real traffic has)."""
+    rng = _rng(seed)
+    forms = ["How many days of {t} can employees in {d} take?", "Who approves {t} claims above PKR {a},000?",
+             "What is the SLA for {t} requests?", "How early must I submit a {t} request?",
+             "What is the {t} policy for the {c} office?"]
+    return [forms[rng.integers(len(forms))].format(t=rng.choice(TOPICS), d=rng.choice(DEPARTMENTS),
+                                                   a=rng.integers(1, 500), c=rng.choice(CITIES)) for _ in range(n)]
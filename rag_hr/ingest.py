@@ -1,52 +1,279 @@
-import os, argparse, glob, pickle
+import os, argparse, json, hashlib, queue, threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 from tqdm import tqdm
 from sentence_transformers import SentenceTransformer
 import faiss
 from langchain.docstore.document import Document
-from utils.loaders import make_chunks_for_file
+from utils.loaders import make_chunks_for_file, chunk_meta
+from utils.embedding_cache import EmbeddingCache
+from utils.ann import INDEX_TYPES, DEFAULT_PARAMS, build_index, supports_remove, train_size
+from utils.retriever import default_meta_path, default_manifest_path, default_lexical_path
+from utils.lexical import BM25Builder, build_from_chunks
+from utils.chunk_store import ChunkStore, ChunkStoreWriter, open_chunks
+from utils.structured import ROUTED_FILES
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+# Bumped when the chunk metadata fields change; older stores are rebuilt (vectors come from the embed cache)
+META_VERSION = 2
+
+EXTENSIONS = (".md", ".txt", ".yaml", ".yml", ".csv")
 
 def iter_files(root):
-    for ext in ("**/*.md","**/*.txt","**/*.yaml","**/*.yml","**/*.csv"):
-        for p in glob.glob(os.path.join(root, ext), recursive=True):
-            yield p
-
-def build_corpus(data_path: str):
-    docs = []
-    for p in iter_files(data_path):
-        chunks = make_chunks_for_file(p)
+    # One directory walk for all extensions; hidden files/dirs skipped like glob does
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        for name in sorted(filenames):
+            if not name.startswith(".") and os.path.splitext(name)[1].lower() in EXTENSIONS:
+                yield os.path.join(dirpath, name)
+
+def chunk_file(path: str):
+    # Runs in the worker processes
+    return path, make_chunks_for_file(path)
+
+def iter_chunked_files(paths, workers: int = None, max_pending: int = None):
+    """Yield (path, chunks) in input order, loading/chunking in a process pool.
+
+    At most max_pending files are in flight, so memory does not grow with the corpus.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        for p in paths:
+            yield chunk_file(p)
+        return
+    max_pending = max_pending or workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        pending = deque()
+        for p in paths:
+            pending.append(ex.submit(chunk_file, p))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def stream_corpus(data_path: str, workers: int = None):
+    for path, chunks in iter_chunked_files(iter_files(data_path), workers):
+        rel = os.path.relpath(path, data_path)
         for ch in chunks:
-            docs.append(Document(page_content=ch["text"], metadata={"source": ch["source"]}))
-    return docs
+            yield Document(page_content=ch["text"], metadata=chunk_meta(rel, ch))
+
+def build_corpus(data_path: str, workers: int = None):
+    return list(stream_corpus(data_path, workers))
+
+def file_hash(path: str):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def load_manifest(path: str):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def atomic_write(path: str, write_fn, mode="wb"):
+    # Write to a temp file next to the target, then rename over it
+    tmp = path + ".tmp"
+    with open(tmp, mode) as f:
+        write_fn(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+_model = None
+
+def get_model():
+    # Loaded on first use, so fully cached runs never touch the model
+    global _model
+    if _model is None:
+        _model = SentenceTransformer(MODEL_NAME)
+    return _model
+
+def encode_texts(texts):
+    emb = get_model().encode(texts, convert_to_numpy=True, show_progress_bar=False).astype("float32")
+    faiss.normalize_L2(emb)
+    return emb
+
+def embed_texts(texts, cache: EmbeddingCache = None):
+    if not texts:
+        dim = cache.dim if cache and cache.dim else get_model().get_sentence_embedding_dimension()
+        return np.zeros((0, dim), dtype="float32")
+    if cache is None:
+        return encode_texts(texts)
+    return cache.encode(texts, encode_texts)
+
+def produce_batches(files, todo, hashes, manifest, batch_size, out_q, workers):
+    """Chunk files in the pool and put fixed-size batches of (id, text, meta) on out_q.
+
+    Chunk ids and manifest entries are assigned here; None marks the end and an
+    exception instance is forwarded to the consumer.
+    """
+    try:
+        batch = []
+        rels = {files[rel]: rel for rel in todo}
+        for path, chunks in iter_chunked_files(list(rels), workers):
+            rel = rels[path]
+            ids = list(range(manifest["next_id"], manifest["next_id"] + len(chunks)))
+            manifest["next_id"] += len(chunks)
+            manifest["files"][rel] = {"hash": hashes[rel], "ids": ids}
+            for i, ch in zip(ids, chunks):
+                batch.append((i, ch["text"], chunk_meta(rel, ch)))
+                if len(batch) >= batch_size:
+                    out_q.put(batch)
+                    batch = []
+        if batch:
+            out_q.put(batch)
+        out_q.put(None)
+    except Exception as e:
+        out_q.put(e)
+
+def build_from_sample(index_type, params, sample, dim):
+    """Build the index trained on the buffered (ids, vectors) batches, then add them."""
+    if not sample:  # empty corpus: nothing to train on
+        index, info = build_index("flat", np.zeros((0, dim), dtype="float32"))
+        return index, info
+    vecs = np.vstack([v for _, v in sample])
+    ids = np.concatenate([i for i, _ in sample])
+    index, info = build_index(index_type, vecs, params)
+    index.add_with_ids(vecs, ids)
+    return index, info
+
+def save_store(index, chunks: ChunkStoreWriter, lexical: BM25Builder, manifest, index_path, manifest_path):
+    # chunk store first: readers tolerate ids missing from it, not the other way round
+    chunks.close()
+    lexical.write(default_lexical_path(index_path))
+    atomic_write(index_path, lambda f: f.write(faiss.serialize_index(index).tobytes()))
+    atomic_write(manifest_path, lambda f: json.dump(manifest, f, indent=1), mode="w")
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--data-path", required=True, help="Folder with your dataset (e.g., rag_seed_data)")
     ap.add_argument("--index-path", required=True, help="Where to save FAISS index file")
-    ap.add_argument("--meta-path", default=None, help="Where to save metadata pickle (defaults to index-path + .meta.pkl)")
+    ap.add_argument("--meta-path", default=None, help="Where to save the chunk store (defaults to index-path + .chunks)")
+    ap.add_argument("--incremental", action="store_true", help="Only re-embed files whose content hash changed since the last run")
+    ap.add_argument("--embed-cache", default=None, help="Chunk embedding cache folder (defaults to index folder + /embed_cache)")
+    ap.add_argument("--no-embed-cache", action="store_true", help="Always run the model on every chunk")
+    ap.add_argument("--workers", type=int, default=None, help="Processes used to load and chunk files (default: all cores)")
+    ap.add_argument("--batch-size", type=int, default=256, help="Chunks per encoder batch")
+    ap.add_argument("--index-type", choices=INDEX_TYPES, default=None, help="FAISS index to build (default: flat, or the stored type with --incremental)")
+    ap.add_argument("--nlist", type=int, default=None, help=f"ivf/ivfpq inverted lists (default {DEFAULT_PARAMS['nlist']})")
+    ap.add_argument("--nprobe", type=int, default=None, help=f"ivf/ivfpq lists searched per query (default {DEFAULT_PARAMS['nprobe']})")
+    ap.add_argument("--pq-m", type=int, default=None, help=f"ivfpq sub-quantizers (default {DEFAULT_PARAMS['pq_m']})")
+    ap.add_argument("--hnsw-m", type=int, default=None, help=f"hnsw graph degree (default {DEFAULT_PARAMS['hnsw_m']})")
+    ap.add_argument("--ef-search", type=int, default=None, help=f"hnsw search depth (default {DEFAULT_PARAMS['ef_search']})")
+    ap.add_argument("--skip-routed-tables", action="store_true",
+                    help=f"Leave out the tables entity questions are answered from ({', '.join(ROUTED_FILES)})")
     args = ap.parse_args()
+    meta_path = args.meta_path or default_meta_path(args.index_path)
+    params = {k: v for k, v in (("nlist", args.nlist), ("nprobe", args.nprobe), ("pq_m", args.pq_m),
+                                ("hnsw_m", args.hnsw_m), ("ef_search", args.ef_search)) if v is not None}
+    manifest_path = default_manifest_path(args.index_path)
 
     print(f"[Ingest] Scanning: {args.data_path}")
-    docs = build_corpus(args.data_path)
-    print(f"[Ingest] Chunks: {len(docs)}")
-
-    # Embeddings
-    model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-    texts = [d.page_content for d in docs]
-    embeddings = model.encode(texts, convert_to_numpy=True, show_progress_bar=True)
-
-    # Build FAISS
-    dim = embeddings.shape[1]
-    index = faiss.IndexFlatIP(dim)
-    faiss.normalize_L2(embeddings)
-    index.add(embeddings)
-
-    # Save index and metadata
-    faiss.write_index(index, args.index_path)
-    meta_path = args.meta_path or (args.index_path + ".meta.pkl")
-    with open(meta_path, "wb") as f:
-        pickle.dump([{"text": d.page_content, "meta": d.metadata} for d in docs], f)
-    print(f"[Ingest] Saved index to {args.index_path}")
-    print(f"[Ingest] Saved metadata to {meta_path}")
+    files = {os.path.relpath(p, args.data_path): p for p in iter_files(args.data_path)
+             if not (args.skip_routed_tables and os.path.basename(p) in ROUTED_FILES)}
+    hashes = {rel: file_hash(p) for rel, p in files.items()}
+
+    manifest = load_manifest(manifest_path) if args.incremental else None
+    stored_type = manifest.get("index", {}).get("type", "flat") if manifest else None
+    index_type = args.index_type or stored_type or "flat"
+    if manifest and (manifest.get("model") != MODEL_NAME or manifest.get("meta_version") != META_VERSION
+                     or stored_type != index_type
+                     or not os.path.exists(args.index_path) or not os.path.exists(meta_path)):
+        print("[Ingest] Manifest does not match the stored index, rebuilding")
+        manifest = None
+    if manifest and not supports_remove(index_type) and any(hashes.get(rel) != e["hash"] for rel, e in manifest["files"].items()):
+        print(f"[Ingest] {index_type} index cannot drop changed files, rebuilding")
+        manifest = None
+    if manifest:
+        index = faiss.read_index(args.index_path)
+        old_chunks = open_chunks(meta_path)
+    else:
+        index, old_chunks = None, {}
+        manifest = {"model": MODEL_NAME, "meta_version": META_VERSION, "next_id": 0, "files": {}}
+
+    # Drop vectors of deleted and changed files
+    stale = [rel for rel, entry in manifest["files"].items() if hashes.get(rel) != entry["hash"]]
+    deleted = [rel for rel in stale if rel not in files]
+    removed_ids = []
+    for rel in stale:
+        removed_ids.extend(manifest["files"].pop(rel)["ids"])
+    if removed_ids:
+        index.remove_ids(np.array(removed_ids, dtype="int64"))
+
+    todo = [rel for rel in sorted(files) if rel not in manifest["files"]]
+    print(f"[Ingest] Files: {len(files)} (changed/added {len(todo)}, deleted {len(deleted)}), {len(removed_ids)} chunks removed")
+    if index is not None and not todo and not stale:
+        # leave the files untouched so running retrievers/caches are not invalidated
+        if not os.path.exists(default_lexical_path(args.index_path)):
+            # index built before BM25 existed
+            rows = old_chunks.items() if isinstance(old_chunks, ChunkStore) else sorted(old_chunks.items())
+            n = build_from_chunks(((i, doc["text"]) for i, doc in rows), default_lexical_path(args.index_path))
+            print(f"[Ingest] Built BM25 index for {n} chunks")
+        print("[Ingest] Index is up to date")
+        return
+
+    cache = None
+    if not args.no_embed_cache:
+        cache_dir = args.embed_cache or os.path.join(os.path.dirname(os.path.abspath(args.index_path)), "embed_cache")
+        cache = EmbeddingCache(cache_dir, MODEL_NAME)
+
+    # New chunk store: surviving rows are copied over, new ones appended as they are embedded
+    chunks = ChunkStoreWriter(meta_path)
+    lexical = BM25Builder()  # rebuilt over all surviving chunks; tokenizing is cheap next to encoding
+    removed = set(removed_ids)
+    old_rows = old_chunks.items() if isinstance(old_chunks, ChunkStore) else sorted(old_chunks.items())
+    for i, doc in old_rows:
+        if i not in removed:
+            chunks.add(i, doc["text"], doc["meta"])
+            lexical.add(i, doc["text"])
+
+    # Stream: pool chunks files -> bounded queue of batches -> encoder -> FAISS
+    batches = queue.Queue(maxsize=4)
+    producer = threading.Thread(target=produce_batches, daemon=True,
+                                args=(files, todo, hashes, manifest, args.batch_size, batches, args.workers))
+    producer.start()
+    added = 0
+    # A new index is built once a training sample has been buffered (right away for flat/hnsw)
+    sample, need = [], train_size(index_type, {**DEFAULT_PARAMS, **params})
+    with tqdm(unit="chunk", desc="[Ingest] Embedding") as bar:
+        while True:
+            batch = batches.get()
+            if batch is None:
+                break
+            if isinstance(batch, Exception):
+                raise batch
+            embeddings = embed_texts([text for _, text, _ in batch], cache)
+            ids = np.array([i for i, _, _ in batch], dtype="int64")
+            if index is None:
+                sample.append((ids, embeddings))
+                if sum(len(i) for i, _ in sample) >= need:
+                    index, manifest["index"] = build_from_sample(index_type, params, sample, embeddings.shape[1])
+                    sample = []
+            else:
+                index.add_with_ids(embeddings, ids)
+            for i, text, meta in batch:
+                chunks.add(i, text, meta)
+                lexical.add(i, text)
+            added += len(batch)
+            bar.update(len(batch))
+    producer.join()
+    if index is None:  # corpus smaller than the training sample
+        dim = sample[0][1].shape[1] if sample else embed_texts([], cache).shape[1]
+        index, manifest["index"] = build_from_sample(index_type, params, sample, dim)
+    print(f"[Ingest] Chunks: {added} added")
+    if cache:
+        print(f"[Ingest] Embedding cache: {cache.hits} hits, {cache.misses} encoded")
+
+    # Save index, metadata and manifest
+    save_store(index, chunks, lexical, manifest, args.index_path, manifest_path)
+    print(f"[Ingest] Saved {manifest['index']['type']} index to {args.index_path} ({index.ntotal} vectors)")
+    print(f"[Ingest] Saved chunk store to {meta_path}")
+    print(f"[Ingest] Saved BM25 index to {default_lexical_path(args.index_path)} ({len(lexical.doc_ids)} chunks)")
+    print(f"[Ingest] Saved manifest to {manifest_path}")
 
 if __name__ == "__main__":
     main()
@@ -1,37 +1,134 @@
-import os, argparse, pickle, faiss, numpy as np
-from sentence_transformers import SentenceTransformer
+import os, argparse, time
 from dotenv import load_dotenv
 from tabulate import tabulate
 import json
 import textwrap
+import asyncio
+from contextlib import aclosing, closing
 
-def call_llm(prompt: str):
-    # Select LLM backend using env flags
-    import os, json
-    from dotenv import load_dotenv
-    load_dotenv()
-    if os.getenv("USE_GROQ", "1") == "1":
-        from groq import Groq
-        api_key = os.getenv("GROQ_API_KEY", "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")
-        if not api_key or api_key == "your_groq_api_key_here":
-            return "[LLM ERROR] Please set a valid GROQ_API_KEY in your .env file or disable USE_GROQ."
-        try:
-            client = Groq(api_key=api_key)
-            model = os.getenv("GROQ_MODEL", "llama-3.1-70b-versatile")
-            resp = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": "You answer using ONLY the provided context. If unknown, say you don't know."},
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.2,
-            )
-            return resp.choices[0].message.content.strip()
-        except Exception as e:
-            return f"[LLM ERROR] API call failed: {str(e)}. Please check your API key and try again."
-    
-    # Fallback response when no LLM is configured
-    return "I can help you with HR questions, but I need a valid API key to provide detailed answers. Please configure your GROQ_API_KEY in the .env file."
+if __package__:
+    from .utils.retriever import get_retriever
+    from .utils.partitions import normalize_where
+    from .utils.structured import HRLookup
+    from .utils.reranker import RerankConfig, default_config as default_rerank_config, get_reranker
+    from .utils.context_packer import pack_context
+    from .utils.answer_cache import AnswerCache
+    from .utils.llm_client import get_llm_client, get_async_llm_client
+else:  # run as a script: python rag_hr/query.py
+    from utils.retriever import get_retriever
+    from utils.partitions import normalize_where
+    from utils.structured import HRLookup
+    from utils.reranker import RerankConfig, default_config as default_rerank_config, get_reranker
+    from utils.context_packer import pack_context
+    from utils.answer_cache import AnswerCache
+    from utils.llm_client import get_llm_client, get_async_llm_client
+
+load_dotenv()
+
+INDEX_PATH = 'rag_hr/vectorstore/index.faiss'
+META_PATH = None  # chunk store next to the index (index.faiss.chunks)
+
+# Answers for repeated / near-duplicate questions; flushed when the index is rebuilt
+answer_cache = AnswerCache(
+    max_entries=int(os.getenv('ANSWER_CACHE_SIZE', '512')),
+    ttl=float(os.getenv('ANSWER_CACHE_TTL', '3600')),
+    sim_threshold=float(os.getenv('ANSWER_CACHE_SIM', '0.95')),
+)
+
+# Roles that may retrieve from every partition; others see the policy/system documents
+# plus, for employees, the data rows about themselves
+UNRESTRICTED_ROLES = ("HR", "Manager", "Director")
+PUBLIC_DOC_TYPES = ("policy", "system")
+
+def scope_for(role, employee_id=None):
+    """Retrieval filter (see Retriever.search) for a signed-in role; None means everything."""
+    if role in UNRESTRICTED_ROLES:
+        return None
+    if role == "Employee" and employee_id:
+        return [{"doc_type": PUBLIC_DOC_TYPES}, {"doc_type": "data", "employee_id": employee_id}]
+    return {"doc_type": PUBLIC_DOC_TYPES}
+
+# Entity questions (an employee or request id, "my requests") are answered from the HR tables
+STRUCTURED_ROUTING = os.getenv('STRUCTURED_ROUTING', '1') == '1'
+hr_lookup = HRLookup()
+
+LLM_ERROR = "[LLM ERROR] API call failed: {}. Please check your API key and try again."
+
+class NotAnswered(str):
+    """Text shown in place of an LLM answer (no LLM configured, or the call
+    failed); remember_answer never caches it."""
+
+def _llm_messages(prompt: str):
+    return [
+        {"role": "system", "content": "You answer using ONLY the provided context. If unknown, say you don't know."},
+        {"role": "user", "content": prompt},
+    ]
+
+def _llm_unavailable(api_key):
+    # Message to show instead of an answer when no usable LLM is configured, else None
+    if os.getenv("USE_GROQ", "1") != "1":
+        # Fallback response when no LLM is configured
+        return NotAnswered("I can help you with HR questions, but I need a valid API key to provide detailed answers. Please configure your GROQ_API_KEY in the .env file.")
+    if not api_key or api_key == "your_groq_api_key_here":
+        return NotAnswered("[LLM ERROR] Please set a valid GROQ_API_KEY in your .env file or disable USE_GROQ.")
+    return None
+
+def _stream_tokens(pieces):
+    try:
+        yield from pieces
+    except Exception as e:
+        yield NotAnswered(LLM_ERROR.format(str(e)))
+
+def call_llm(prompt: str, stream: bool = False):
+    # Select LLM backend using env flags; with stream=True returns a generator of text pieces
+    client = get_llm_client()
+    msg = _llm_unavailable(client.api_key)
+    if msg:
+        return _stream_tokens([msg]) if stream else msg
+    if stream:
+        return _stream_tokens(client.chat_stream(_llm_messages(prompt), temperature=0.2))
+    try:
+        return client.chat(_llm_messages(prompt), temperature=0.2).strip()
+    except Exception as e:
+        return NotAnswered(LLM_ERROR.format(str(e)))
+
+async def acall_llm(prompt: str):
+    """call_llm for the asyncio serving mode."""
+    client = get_async_llm_client()
+    msg = _llm_unavailable(client.api_key)
+    if msg:
+        return msg
+    try:
+        return (await client.chat(_llm_messages(prompt), temperature=0.2)).strip()
+    except Exception as e:
+        return NotAnswered(LLM_ERROR.format(str(e)))
+
+async def astream_llm(prompt: str):
+    client = get_async_llm_client()
+    msg = _llm_unavailable(client.api_key)
+    if msg:
+        yield msg
+        return
+    try:
+        async with aclosing(client.chat_stream(_llm_messages(prompt), temperature=0.2)) as pieces:
+            async for piece in pieces:
+                yield piece
+    except Exception as e:
+        yield NotAnswered(LLM_ERROR.format(str(e)))
+
+def retrieve_hits(retriever, question, k, qemb=None, where=None, rerank=None):
+    """Retrieval hits for the prompt and a dict of timings.
+
+    Without rerank the top k hits are returned as they are. With a
+    RerankConfig, rerank.candidates hits are fetched and the cross-encoder
+    keeps at most rerank.keep of them within rerank.token_budget tokens.
+    """
+    start = time.perf_counter()
+    hits = retriever.search(question, rerank.candidates if rerank else k, qemb=qemb, where=where)
+    timings = {'retrieve_ms': (time.perf_counter() - start) * 1000}
+    if rerank:
+        hits, timings['rerank'] = get_reranker().rerank(question, hits, rerank.keep, rerank.token_budget)
+    return hits, timings
 
 def main():
     ap = argparse.ArgumentParser()
@@ -39,37 +136,19 @@ def main():
     ap.add_argument("--meta-path", default=None)
     ap.add_argument("--question", required=True)
     ap.add_argument("--k", type=int, default=6)
+    ap.add_argument("--doc-type", nargs="+", default=None, help="Only search these partitions (policy, system, data)")
+    ap.add_argument("--employee-id", default=None, help="Only search chunks about this employee")
+    ap.add_argument("--rerank", type=int, default=None, metavar="N",
+                    help="Rerank N candidates with the cross-encoder and keep the best --k")
+    ap.add_argument("--token-budget", type=int, default=0, help="Context tokens kept by --rerank (0 = no budget)")
+    ap.add_argument("--context-budget", type=int, default=None, help="Prompt context tokens (default CONTEXT_TOKEN_BUDGET)")
     args = ap.parse_args()
 
-    # Load index + metadata
-    index = faiss.read_index(args.index_path)
-    meta_path = args.meta_path or (args.index_path + ".meta.pkl")
-    with open(meta_path, "rb") as f:
-        docs = pickle.load(f)  # list of {text, meta}
-    texts = [d["text"] for d in docs]
-
-    # Embed query
-    model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-    qemb = model.encode([args.question], convert_to_numpy=True)
-    faiss.normalize_L2(qemb)
-    D, I = index.search(qemb, args.k)
-    I = I[0]
-
-    # Build context with lightweight dedup by source
-    seen = set()
-    context_blocks = []
-    citations = []
-    for idx in I:
-        if idx < 0: 
-            continue
-        src = docs[idx]["meta"].get("source","unknown")
-        key = (src,)
-        if key in seen: continue
-        seen.add(key)
-        context_blocks.append(f"[Source: {src}]\n{docs[idx]['text']}")
-        citations.append(src)
-
-    context = "\n\n---\n\n".join(context_blocks[:args.k])
+    where = {key: value for key, value in (("doc_type", args.doc_type), ("employee_id", args.employee_id)) if value}
+    rerank = RerankConfig(args.rerank, args.k, args.token_budget) if args.rerank else None
+    retriever = get_retriever(args.index_path, args.meta_path)
+    hits, timings = retrieve_hits(retriever, args.question, args.k, where=where, rerank=rerank)
+    context, citations, timings['context'] = pack_context(hits, args.context_budget)
 
     prompt = f"""You are an HR assistant for an internal system.
 Answer the user's question using ONLY the following context. Be specific and extract exact details from the context.
@@ -99,33 +178,54 @@ Instructions:
     print("="*80)
     print("CITED SOURCES (filenames):")
     print(", ".join(citations))
+    print("TIMINGS:", json.dumps(timings))
 
-def retrieve_hr_answer(question, k=6):
-    import faiss, pickle
-    index_path = 'rag_hr/vectorstore/index.faiss'
-    meta_path = 'rag_hr/vectorstore/index.faiss.meta.pkl'
-    index = faiss.read_index(index_path)
-    with open(meta_path, 'rb') as f:
-        docs = pickle.load(f)
-    model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-    qemb = model.encode([question], convert_to_numpy=True)
-    faiss.normalize_L2(qemb)
-    D, I = index.search(qemb, k)
-    I = I[0]
-    seen = set()
-    context_blocks = []
-    citations = []
-    for idx in I:
-        if idx < 0:
-            continue
-        src = docs[idx]['meta'].get('source', 'unknown')
-        key = (src,)
-        if key in seen:
-            continue
-        seen.add(key)
-        context_blocks.append(f"[Source: {src}]\n{docs[idx]['text']}")
-        citations.append(src)
-    context = "\n\n---\n\n".join(context_blocks[:k])
+def structured_prompt(question, context):
+    return f"""You are an HR assistant. Answer the user's question using ONLY the HR records below. Be direct and specific.
+
+Question: {question}
+
+Records (one per line, "file | column: value"; counts cover every matching row):
+{context}
+
+Instructions:
+- Use the counts for "how many" questions rather than counting the listed rows
+- Refer to people by name and id
+- If the records do not answer the question, say so
+
+Answer:"""
+
+def prepare_hr_answer(question, k=6, where=None, employee_id=None, rerank=None, token_budget=None):
+    """Return (cached (answer, citations), None) or (None, pending) where pending
+    carries the prompt and citations still to be answered by the LLM, and
+    the retrieval timings.
+
+    where restricts retrieval to matching chunks (see scope_for); employee_id
+    is the signed-in employee, for questions about "my" records. Entity
+    questions are answered from the HR tables (structured.HRLookup) and
+    bypass retrieval and the answer cache, since those rows change. rerank
+    is a RerankConfig, False to skip reranking, or None for the RERANK_*
+    settings. token_budget caps the context (context_packer; default
+    CONTEXT_TOKEN_BUDGET); timings['context'] reports the tokens saved."""
+    routed = hr_lookup.route(question, employee_id, where) if STRUCTURED_ROUTING else None
+    if routed:
+        if routed.answer:
+            return (routed.answer, routed.citations), None
+        return None, {'question': question, 'k': k, 'routed': routed.intent, 'citations': routed.citations,
+                      'prompt': structured_prompt(question, routed.context)}
+    retriever = get_retriever(INDEX_PATH, META_PATH)
+    generation = retriever.generation
+    rerank = default_rerank_config() if rerank is None else rerank or None
+    scope = (normalize_where(where), rerank, token_budget)
+    cached = answer_cache.get_exact(question, k, generation, scope)
+    if cached:
+        return cached, None
+    qemb = retriever.embed_query(question)
+    cached = answer_cache.get_similar(qemb, k, generation, scope)
+    if cached:
+        return cached, None
+    hits, timings = retrieve_hits(retriever, question, k, qemb=qemb, where=where, rerank=rerank)
+    context, citations, timings['context'] = pack_context(hits, token_budget)
     prompt = f"""You are an HR assistant. Answer the user's question using ONLY the provided context. Be direct and specific.
 
 Question: {question}
@@ -141,8 +241,67 @@ Instructions:
 - Be concise and factual
 
 Answer:"""
-    answer = call_llm(prompt)
-    return answer, citations
+    return None, {'question': question, 'k': k, 'generation': generation, 'scope': scope, 'qemb': qemb, 'citations': citations,
+                  'prompt': prompt, 'timings': timings}
+
+def remember_answer(pending, answer):
+    if not pending.get('routed') and not isinstance(answer, NotAnswered):
+        answer_cache.put(pending['question'], pending['k'], pending['generation'], answer, pending['citations'],
+                         pending['qemb'], pending['scope'])
+
+def retrieve_hr_answer(question, k=6, where=None, employee_id=None, rerank=None, token_budget=None):
+    cached, pending = prepare_hr_answer(question, k, where, employee_id, rerank, token_budget)
+    if cached:
+        return cached
+    answer = call_llm(pending['prompt'])
+    remember_answer(pending, answer)
+    return answer, pending['citations']
+
+def stream_hr_answer(question, k=6, where=None, employee_id=None, rerank=None, token_budget=None):
+    """Yield ('citations', [...]) as soon as retrieval is done, then ('token', text) pieces."""
+    cached, pending = prepare_hr_answer(question, k, where, employee_id, rerank, token_budget)
+    if cached:
+        yield 'citations', cached[1]
+        yield 'token', cached[0]
+        return
+    yield 'citations', pending['citations']
+    parts, failed = [], False
+    # closed with the caller's generator, so a client that goes away also drops the upstream stream
+    with closing(call_llm(pending['prompt'], stream=True)) as tokens:
+        for token in tokens:
+            parts.append(token)
+            failed = failed or isinstance(token, NotAnswered)
+            yield 'token', token
+    if not failed:  # a stream that broke off mid-answer is not worth replaying
+        remember_answer(pending, ''.join(parts).strip())
+
+async def aretrieve_hr_answer(question, k=6, where=None, employee_id=None, rerank=None, token_budget=None):
+    """retrieve_hr_answer for the asyncio serving mode: retrieval runs in the
+    default executor, the LLM call is awaited."""
+    loop = asyncio.get_running_loop()
+    cached, pending = await loop.run_in_executor(None, prepare_hr_answer, question, k, where, employee_id, rerank, token_budget)
+    if cached:
+        return cached
+    answer = await acall_llm(pending['prompt'])
+    remember_answer(pending, answer)
+    return answer, pending['citations']
+
+async def astream_hr_answer(question, k=6, where=None, employee_id=None, rerank=None, token_budget=None):
+    loop = asyncio.get_running_loop()
+    cached, pending = await loop.run_in_executor(None, prepare_hr_answer, question, k, where, employee_id, rerank, token_budget)
+    if cached:
+        yield 'citations', cached[1]
+        yield 'token', cached[0]
+        return
+    yield 'citations', pending['citations']
+    parts, failed = [], False
+    async with aclosing(astream_llm(pending['prompt'])) as tokens:
+        async for token in tokens:
+            parts.append(token)
+            failed = failed or isinstance(token, NotAnswered)
+            yield 'token', token
+    if not failed:
+        remember_answer(pending, ''.join(parts).strip())
 
 if __name__ == "__main__":
     main()
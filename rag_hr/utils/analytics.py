@@ -0,0 +1,163 @@
+import os, csv, io, threading
+from collections import Counter
+
+STATUS_BUCKETS = ("Approved", "Pending", "Cancelled")  # the statuses the analytics charts break down
+
+class CsvTail:
+    """Reads an append-only CSV incrementally.
+
+    read_new() returns the rows added since the last call (as dicts) and
+    whether the file was replaced or truncated, in which case every row is
+    returned again and the caller should rebuild from scratch. Only whole
+    lines are consumed, so a row being written concurrently is picked up
+    on the next call.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self.inode = None
+        self.header = None
+
+    def read_new(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            reset = self.offset > 0
+            self.offset, self.inode, self.header = 0, None, None
+            return [], reset
+        reset = self.inode is not None and (st.st_ino != self.inode or st.st_size < self.offset)
+        if reset:
+            self.offset, self.header = 0, None
+        self.inode = st.st_ino
+        if st.st_size == self.offset:
+            return [], reset
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(st.st_size - self.offset)
+        end = data.rfind(b"\n") + 1
+        if end == 0:
+            return [], reset
+        self.offset += end
+        reader = csv.reader(io.StringIO(data[:end].decode("utf-8")))
+        if self.header is None:
+            self.header = next(reader, None)
+        return [dict(zip(self.header, row)) for row in reader if row], reset
+
+class AnalyticsAggregator:
+    """Rollups behind /analytics and /hr_analytics, maintained incrementally.
+
+    refresh() folds in only what changed since the previous call: rows
+    appended to the request and performance CSVs (tailed from their last
+    offset) and attendance rows added to the store (by id watermark). A
+    replaced CSV rebuilds just its own rollups, and so does attendance when
+    the store holds fewer rows than were folded in. Per-employee drill-downs
+    are served from dicts keyed by employee_id instead of a scan.
+    """
+
+    def __init__(self, requests_csv: str, performance_csv: str, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._requests = CsvTail(requests_csv)
+        self._performance = CsvTail(performance_csv)
+        self._reset_requests()
+        self._reset_performance()
+        self._reset_attendance()
+
+    def _reset_requests(self):
+        self.req_types = Counter()
+        self.req_status = dict.fromkeys(STATUS_BUCKETS, 0)
+        self.req_type_status = {}
+        self.emp_status = {}
+        self.requests_by_emp = {}
+
+    def _reset_attendance(self):
+        self.present = Counter()  # employee_id -> Present attendance rows
+        self._attendance_id = 0  # highest attendance id folded in
+        self._attendance_rows = 0
+
+    def _fold_attendance(self):
+        for row in self.store.attendance_after(self._attendance_id):
+            if row["status"] == "Present":
+                self.present[row["employee_id"]] += 1
+            self._attendance_id = row["id"]
+            self._attendance_rows += 1
+
+    def _reset_performance(self):
+        self.perf_rows = []
+        self.perf_by_emp = {}
+
+    def _add_request(self, row):
+        emp_id = row.get("employee_id", "Unknown")
+        # requests_sample.csv names the column `type`; `request_type` is accepted for older exports
+        t = row.get("type") or row.get("request_type") or "Unknown"
+        s = row.get("status", "Unknown")
+        self.req_types[t] += 1
+        by_type = self.req_type_status.setdefault(t, dict.fromkeys(STATUS_BUCKETS, 0))
+        by_emp = self.emp_status.setdefault(emp_id, dict.fromkeys(STATUS_BUCKETS, 0))
+        if s in self.req_status:
+            self.req_status[s] += 1
+            by_type[s] += 1
+            by_emp[s] += 1
+        # the drill-down table shows request_type/date
+        self.requests_by_emp.setdefault(emp_id, []).append(dict(row, request_type=t, date=row.get("submitted_on")))
+
+    def _add_performance(self, row):
+        def num(key, *fallbacks):
+            for k in (key,) + fallbacks:
+                try:
+                    return float(row[k])
+                except (KeyError, TypeError, ValueError):
+                    continue
+            return 0.0
+        perf = {
+            "employee_id": row.get("employee_id", "Unknown"),
+            "task_completion_rate": num("task_completion_rate"),
+            "hours_logged": num("hours_logged"),
+            "contribution_score": num("contribution_score"),
+            # hr_analytics charts `score`; the metrics file only has contribution_score
+            "score": num("score", "contribution_score"),
+        }
+        self.perf_rows.append(perf)
+        self.perf_by_emp.setdefault(perf["employee_id"], perf)
+
+    def refresh(self):
+        with self._lock:
+            rows, reset = self._requests.read_new()
+            if reset:
+                self._reset_requests()
+            for row in rows:
+                self._add_request(row)
+            rows, reset = self._performance.read_new()
+            if reset:
+                self._reset_performance()
+            for row in rows:
+                self._add_performance(row)
+            self._fold_attendance()
+            # rows removed behind the watermark (e.g. by another process): rebuild from scratch
+            if self.store.attendance_stamp()[1] != self._attendance_rows:
+                self._reset_attendance()
+                self._fold_attendance()
+
+    def overview(self):
+        """Organisation-wide rollups, shaped for the analytics templates."""
+        self.refresh()
+        with self._lock:
+            return {
+                "request_types": list(self.req_types.keys()),
+                "request_counts": list(self.req_types.values()),
+                "status_labels": list(self.req_status.keys()),
+                "status_counts": list(self.req_status.values()),
+                "grouped_status": {k: [v[s] for s in STATUS_BUCKETS] for k, v in self.req_type_status.items()},
+                "grouped_emp_status": {k: [v[s] for s in STATUS_BUCKETS] for k, v in self.emp_status.items()},
+                "perf_data": list(self.perf_rows),
+                "attendance_summary": dict(self.present),
+            }
+
+    def employee(self, emp_id):
+        """Drill-down for one employee: (performance row or None, request rows, attendance rows)."""
+        self.refresh()
+        with self._lock:
+            perf = self.perf_by_emp.get(emp_id)
+            requests = list(self.requests_by_emp.get(emp_id, []))
+        return perf, requests, self.store.attendance_for(emp_id)
@@ -0,0 +1,100 @@
+import math
+import faiss
+
+INDEX_TYPES = ("flat", "ivf", "ivfpq", "hnsw")
+
+DEFAULT_PARAMS = {
+    "nlist": 1024,         # ivf/ivfpq: number of inverted lists (capped by the training sample)
+    "nprobe": 16,          # ivf/ivfpq: lists visited per query
+    "pq_m": 48,            # ivfpq: sub-quantizers (must divide the dimension)
+    "pq_bits": 8,          # ivfpq: bits per sub-quantizer code
+    "hnsw_m": 32,          # hnsw: graph degree
+    "ef_construction": 200,
+    "ef_search": 64,       # hnsw: candidate list size per query
+}
+
+# Training points per centroid faiss wants before it stops warning
+POINTS_PER_CENTROID = 39
+
+def needs_training(index_type: str):
+    return index_type in ("ivf", "ivfpq")
+
+def supports_remove(index_type: str):
+    # HNSW graphs cannot drop vectors; changed files force a rebuild
+    return index_type != "hnsw"
+
+def train_size(index_type: str, params: dict):
+    """How many vectors to buffer as the training sample before building."""
+    if not needs_training(index_type):
+        return 0
+    n = params["nlist"] * POINTS_PER_CENTROID
+    if index_type == "ivfpq":
+        n = max(n, (1 << params["pq_bits"]) * POINTS_PER_CENTROID)
+    return min(n, 200_000)
+
+def _pq_m(dim: int, wanted: int):
+    m = max(1, min(wanted, dim))
+    while dim % m:
+        m -= 1
+    return m
+
+def build_index(index_type: str, train_vecs, params: dict = None):
+    """Create (and train, if needed) an empty index for L2-normalized vectors.
+
+    Returns (index, info) where info records the type and the effective
+    parameters; it is stored in the ingest manifest so readers can
+    configure search with apply_search_params.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r}, expected one of {INDEX_TYPES}")
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    n, dim = train_vecs.shape
+    used = {}
+    if index_type == "flat":
+        index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+    elif index_type == "hnsw":
+        base = faiss.IndexHNSWFlat(dim, params["hnsw_m"], faiss.METRIC_INNER_PRODUCT)
+        base.hnsw.efConstruction = params["ef_construction"]
+        index = faiss.IndexIDMap2(base)
+        used = {"hnsw_m": params["hnsw_m"], "ef_construction": params["ef_construction"], "ef_search": params["ef_search"]}
+    else:
+        # IVF indexes keep ids natively, so they are not wrapped in an IDMap
+        nlist = max(1, min(params["nlist"], n // POINTS_PER_CENTROID))
+        quantizer = faiss.IndexFlatIP(dim)
+        if index_type == "ivf":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+            used = {"nlist": nlist}
+        else:
+            m = _pq_m(dim, params["pq_m"])
+            bits = max(1, min(params["pq_bits"], int(math.log2(max(n // POINTS_PER_CENTROID, 2)))))
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, m, bits, faiss.METRIC_INNER_PRODUCT)
+            used = {"nlist": nlist, "pq_m": m, "pq_bits": bits}
+        index.train(train_vecs)
+        used["nprobe"] = min(params["nprobe"], nlist)
+    info = {"type": index_type, "params": used}
+    apply_search_params(index, info)
+    return index, info
+
+def apply_search_params(index, info: dict):
+    """Set nprobe / efSearch recorded in info on a loaded index."""
+    if not info:
+        return
+    params = info.get("params", {})
+    ps = faiss.ParameterSpace()
+    if "nprobe" in params:
+        ps.set_index_parameter(index, "nprobe", params["nprobe"])
+    if "ef_search" in params:
+        ps.set_index_parameter(index, "efSearch", params["ef_search"])
+
+def search_params(index, selector):
+    """SearchParameters restricting a search to selector's ids.
+
+    Carries the index's current nprobe / efSearch, since a params object
+    replaces the values set on the index for that call.
+    """
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(base, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=base.hnsw.efSearch)
+    if isinstance(base, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=base.nprobe)
+    return faiss.SearchParameters(sel=selector)
@@ -0,0 +1,116 @@
+import re, threading, time
+from collections import OrderedDict
+import numpy as np
+
+def normalize_question(question: str):
+    # lowercase, drop punctuation, collapse whitespace
+    return " ".join(re.sub(r"[^\w\s]", " ", (question or "").lower()).split())
+
+class AnswerCache:
+    """Two-tier (exact + near-duplicate) answer cache with LRU and TTL eviction.
+
+    Tier one is keyed by the normalized question. Tier two compares the query
+    embedding against cached ones and returns an entry whose cosine similarity
+    is at least sim_threshold (vectors must be L2-normalized). All entries are
+    dropped when the index generation they were built from changes. scope is
+    the (hashable) retrieval filter an answer was built under; entries are
+    only returned for the same scope.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 3600.0, sim_threshold: float = 0.95):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.sim_threshold = sim_threshold
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (norm, k, scope) -> entry dict
+        self._matrix = None  # stacked vectors for tier two, rebuilt lazily
+        self._matrix_keys = []
+        self._generation = None
+        self.hits_exact = 0
+        self.hits_semantic = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _check_generation(self, generation):
+        if generation != self._generation:
+            self._entries.clear()
+            self._matrix = None
+            self._generation = generation
+
+    def _expired(self, entry, now):
+        return self.ttl and now - entry["created"] > self.ttl
+
+    def _drop(self, key):
+        del self._entries[key]
+        self._matrix = None
+
+    def get_exact(self, question: str, k: int, generation, scope=None):
+        key = (normalize_question(question), k, scope)
+        now = time.time()
+        with self._lock:
+            self._check_generation(generation)
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._expired(entry, now):
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            self.hits_exact += 1
+            return entry["answer"], entry["citations"]
+
+    def get_similar(self, qvec, k: int, generation, scope=None):
+        """Tier two lookup; counts a miss when nothing is close enough."""
+        now = time.time()
+        with self._lock:
+            self._check_generation(generation)
+            if self._matrix is None:
+                self._matrix_keys = [key for key, e in self._entries.items() if e["vec"] is not None]
+                self._matrix = (np.vstack([self._entries[key]["vec"] for key in self._matrix_keys])
+                                if self._matrix_keys else np.zeros((0, 0), dtype="float32"))
+            if len(self._matrix_keys):
+                sims = self._matrix @ np.asarray(qvec, dtype="float32").ravel()
+                for i in np.argsort(-sims):
+                    if sims[i] < self.sim_threshold:
+                        break
+                    key = self._matrix_keys[i]
+                    entry = self._entries.get(key)
+                    if entry is None or key[1:] != (k, scope):
+                        continue
+                    if self._expired(entry, now):
+                        continue
+                    self._entries.move_to_end(key)
+                    self.hits_semantic += 1
+                    return entry["answer"], entry["citations"]
+            self.misses += 1
+            return None
+
+    def put(self, question: str, k: int, generation, answer, citations, qvec=None, scope=None):
+        key = (normalize_question(question), k, scope)
+        vec = None if qvec is None else np.asarray(qvec, dtype="float32").ravel()
+        with self._lock:
+            self._check_generation(generation)
+            self._entries[key] = {"answer": answer, "citations": list(citations), "vec": vec, "created": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._matrix = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def stats(self):
+        with self._lock:
+            hits = self.hits_exact + self.hits_semantic
+            total = hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits_exact": self.hits_exact,
+                "hits_semantic": self.hits_semantic,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": hits / total if total else 0.0,
+            }
@@ -0,0 +1,129 @@
+import os, json, mmap, pickle, struct, tempfile, shutil
+import numpy as np
+
+MAGIC = b"HRCHUNK1"
+
+def _pad(n: int):
+    return (-n) % 8
+
+class ChunkStore:
+    """Read-only, memory-mapped chunk store written by ChunkStoreWriter.
+
+    File layout: MAGIC, uint64 header length, JSON header (row count and the
+    table of distinct metadata dicts), then 8-byte aligned arrays: ids
+    (int64, sorted), offsets (int64, n + 1) into the text blob, meta row
+    (int32), and finally the concatenated UTF-8 text blob. Looking up a
+    chunk is a binary search over ids plus a slice of the blob, so only
+    the hit texts are ever read.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a chunk store")
+        (hlen,) = struct.unpack_from("<Q", self._mm, len(MAGIC))
+        pos = len(MAGIC) + 8
+        header = json.loads(self._mm[pos:pos + hlen].decode("utf-8"))
+        pos += hlen + _pad(hlen)
+        n = header["n"]
+        self.metas = header["metas"]
+        self.ids = np.frombuffer(self._mm, dtype="<i8", count=n, offset=pos)
+        pos += 8 * n
+        self.offsets = np.frombuffer(self._mm, dtype="<i8", count=n + 1, offset=pos)
+        pos += 8 * (n + 1)
+        self.meta_rows = np.frombuffer(self._mm, dtype="<i4", count=n, offset=pos)
+        pos += 4 * n + _pad(4 * n)
+        self._blob = memoryview(self._mm)[pos:]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _row(self, chunk_id: int):
+        row = int(np.searchsorted(self.ids, chunk_id))
+        if row < len(self.ids) and self.ids[row] == chunk_id:
+            return row
+        return None
+
+    def _doc(self, row: int):
+        a, b = int(self.offsets[row]), int(self.offsets[row + 1])
+        return {"text": str(self._blob[a:b], "utf-8"), "meta": self.metas[int(self.meta_rows[row])]}
+
+    def get(self, chunk_id, default=None):
+        row = self._row(int(chunk_id))
+        return default if row is None else self._doc(row)
+
+    def __contains__(self, chunk_id):
+        return self._row(int(chunk_id)) is not None
+
+    def items(self):
+        for row in range(len(self.ids)):
+            yield int(self.ids[row]), self._doc(row)
+
+class ChunkStoreWriter:
+    """Streams (id, text, meta) rows into a new chunk store.
+
+    Ids must be added in increasing order. Texts are spooled to a temp file
+    so memory stays flat; close() assembles the store next to path and
+    renames it into place.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._ids, self._offsets, self._meta_rows = [], [0], []
+        self._metas, self._meta_index = [], {}
+        self._spool = tempfile.TemporaryFile()
+        self._size = 0
+
+    def add(self, chunk_id: int, text: str, meta: dict):
+        if self._ids and chunk_id <= self._ids[-1]:
+            raise ValueError("chunk ids must be added in increasing order")
+        key = json.dumps(meta, sort_keys=True)
+        row = self._meta_index.get(key)
+        if row is None:
+            row = self._meta_index[key] = len(self._metas)
+            self._metas.append(meta)
+        data = text.encode("utf-8")
+        self._spool.write(data)
+        self._size += len(data)
+        self._ids.append(int(chunk_id))
+        self._offsets.append(self._size)
+        self._meta_rows.append(row)
+
+    def close(self):
+        n = len(self._ids)
+        header = json.dumps({"n": n, "metas": self._metas}).encode("utf-8")
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header + b"\0" * _pad(len(header)))
+            f.write(np.asarray(self._ids, dtype="<i8").tobytes())
+            f.write(np.asarray(self._offsets, dtype="<i8").tobytes())
+            f.write(np.asarray(self._meta_rows, dtype="<i4").tobytes() + b"\0" * _pad(4 * n))
+            self._spool.seek(0)
+            shutil.copyfileobj(self._spool, f)
+            f.flush()
+            os.fsync(f.fileno())
+        self._spool.close()
+        os.replace(tmp, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._spool.close()
+
+def open_chunks(path: str):
+    """Chunk store at path, or the {id: {text, meta}} dict of an older pickle."""
+    with open(path, "rb") as f:
+        is_store = f.read(len(MAGIC)) == MAGIC
+    if is_store:
+        return ChunkStore(path)
+    with open(path, "rb") as f:
+        docs = pickle.load(f)
+    return dict(enumerate(docs)) if isinstance(docs, list) else docs
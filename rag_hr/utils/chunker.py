@@ -2,12 +2,13 @@ import re
 from typing import List, Dict
 
 def chunk_markdown(text: str, source: str, max_chars: int = 1200, overlap: int = 150):
-    # Split by headings first
+    # Split by headings first; every part after the first starts with its heading line
     parts = re.split(r"(?m)^#{1,6}\s", text)
     chunks = []
-    for part in parts:
+    for n, part in enumerate(parts):
         if not part.strip():
             continue
+        section = part.split("\n", 1)[0].strip() if n else None
         # secondary split into paragraphs
         pgs = re.split(r"\n\s*\n", part)
         buff = ""
@@ -16,15 +17,15 @@ def chunk_markdown(text: str, source: str, max_chars: int = 1200, overlap: int =
                 buff += ("\n\n" if buff else "") + p
             else:
                 if buff:
-                    chunks.append({"text": buff.strip(), "source": source})
+                    chunks.append({"text": buff.strip(), "source": source, "section": section})
                 # start next chunk; include overlap
                 prev = buff[-overlap:] if overlap and len(buff) > overlap else ""
                 buff = (prev + "\n\n" + p).strip()
         if buff:
-            chunks.append({"text": buff.strip(), "source": source})
+            chunks.append({"text": buff.strip(), "source": source, "section": section})
     return chunks
 
-def chunk_table_row(row_text: str, source: str, max_chars: int = 1000):
+def chunk_table_row(row_text: str, source: str, max_chars: int = 1000, employee_id: str = None):
     # For CSV rows we keep row per chunk, but truncate if extremely long
     t = row_text if len(row_text) <= max_chars else row_text[:max_chars] + " ..."
-    return {"text": t, "source": source}
+    return {"text": t, "source": source, "employee_id": employee_id}
@@ -0,0 +1,146 @@
+import os, math, threading
+
+# Prompt context size: blocks are added in relevance order until this many tokens (0 = no limit)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+CHARS_PER_TOKEN = 4  # rough size of a Llama token in English text
+SEPARATOR = "\n\n---\n\n"
+# chunk_markdown repeats up to 150 chars of the previous chunk; shorter matches are coincidence
+MIN_OVERLAP, MAX_OVERLAP = 20, 400
+
+def estimate_tokens(text: str):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def strip_overlap(a: str, b: str):
+    """(b without the prefix that repeats the end of a, number of chars removed)."""
+    for n in range(min(len(a), len(b), MAX_OVERLAP), MIN_OVERLAP - 1, -1):
+        if a.endswith(b[:n]):
+            rest = b[n:].lstrip()
+            return rest, len(b) - len(rest)
+    return b, 0
+
+def _block(source, text):
+    return f"[Source: {source}]\n{text}"
+
+def _truncate(text: str, tokens: int):
+    # cut at the last paragraph (else line) break that fits
+    limit = max(tokens, 0) * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    for sep in ("\n\n", "\n"):
+        if cut.rfind(sep) > limit // 2:
+            return cut[:cut.rfind(sep)].rstrip()
+    return cut.rstrip()
+
+class PackStats:
+    """Totals over packed prompts, for tuning the budget."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.tokens = 0
+        self.tokens_saved = 0
+        self.merged = 0
+        self.dropped = 0
+
+    def record(self, report):
+        with self._lock:
+            self.requests += 1
+            self.tokens += report["tokens"]
+            self.tokens_saved += report["tokens_saved"]
+            self.merged += report["merged"]
+            self.dropped += report["dropped"]
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "avg_tokens": self.tokens / self.requests if self.requests else 0.0,
+                "avg_tokens_saved": self.tokens_saved / self.requests if self.requests else 0.0,
+                "merged": self.merged,
+                "dropped": self.dropped,
+            }
+
+stats = PackStats()
+
+def _groups(hits):
+    """Hits of the same file with consecutive chunk ids, merged into one text.
+
+    Returns [(best rank, source, text, chunks merged, overlap chars removed)]
+    in relevance order of each group's best hit.
+    """
+    by_file = {}
+    for rank, hit in enumerate(hits):
+        meta = hit["meta"]
+        by_file.setdefault(meta.get("file") or meta.get("source", "unknown"), []).append((rank, hit))
+    groups = []
+    for members in by_file.values():
+        members.sort(key=lambda rh: (rh[1].get("id") is None, rh[1].get("id") or 0, rh[0]))
+        run = [members[0]]
+        for rank, hit in members[1:]:
+            prev = run[-1][1]
+            if hit.get("id") is not None and prev.get("id") is not None and hit["id"] == prev["id"] + 1:
+                run.append((rank, hit))
+            else:
+                groups.append(_merge(run))
+                run = [(rank, hit)]
+        groups.append(_merge(run))
+    groups.sort(key=lambda g: g[0])
+    return groups
+
+def _merge(run):
+    text, removed = run[0][1]["text"], 0
+    for _, hit in run[1:]:
+        rest, n = strip_overlap(text, hit["text"])
+        removed += n
+        if rest:
+            text += "\n\n" + rest
+    source = run[0][1]["meta"].get("source", "unknown")
+    return min(rank for rank, _ in run), source, text, len(run) - 1, removed
+
+def pack_context(hits, token_budget: int = None):
+    """Build the prompt context from hits (best first) within token_budget.
+
+    Repeated texts are dropped. Hits from the same file with consecutive
+    chunk ids become one block with the chunker's overlap removed. Blocks
+    are then added in relevance order while they fit; a block that does
+    not fit is tried as its best chunk alone, and the first block is cut
+    to the budget rather than left out. Returns (context, citations,
+    report); report counts tokens (a chars/4 estimate) and, in
+    tokens_saved, the difference from joining every hit whole.
+    """
+    budget = CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+    seen, unique = set(), []
+    for hit in hits:
+        if hit["text"] not in seen:
+            seen.add(hit["text"])
+            unique.append(hit)
+    whole = SEPARATOR.join(_block(h["meta"].get("source", "unknown"), h["text"]) for h in unique)
+    blocks, citations, used = [], [], 0
+    merged = removed = dropped = 0
+    sep = estimate_tokens(SEPARATOR)
+    for rank, source, text, n_merged, n_removed in _groups(unique):
+        block = _block(source, text)
+        cost = estimate_tokens(block) + (sep if blocks else 0)
+        if budget and used + cost > budget and n_merged:
+            block = _block(source, unique[rank]["text"])
+            dropped += n_merged  # the rest of the run
+            cost, n_merged, n_removed = estimate_tokens(block) + (sep if blocks else 0), 0, 0
+        if budget and used + cost > budget:
+            if blocks:
+                dropped += 1
+                continue
+            block = _truncate(block, budget)
+            cost = estimate_tokens(block)
+        blocks.append(block)
+        used += cost
+        merged += n_merged
+        removed += n_removed
+        if source not in citations:
+            citations.append(source)
+    context = SEPARATOR.join(blocks)
+    report = {"chunks": len(hits), "blocks": len(blocks), "merged": merged, "overlap_chars": removed,
+              "dropped": dropped, "tokens": estimate_tokens(context), "tokens_unpacked": estimate_tokens(whole)}
+    report["tokens_saved"] = report["tokens_unpacked"] - report["tokens"]
+    stats.record(report)
+    return context, citations, report
@@ -0,0 +1,146 @@
+import os, csv, threading
+
+EMPLOYEE_FIELDS = ["employee_id", "name", "email", "phone", "role", "department", "location",
+                   "joining_date", "employment_type", "manager_id"]
+
+class IndexedCsv:
+    """A CSV file kept in memory with hash indexes on some of its columns.
+
+    The file is re-read when its mtime/size changes (edits made outside the
+    app are picked up on the next lookup); appends made through append()
+    update the indexes in place. get() returns the first row with a given
+    key, like the linear scans it replaces; columns in group_keys are also
+    indexed to every row with a value, for get_all(). Safe to share between
+    threads.
+    """
+
+    def __init__(self, path: str, fields, keys, group_keys=()):
+        self.path = path
+        self.fields = list(fields)
+        self.keys = tuple(keys)
+        self.group_keys = tuple(group_keys)
+        self._lock = threading.Lock()
+        # (stamp, rows, {key column: {value: row}}, {group column: {value: [rows]}}) swapped as one tuple
+        self._state = self._empty()
+
+    def _empty(self):
+        return (None, [], {k: {} for k in self.keys}, {k: {} for k in self.group_keys})
+
+    def _stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _index(self, rows):
+        indexes = {k: {} for k in self.keys}
+        groups = {k: {} for k in self.group_keys}
+        for row in rows:
+            for k in self.keys:
+                indexes[k].setdefault(row.get(k), row)
+            for k in self.group_keys:
+                groups[k].setdefault(row.get(k), []).append(row)
+        return indexes, groups
+
+    def _read(self, stamp):
+        if stamp is None:
+            return self._empty()
+        with open(self.path, newline="", encoding="utf-8") as f:
+            rows = [row for row in csv.DictReader(f) if any(row.values())]
+        return (stamp, rows, *self._index(rows))
+
+    def _load(self):
+        stamp = self._stamp()
+        state = self._state
+        if state[0] == stamp and stamp is not None:
+            return state
+        with self._lock:
+            if self._state[0] != stamp or stamp is None:
+                self._state = self._read(stamp)
+            return self._state
+
+    def get(self, key: str, value):
+        return self._load()[2][key].get(value)
+
+    def get_all(self, key: str, value):
+        """Every row whose group_keys column key equals value, in file order."""
+        return list(self._load()[3][key].get(value, ()))
+
+    def values(self, key: str):
+        """Distinct values of a group_keys column."""
+        return list(self._load()[3][key])
+
+    def rows(self):
+        return list(self._load()[1])
+
+    def __len__(self):
+        return len(self._load()[1])
+
+    def append(self, row: dict, unique=()):
+        """Append row unless another row shares a value in one of the unique columns; returns True if written."""
+        with self._lock:
+            stamp = self._stamp()
+            if self._state[0] != stamp or stamp is None:
+                self._state = self._read(stamp)
+            _, rows, indexes, groups = self._state
+            if any(row.get(k) in indexes[k] for k in unique):
+                return False
+            new_file = stamp is None
+            with open(self.path, "a+", newline="", encoding="utf-8") as f:
+                if not new_file and stamp[1]:
+                    f.seek(stamp[1] - 1)
+                    if f.read(1) != "\n":  # hand-edited file without a trailing newline
+                        f.write("\n")
+                writer = csv.DictWriter(f, fieldnames=self.fields, extrasaction="ignore", lineterminator="\n")
+                if new_file:
+                    writer.writeheader()
+                writer.writerow(row)
+            row = {k: str(row.get(k, "") if row.get(k) is not None else "") for k in self.fields}
+            # in place: readers only do single dict/list operations on these, which see the row or not
+            rows.append(row)
+            for k in self.keys:
+                indexes[k].setdefault(row[k], row)
+            for k in self.group_keys:
+                groups[k].setdefault(row[k], []).append(row)
+            self._state = (self._stamp(), rows, indexes, groups)
+            return True
+
+class EmployeeDirectory:
+    """employees.csv indexed by email and employee_id."""
+
+    def __init__(self, path: str):
+        self.table = IndexedCsv(path, EMPLOYEE_FIELDS, keys=("email", "employee_id"))
+
+    def by_email(self, email):
+        return self.table.get("email", email)
+
+    def by_id(self, employee_id):
+        return self.table.get("employee_id", employee_id)
+
+    def find(self, email, employee_id, role=None):
+        """The employee with this email and id (and role, if given), else None."""
+        row = self.by_id(employee_id)
+        if row is None or row["email"] != email:
+            # ids should be unique, but fall back to the email entry if an earlier row shadows it
+            row = self.by_email(email)
+            if row is None or row["employee_id"] != employee_id:
+                return None
+        if role is not None and row["role"] != role:
+            return None
+        return row
+
+    def add(self, **employee):
+        """Append an employee; False if the email or employee_id is already taken."""
+        return self.table.append(employee, unique=("email", "employee_id"))
+
+_directories = {}
+_directories_lock = threading.Lock()
+
+def get_directory(cls, path: str):
+    """Process-wide directory of type cls for path, so every route shares one index."""
+    key = (cls, os.path.abspath(path))
+    with _directories_lock:
+        if key not in _directories:
+            _directories[key] = cls(path)
+        return _directories[key]
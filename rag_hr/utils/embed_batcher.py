@@ -0,0 +1,98 @@
+import threading, queue, time
+from concurrent.futures import Future
+
+class BatchStats:
+    """Counters for tuning the batch window / size."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.max_batch = 0
+        self.batch_sizes = {}  # size -> number of batches
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.encode_ms_total = 0.0
+
+    def record(self, size, waits_ms, encode_ms):
+        with self._lock:
+            self.batches += 1
+            self.items += size
+            self.max_batch = max(self.max_batch, size)
+            self.batch_sizes[size] = self.batch_sizes.get(size, 0) + 1
+            self.wait_ms_total += sum(waits_ms)
+            self.wait_ms_max = max(self.wait_ms_max, max(waits_ms))
+            self.encode_ms_total += encode_ms
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch": self.items / self.batches if self.batches else 0.0,
+                "max_batch": self.max_batch,
+                "batch_sizes": dict(self.batch_sizes),
+                "avg_wait_ms": self.wait_ms_total / self.items if self.items else 0.0,
+                "max_wait_ms": self.wait_ms_max,
+                "avg_encode_ms": self.encode_ms_total / self.batches if self.batches else 0.0,
+            }
+
+class EmbeddingBatcher:
+    """Micro-batches concurrent single-text encode calls.
+
+    Callers block in encode(text); a background thread collects requests for
+    up to window_ms (or until max_batch_size are queued) and runs them through
+    one encode_fn(list_of_texts) call, which must return one row per text.
+    """
+
+    def __init__(self, encode_fn, max_batch_size: int = 32, window_ms: float = 5.0):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.window = max(0.0, float(window_ms)) / 1000.0
+        self.stats = BatchStats()
+        self._q = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+                    self._thread.start()
+
+    def encode(self, text: str, timeout: float = None):
+        fut = Future()
+        self._ensure_worker()
+        self._q.put((text, fut, time.perf_counter()))
+        return fut.result(timeout)
+
+    def _collect(self):
+        batch = [self._q.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    batch.append(self._q.get_nowait())
+                else:
+                    batch.append(self._q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            start = time.perf_counter()
+            waits_ms = [(start - t0) * 1000.0 for _, _, t0 in batch]
+            try:
+                vecs = self.encode_fn([text for text, _, _ in batch])
+            except Exception as e:
+                for _, fut, _ in batch:
+                    fut.set_exception(e)
+                continue
+            encode_ms = (time.perf_counter() - start) * 1000.0
+            for i, (_, fut, _) in enumerate(batch):
+                fut.set_result(vecs[i])
+            self.stats.record(len(batch), waits_ms, encode_ms)
@@ -0,0 +1,80 @@
+import os, re, json, hashlib
+import numpy as np
+
+KEY_BYTES = 16
+
+def text_key(text: str):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=KEY_BYTES).digest()
+
+class EmbeddingCache:
+    """On-disk cache of chunk embeddings keyed by (model name, hash of text).
+
+    Per model the cache keeps an append-only float32 matrix (<slug>.f32,
+    opened with np.memmap) and a key file of fixed-size text digests in the
+    same row order (<slug>.keys). Vectors are appended before their keys, so
+    a crash mid-append only leaves unreferenced rows behind.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str):
+        os.makedirs(cache_dir, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.vec_path = os.path.join(cache_dir, slug + ".f32")
+        self.key_path = os.path.join(cache_dir, slug + ".keys")
+        self.info_path = os.path.join(cache_dir, slug + ".json")
+        self.model_name = model_name
+        self.dim = None
+        self.rows = {}  # digest -> row
+        self._matrix = None
+        self.hits = 0
+        self.misses = 0
+        self._open()
+
+    def _open(self):
+        if not os.path.exists(self.info_path):
+            return
+        with open(self.info_path, "r", encoding="utf-8") as f:
+            self.dim = json.load(f)["dim"]
+        keys = b""
+        if os.path.exists(self.key_path):
+            with open(self.key_path, "rb") as f:
+                keys = f.read()
+        n_vecs = os.path.getsize(self.vec_path) // (4 * self.dim) if os.path.exists(self.vec_path) else 0
+        n = min(len(keys) // KEY_BYTES, n_vecs)
+        self.rows = {keys[i * KEY_BYTES:(i + 1) * KEY_BYTES]: i for i in range(n)}
+        self._matrix = np.memmap(self.vec_path, dtype="float32", mode="r", shape=(n_vecs, self.dim)) if n_vecs else None
+
+    def _append(self, keys, vecs):
+        if self.dim is None:
+            self.dim = int(vecs.shape[1])
+            with open(self.info_path, "w", encoding="utf-8") as f:
+                json.dump({"model": self.model_name, "dim": self.dim}, f)
+        # rows past the last key (left by an interrupted append) are overwritten
+        start = len(self.rows)
+        with open(self.vec_path, "r+b" if os.path.exists(self.vec_path) else "wb") as f:
+            f.seek(start * 4 * self.dim)
+            f.write(np.ascontiguousarray(vecs, dtype="float32").tobytes())
+            f.truncate()
+        with open(self.key_path, "r+b" if os.path.exists(self.key_path) else "wb") as f:
+            f.seek(start * KEY_BYTES)
+            f.write(b"".join(keys))
+            f.truncate()
+        for i, k in enumerate(keys):
+            self.rows[k] = start + i
+        n = len(self.rows)
+        self._matrix = np.memmap(self.vec_path, dtype="float32", mode="r", shape=(n, self.dim))
+
+    def encode(self, texts, encode_fn):
+        """Vectors for texts, calling encode_fn(list_of_texts) only for unseen ones."""
+        keys = [text_key(t) for t in texts]
+        missing = {}
+        for k, t in zip(keys, texts):
+            if k not in self.rows and k not in missing:
+                missing[k] = t
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            vecs = np.asarray(encode_fn(list(missing.values())), dtype="float32")
+            self._append(list(missing.keys()), vecs)
+        if not texts:
+            return np.zeros((0, self.dim or 0), dtype="float32")
+        return np.array(self._matrix[[self.rows[k] for k in keys]], dtype="float32")
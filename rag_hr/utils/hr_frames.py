@@ -0,0 +1,152 @@
+"""Columnar views of the HR data tables, for analytics.
+
+Each table is read once into a typed DataFrame: ids, statuses and other
+low-cardinality labels are categoricals, numbers are floats and dates are
+datetime64. Frames are cached and re-read only when the source changes
+(file mtime/size, or the attendance table's max id/row count when it comes
+from the store). Aggregates are vectorized group-bys over those frames.
+"""
+import os, threading
+import numpy as np
+import pandas as pd
+
+DATA_DIR = "rag_hr/data/rag_seed_data/data"
+# name -> (file, {column: dtype}, date columns); only these columns are read
+TABLES = {
+    "employees": ("employees.csv", {"employee_id": "category", "role": "category", "department": "category",
+                                    "location": "category", "employment_type": "category",
+                                    "manager_id": "category"}, ["joining_date"]),
+    "attendance": ("attendance_sample.csv", {"employee_id": "category", "late_arrival": "category",
+                                             "overtime_hours": "category", "status": "category"}, ["date"]),
+    "requests": ("requests_sample.csv", {"request_id": "object", "employee_id": "category", "type": "category",
+                                         "amount": "float64", "status": "category",
+                                         "current_approver_id": "category"}, ["submitted_on"]),
+    "performance": ("performance_metrics_sample.csv", {"project_id": "category", "employee_id": "category",
+                                                       "task_completion_rate": "float64", "hours_logged": "float64",
+                                                       "contribution_score": "float64"}, []),
+}
+ATTENDANCE_COLUMNS = ["employee_id", "date", "late_arrival", "overtime_hours", "status"]
+SLA_BUSINESS_DAYS = 2  # hr/sla.md: manager approval within 2 business days
+
+def _as_float(col):
+    # parse each distinct value once rather than every cell
+    cat = col.astype("category")
+    values = pd.to_numeric(pd.Series(cat.cat.categories.astype(str)), errors="coerce").to_numpy(dtype="float64")
+    codes = cat.cat.codes.to_numpy()
+    return pd.Series(np.where(codes >= 0, values[codes], np.nan), index=col.index)
+
+def _fix_attendance(df):
+    # check-out rows from the old writer carry the overtime value in the status column
+    status = df["status"].astype("category")
+    shifted_values = [c for c in status.cat.categories if pd.notna(pd.to_numeric(c, errors="coerce"))]
+    shifted = status.isin(shifted_values).to_numpy()
+    df["overtime_hours"] = _as_float(df["overtime_hours"]).where(~shifted, _as_float(status)).fillna(0.0)
+    df["status"] = status.cat.remove_categories(shifted_values)
+    df["employee_id"] = df["employee_id"].astype("category")
+    df["late_arrival"] = df["late_arrival"].astype("category")
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    return df
+
+class HRFrames:
+    """Typed, cached DataFrames for the tables in data_dir.
+
+    With a store, attendance is read from its attendance table (the live
+    check-ins) instead of attendance_sample.csv. Safe to share between
+    threads; a frame handed out is never modified afterwards.
+    """
+
+    def __init__(self, data_dir: str = DATA_DIR, store=None):
+        self.data_dir = data_dir
+        self.store = store
+        self._lock = threading.Lock()
+        self._cache = {}  # name -> (stamp, frame)
+
+    def path(self, name):
+        return os.path.join(self.data_dir, TABLES[name][0])
+
+    def _stamp(self, name):
+        if name == "attendance" and self.store is not None:
+            return self.store.attendance_stamp()
+        try:
+            st = os.stat(self.path(name))
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _read(self, name, stamp):
+        _, dtypes, dates = TABLES[name]
+        if name == "attendance" and self.store is not None:
+            df = pd.DataFrame.from_records(self.store.attendance_records(ATTENDANCE_COLUMNS), columns=ATTENDANCE_COLUMNS)
+            return _fix_attendance(df)
+        if stamp is None:
+            df = pd.DataFrame({c: pd.Series(dtype=t) for c, t in dtypes.items()})
+            for c in dates:
+                df[c] = pd.Series(dtype="datetime64[ns]")
+            return df
+        df = pd.read_csv(self.path(name), usecols=list(dtypes) + dates, dtype=dtypes)
+        if name == "attendance":
+            return _fix_attendance(df)
+        for c in dates:
+            df[c] = pd.to_datetime(df[c], errors="coerce")
+        return df
+
+    def frame(self, name):
+        stamp = self._stamp(name)
+        cached = self._cache.get(name)
+        if cached is not None and cached[0] == stamp and stamp is not None:
+            return cached[1]
+        with self._lock:
+            cached = self._cache.get(name)
+            if cached is None or cached[0] != stamp or stamp is None:
+                cached = (stamp, self._read(name, stamp))
+                self._cache[name] = cached
+            return cached[1]
+
+    # --- aggregates ---
+
+    def attendance_by_department(self):
+        """Per department: headcount, present days, working days, attendance rate and late-arrival rate.
+
+        The rate is present days / (headcount x working days), where the
+        working days are the distinct dates that have any attendance record.
+        """
+        att, emp = self.frame("attendance"), self.frame("employees")
+        staff = emp.drop_duplicates("employee_id")
+        depts = staff["department"].cat.remove_unused_categories()
+        # department code for each of attendance's employee categories (-1: not in the directory)
+        dept_of = pd.Series(depts.cat.codes.to_numpy(), index=staff["employee_id"].astype(str))
+        dept_of = dept_of.reindex(att["employee_id"].cat.categories.astype(str), fill_value=-1).to_numpy()
+        emp_codes = att["employee_id"].cat.codes.to_numpy().astype("int64")
+        day = att["date"].to_numpy().astype("datetime64[D]").astype("int64")
+        # one row per employee and day, so a check-in and a check-out count once
+        first = ~pd.Series((emp_codes << 32) + day).duplicated().to_numpy()
+        rows = first & (att["status"] == "Present").to_numpy() & (emp_codes >= 0)
+        row_dept = dept_of[emp_codes[rows]]
+        known = row_dept >= 0
+        late = (att["late_arrival"] == "Yes").to_numpy()[rows][known]
+        n = len(depts.cat.categories)
+        out = pd.DataFrame({
+            "headcount": np.bincount(depts.cat.codes.to_numpy()[depts.cat.codes.to_numpy() >= 0], minlength=n),
+            "present_days": np.bincount(row_dept[known], minlength=n),
+            "late_days": np.bincount(row_dept[known], weights=late, minlength=n).astype("int64"),
+        }, index=pd.Index(depts.cat.categories, name="department"))
+        working_days = max(int(att["date"].nunique()), 1)
+        out["working_days"] = working_days
+        out["attendance_rate"] = out["present_days"] / (out["headcount"] * working_days)
+        out["late_rate"] = (out["late_days"] / out["present_days"].where(out["present_days"] > 0)).fillna(0.0)
+        return out.sort_values("attendance_rate", ascending=False)
+
+    def sla_breaches(self, as_of=None, sla_days: int = SLA_BUSINESS_DAYS):
+        """Pending requests older than sla_days business days, with counts per type and per approver.
+
+        Returns (breached requests frame, counts per type, counts per approver).
+        """
+        df = self.frame("requests")
+        pending = df[(df["status"] == "Pending") & df["submitted_on"].notna()]
+        as_of = np.datetime64(pd.Timestamp(as_of or pd.Timestamp.today()).normalize().date(), "D")
+        age = np.busday_count(pending["submitted_on"].to_numpy().astype("datetime64[D]"), as_of)
+        breached = pending.assign(business_days_open=age)[age > sla_days]
+        return (breached.sort_values("business_days_open", ascending=False),
+                breached.groupby("type", observed=True).size().sort_values(ascending=False),
+                breached.groupby("current_approver_id", observed=True).size().sort_values(ascending=False))
+
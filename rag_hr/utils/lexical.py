@@ -0,0 +1,153 @@
+import os, re
+from collections import Counter
+import numpy as np
+
+# Lower-cased words, digits and ids; "level_2" is kept whole and also split into its parts
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:_[a-z0-9]+)*")
+STOPWORDS = frozenset("""a an and are as at be by can do does for from has have how i in is it me my of on or
+the their there this to was what when where which who will with you your""".split())
+BM25_K1, BM25_B = 1.2, 0.75
+# Record ids in the HR data: employees E1042, projects P200, requests R5010 (lower-cased by tokenize)
+RECORD_ID_RE = re.compile(r"[epr]\d{3,}")
+
+def tokenize(text: str):
+    tokens = []
+    for tok in TOKEN_RE.findall(text.lower()):
+        if tok in STOPWORDS:
+            continue
+        tokens.append(tok)
+        if "_" in tok:
+            tokens.extend(p for p in tok.split("_") if p not in STOPWORDS)
+    return tokens
+
+def id_tokens(text: str):
+    """Tokens that are record ids (e1042, p200, r5010); "3pm" or "q3" are not."""
+    return [t for t in dict.fromkeys(tokenize(text)) if RECORD_ID_RE.fullmatch(t)]
+
+class BM25Builder:
+    """Collects (chunk id, text) pairs and writes a BM25Index file."""
+
+    def __init__(self):
+        self.doc_ids, self.doc_len = [], []
+        self._postings = {}  # term -> ([doc positions], [term frequencies])
+
+    def add(self, chunk_id: int, text: str):
+        pos = len(self.doc_ids)
+        counts = Counter(tokenize(text))
+        self.doc_ids.append(int(chunk_id))
+        self.doc_len.append(sum(counts.values()))
+        for term, tf in counts.items():
+            docs, tfs = self._postings.setdefault(term, ([], []))
+            docs.append(pos)
+            tfs.append(tf)
+
+    def write(self, path: str):
+        terms = sorted(self._postings)
+        blob = [t.encode("utf-8") for t in terms]
+        term_offsets = np.zeros(len(terms) + 1, dtype="<i8")
+        np.cumsum([len(b) for b in blob], out=term_offsets[1:])
+        post_offsets = np.zeros(len(terms) + 1, dtype="<i8")
+        np.cumsum([len(self._postings[t][0]) for t in terms], out=post_offsets[1:])
+        docs = [self._postings[t][0] for t in terms]
+        tfs = [self._postings[t][1] for t in terms]
+        arrays = {
+            "term_blob": np.frombuffer(b"".join(blob), dtype="u1"),
+            "term_offsets": term_offsets,
+            "post_offsets": post_offsets,
+            "post_docs": np.fromiter((d for ds in docs for d in ds), dtype="<i4", count=int(post_offsets[-1])),
+            "post_tf": np.minimum(np.fromiter((f for fs in tfs for f in fs), dtype="<i8", count=int(post_offsets[-1])),
+                                  np.iinfo("u2").max).astype("<u2"),
+            "doc_ids": np.asarray(self.doc_ids, dtype="<i8"),
+            "doc_len": np.asarray(self.doc_len, dtype="<i4"),
+        }
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+class BM25Index:
+    """BM25 over the chunk store, as flat posting arrays.
+
+    Terms are sorted and stored as one UTF-8 blob; each term's postings are a
+    slice of post_docs (positions into doc_ids, the chunk ids) and post_tf.
+    A query touches only the postings of its own terms, and a record id
+    resolves to its chunks with one dictionary lookup.
+    """
+
+    def __init__(self, path: str, k1: float = BM25_K1, b: float = BM25_B):
+        with np.load(path) as z:
+            arrays = {name: z[name] for name in z.files}
+        blob, offsets = arrays["term_blob"].tobytes(), arrays["term_offsets"]
+        self.terms = {blob[offsets[i]:offsets[i + 1]].decode("utf-8"): i for i in range(len(offsets) - 1)}
+        self.post_offsets, self.post_docs = arrays["post_offsets"], arrays["post_docs"]
+        self.post_tf = arrays["post_tf"].astype("float32")
+        self.doc_ids = arrays["doc_ids"]
+        doc_len = arrays["doc_len"].astype("float32")
+        self.k1 = k1
+        # per-document length normalisation, computed once
+        self._norm = k1 * (1 - b + b * doc_len / max(float(doc_len.mean()) if len(doc_len) else 1.0, 1e-9))
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def _postings(self, term):
+        i = self.terms.get(term)
+        if i is None:
+            return None
+        a, b = self.post_offsets[i], self.post_offsets[i + 1]
+        return self.post_docs[a:b], self.post_tf[a:b]
+
+    def mask(self, chunk_ids):
+        """Boolean mask over documents for a sorted array of chunk ids (see search/exact)."""
+        return np.isin(self.doc_ids, chunk_ids)
+
+    def search(self, query: str, k: int = 50, mask=None):
+        """Up to k (chunk id, score) pairs, best first; only documents in mask when given."""
+        positions, scores = [], []
+        n = len(self.doc_ids)
+        for term in dict.fromkeys(tokenize(query)):
+            postings = self._postings(term)
+            if postings is None:
+                continue
+            docs, tf = postings
+            idf = np.log1p((n - len(docs) + 0.5) / (len(docs) + 0.5))
+            if mask is not None:
+                # idf stays corpus-wide so scores do not depend on the filter
+                keep = mask[docs]
+                docs, tf = docs[keep], tf[keep]
+            positions.append(docs)
+            scores.append(idf * tf * (self.k1 + 1) / (tf + self._norm[docs]))
+        if not positions:
+            return []
+        uniq, inverse = np.unique(np.concatenate(positions), return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate(scores))
+        top = np.argsort(-totals)[:k] if len(totals) <= k else np.argpartition(-totals, k)[:k]
+        top = top[np.argsort(-totals[top], kind="stable")]
+        return [(int(self.doc_ids[uniq[i]]), float(totals[i])) for i in top]
+
+    def exact(self, query: str, mask=None):
+        """Chunk ids containing every record id in the query (any of them if none has all), else []."""
+        postings = [p[0] for p in map(self._postings, id_tokens(query)) if p is not None]
+        sets = [set((docs[mask[docs]] if mask is not None else docs).tolist()) for docs in postings]
+        if not sets:
+            return []
+        hits = set.intersection(*sets) or set.union(*sets)
+        return [int(self.doc_ids[p]) for p in sorted(hits)]
+
+def rrf(rankings, k: int = 60):
+    """Reciprocal-rank fusion of ranked id lists: [(id, fused score)], best first."""
+    scores = {}
+    for ranking in rankings:
+        for rank, i in enumerate(ranking):
+            scores[i] = scores.get(i, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda kv: -kv[1])
+
+def build_from_chunks(chunks, path: str):
+    """Write a BM25 index for an iterable of (chunk id, text)."""
+    builder = BM25Builder()
+    for chunk_id, text in chunks:
+        builder.add(chunk_id, text)
+    builder.write(path)
+    return len(builder.doc_ids)
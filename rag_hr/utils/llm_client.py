@@ -0,0 +1,212 @@
+import os, json, random, threading, time, asyncio, weakref, itertools
+import requests
+import httpx
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+POOL_SHARD_SIZE = 16  # connections per httpx pool; httpcore scans its whole pool on every request
+DONE = object()  # end of a streamed completion
+
+class LLMError(Exception):
+    pass
+
+def retry_delay(backoff: float, attempt: int, retry_after: str = None):
+    # jittered exponential backoff, never shorter than the server's Retry-After
+    delay = backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+    if retry_after:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            pass
+    return min(delay, 30.0)
+
+def parse_sse_line(line: str):
+    """Text delta from one streamed 'data:' line, None, or DONE."""
+    if not line or not line.startswith("data:"):
+        return None
+    data = line[len("data:"):].strip()
+    if data == "[DONE]":
+        return DONE
+    choices = json.loads(data).get("choices") or [{}]
+    return choices[0].get("delta", {}).get("content")
+
+class LLMClient:
+    """Shared client for an OpenAI-compatible chat-completions API (Groq by default).
+
+    One pooled keep-alive HTTP session is reused for every call, a semaphore
+    caps the requests in flight, and 429/5xx responses or connection errors
+    are retried with jittered exponential backoff (Retry-After is honoured).
+    """
+
+    def __init__(self, api_key: str, base_url: str, model: str = None, max_concurrency: int = 8,
+                 max_retries: int = 3, timeout: float = 30.0, backoff: float = 0.5):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self._sem = threading.BoundedSemaphore(max_concurrency)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"})
+
+    def _sleep_before_retry(self, attempt, resp=None):
+        time.sleep(retry_delay(self.backoff, attempt, resp.headers.get("Retry-After") if resp is not None else None))
+
+    def _post(self, payload: dict, timeout: float = None, stream: bool = False):
+        url = f"{self.base_url}/chat/completions"
+        for attempt in range(self.max_retries + 1):
+            last = attempt == self.max_retries
+            try:
+                resp = self.session.post(url, json=payload, timeout=timeout or self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if last:
+                    raise LLMError(f"request failed: {e}") from e
+                self._sleep_before_retry(attempt)
+                continue
+            if resp.status_code in RETRY_STATUS and not last:
+                resp.close()
+                self._sleep_before_retry(attempt, resp)
+                continue
+            if resp.status_code >= 400:
+                body = resp.text[:300]
+                resp.close()
+                raise LLMError(f"HTTP {resp.status_code}: {body}")
+            return resp
+
+    def chat(self, messages, model: str = None, timeout: float = None, **params):
+        """Return the completion text for messages."""
+        payload = {"model": model or self.model, "messages": messages, **params}
+        with self._sem:
+            resp = self._post(payload, timeout)
+            data = resp.json()
+        return data["choices"][0]["message"]["content"]
+
+    def chat_stream(self, messages, model: str = None, timeout: float = None, **params):
+        """Yield completion text pieces as they arrive (server-sent events).
+
+        The semaphore is held only until the upstream response starts, so a
+        stream the caller abandons (a client that disconnects mid-answer)
+        never keeps a slot; the connection is closed when the generator is.
+        """
+        payload = {"model": model or self.model, "messages": messages, "stream": True, **params}
+        with self._sem:
+            resp = self._post(payload, timeout, stream=True)
+        try:
+            for line in resp.iter_lines(decode_unicode=True):
+                delta = parse_sse_line(line)
+                if delta is DONE:
+                    break
+                if delta:
+                    yield delta
+        finally:
+            resp.close()
+
+class AsyncLLMClient:
+    """asyncio counterpart of LLMClient (httpx), for the ASGI serving mode.
+
+    Same pooling, concurrency cap, retry and timeout behaviour; the event
+    loop is never blocked while waiting on the API. Connections are split
+    over several small httpx pools used round-robin, since one large pool
+    costs O(pool size) per request to schedule.
+    """
+
+    def __init__(self, api_key: str, base_url: str, model: str = None, max_concurrency: int = 8,
+                 max_retries: int = 3, timeout: float = 30.0, backoff: float = 0.5):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self._sem = asyncio.Semaphore(max_concurrency)
+        shards = -(-max_concurrency // POOL_SHARD_SIZE)
+        per_shard = -(-max_concurrency // shards)
+        self.clients = [httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+            limits=httpx.Limits(max_connections=per_shard, max_keepalive_connections=per_shard),
+        ) for _ in range(shards)]
+        self._next = itertools.cycle(self.clients)
+
+    async def _send(self, payload: dict, timeout: float = None, stream: bool = False):
+        url = f"{self.base_url}/chat/completions"
+        for attempt in range(self.max_retries + 1):
+            last = attempt == self.max_retries
+            client = next(self._next)
+            request = client.build_request("POST", url, json=payload, timeout=timeout or self.timeout)
+            try:
+                resp = await client.send(request, stream=stream)
+            except httpx.TransportError as e:
+                if last:
+                    raise LLMError(f"request failed: {e}") from e
+                await asyncio.sleep(retry_delay(self.backoff, attempt))
+                continue
+            if resp.status_code in RETRY_STATUS and not last:
+                await resp.aclose()
+                await asyncio.sleep(retry_delay(self.backoff, attempt, resp.headers.get("Retry-After")))
+                continue
+            if resp.status_code >= 400:
+                body = (await resp.aread())[:300].decode("utf-8", "replace")
+                await resp.aclose()
+                raise LLMError(f"HTTP {resp.status_code}: {body}")
+            return resp
+
+    async def chat(self, messages, model: str = None, timeout: float = None, **params):
+        payload = {"model": model or self.model, "messages": messages, **params}
+        async with self._sem:
+            resp = await self._send(payload, timeout)
+            data = resp.json()
+        return data["choices"][0]["message"]["content"]
+
+    async def chat_stream(self, messages, model: str = None, timeout: float = None, **params):
+        payload = {"model": model or self.model, "messages": messages, "stream": True, **params}
+        async with self._sem:  # held until the response starts, as in LLMClient.chat_stream
+            resp = await self._send(payload, timeout, stream=True)
+        try:
+            async for line in resp.aiter_lines():
+                delta = parse_sse_line(line)
+                if delta is DONE:
+                    break
+                if delta:
+                    yield delta
+        finally:
+            await resp.aclose()
+
+def client_settings():
+    load_dotenv()
+    return dict(
+        api_key=os.getenv("GROQ_API_KEY"),
+        base_url=os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1"),
+        model=os.getenv("GROQ_MODEL", "llama-3.1-70b-versatile"),
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+        timeout=float(os.getenv("LLM_TIMEOUT", "30")),
+    )
+
+_client = None
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> AsyncLLMClient
+_client_lock = threading.Lock()
+
+def get_llm_client():
+    """Process-wide LLMClient configured from the environment / .env."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = LLMClient(**client_settings())
+    return _client
+
+def get_async_llm_client():
+    """AsyncLLMClient for the running event loop (ASGI mode).
+
+    httpx connections and asyncio semaphores belong to one loop, so each loop gets its own client.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncLLMClient(**client_settings())
+    return client
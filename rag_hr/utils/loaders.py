@@ -1,7 +1,11 @@
-import os, csv, json, yaml, pandas as pd
+import os, csv, json, yaml, numpy as np, pandas as pd
 from typing import List, Dict
 from .chunker import chunk_markdown, chunk_table_row
 
+# Top-level corpus folder -> doc_type partition; files elsewhere are typed by extension
+DOC_TYPES = {"policies": "policy", "hr": "policy", "system": "system", "data": "data"}
+EXT_DOC_TYPES = {".md": "policy", ".txt": "policy", ".yaml": "system", ".yml": "system", ".csv": "data"}
+
 def load_markdown(path: str):
     with open(path, "r", encoding="utf-8") as f:
         return f.read()
@@ -10,16 +14,88 @@ def load_yaml(path: str):
     with open(path, "r", encoding="utf-8") as f:
         return f.read()  # treat as text but could also parse
 
-def load_csv_rows(path: str, max_rows: int = None):
-    df = pd.read_csv(path)
-    rows = []
-    for i, row in df.iterrows():
-        if max_rows and i >= max_rows: break
-        # Create a semantic text view of the row
-        kv = [f"{col}: {row[col]}" for col in df.columns]
-        text = f"TABLE ROW from {os.path.basename(path)} | " + " | ".join(kv)
-        rows.append(text)
-    return rows
+def rows_to_text(df: pd.DataFrame, source: str):
+    # Semantic text view of every row: cells are stringified a column at a time,
+    # then each row is one str.format over a template with the column names baked in
+    esc = lambda t: str(t).replace("{", "{{").replace("}", "}}")
+    template = esc(f"TABLE ROW from {source} | ") + " | ".join(esc(f"{col}: ") + "{}" for col in df.columns)
+    # fillna: newer pandas keeps NaN missing through astype(str); rows used to read "nan"
+    cols = [df[col].astype(str).fillna("nan").tolist() for col in df.columns]
+    if not cols:
+        return [template] * len(df)
+    return [template.format(*cells) for cells in zip(*cols)]
+
+def _conform(df: pd.DataFrame, dtypes):
+    # Make a later chunk print like the first one: pandas infers dtypes per chunk, so an
+    # integer column with a blank cell in this chunk would otherwise print as "1.0" here
+    for col, first in dtypes.items():
+        values = df[col]
+        dt = values.dtype
+        if dt == first:
+            continue
+        if first.kind in "iu" and dt.kind == "f" and (values.dropna() % 1 == 0).all():
+            df[col] = values.astype("Int64").astype(str).where(values.notna(), np.nan)
+        elif first.kind in "iuf" and dt.kind in "iuf":
+            df[col] = values.astype(np.result_type(first, dt))
+        else:
+            df[col] = values.astype(object)
+    return df
+
+def read_csv_chunks(path: str, chunksize: int = 100_000, nrows: int = None):
+    """Yield DataFrames of up to chunksize rows, each typed like the first chunk.
+
+    One pass over the file: later chunks whose inferred dtype differs are
+    converted so their cells print the same way (integers stay integers
+    when a chunk has blanks, ints and floats widen, anything else mixed
+    becomes object). Unlike a whole-file read, an integer column with
+    blanks only after the first chunk prints as "1", not "1.0", so row
+    texts do not depend on where the chunk boundaries fall.
+    """
+    reader = pd.read_csv(path, chunksize=chunksize, nrows=nrows)
+    first = next(reader, None)
+    if first is None:
+        return
+    yield first
+    dtypes = first.dtypes.to_dict()
+    for df in reader:
+        yield _conform(df, dtypes)
+
+def iter_csv_rows(path: str, max_rows: int = None, chunksize: int = 100_000):
+    """Yield row texts, reading the CSV chunksize rows at a time.
+
+    Only the first max_rows rows are parsed when max_rows is set.
+    """
+    source = os.path.basename(path)
+    for df in read_csv_chunks(path, chunksize, max_rows or None):
+        yield from rows_to_text(df, source)
+
+def load_csv_rows(path: str, max_rows: int = None, chunksize: int = 100_000):
+    return list(iter_csv_rows(path, max_rows, chunksize))
+
+def iter_csv_chunks(path: str, chunksize: int = 100_000):
+    """Yield one chunk per row, tagged with the row's employee_id when the table has one."""
+    source = os.path.basename(path)
+    for df in read_csv_chunks(path, chunksize):
+        texts = rows_to_text(df, source)
+        emp_ids = ([None if pd.isna(v) else str(v) for v in df["employee_id"]]
+                   if "employee_id" in df.columns else [None] * len(texts))
+        for row_text, emp_id in zip(texts, emp_ids):
+            yield chunk_table_row(row_text, source=source, employee_id=emp_id)
+
+def doc_type_for(rel_path: str):
+    parts = rel_path.replace(os.sep, "/").split("/")
+    if len(parts) > 1 and parts[0] in DOC_TYPES:
+        return DOC_TYPES[parts[0]]
+    return EXT_DOC_TYPES.get(os.path.splitext(rel_path)[1].lower(), "other")
+
+def chunk_meta(rel_path: str, chunk: dict):
+    """Metadata stored with a chunk: source file name, path in the corpus, doc_type
+    and, where known, the section heading and the employee a table row is about."""
+    meta = {"source": chunk["source"], "file": rel_path.replace(os.sep, "/"), "doc_type": doc_type_for(rel_path)}
+    for key in ("section", "employee_id"):
+        if chunk.get(key):
+            meta[key] = chunk[key]
+    return meta
 
 def make_chunks_for_file(path: str):
     fname = os.path.basename(path)
@@ -32,8 +108,7 @@ def make_chunks_for_file(path: str):
         text = load_yaml(path)
         chunks = chunk_markdown(text, source=fname)
     elif ext in [".csv"]:
-        for row_text in load_csv_rows(path):
-            chunks.append(chunk_table_row(row_text, source=fname))
+        chunks = list(iter_csv_chunks(path))
     else:
         # ignore unknown file types
         pass
@@ -0,0 +1,105 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import faiss
+from .loaders import doc_type_for
+
+# Filtered-search plans kept per loaded index (one per distinct filter, e.g. per employee)
+MAX_CACHED_PARTITIONS = 256
+
+def normalize_where(where):
+    """Canonical, hashable form of a metadata filter, or None for "everything".
+
+    A filter is a dict of field -> value (or list/tuple/set of accepted
+    values), all of which must match; a list of such dicts matches a chunk
+    when any of them does. {"doc_type": "policy"} and
+    [{"doc_type": ("policy", "system")}, {"doc_type": "data", "employee_id": "E1042"}]
+    are both valid.
+    """
+    if not where:
+        return None
+    clauses = [where] if isinstance(where, dict) else list(where)
+    out = []
+    for clause in clauses:
+        fields = []
+        for field, value in clause.items():
+            values = value if isinstance(value, (list, tuple, set, frozenset)) else (value,)
+            fields.append((field, tuple(sorted(str(v) for v in values))))
+        out.append(tuple(sorted(fields)))
+    return tuple(sorted(set(out)))
+
+def _matches(meta, clauses):
+    for clause in clauses:
+        if all(str(meta.get(field)) in values for field, values in clause):
+            return True
+    return False
+
+def matches(meta: dict, where):
+    """Whether a chunk (or any record described by the same metadata) passes the filter."""
+    key = normalize_where(where)
+    return key is None or _matches(meta, key)
+
+class Partition:
+    """The chunks matching one filter: sorted ids, a faiss ID selector over
+    them (bitmap indexed by chunk id) and, lazily, the matching BM25 mask."""
+
+    def __init__(self, ids):
+        self.ids = ids
+        size = int(ids[-1]) + 1 if len(ids) else 1
+        bits = np.zeros(size, dtype=bool)
+        bits[ids] = True
+        # faiss reads the bitmap in place, so the array lives as long as the selector
+        self._bitmap = np.packbits(bits, bitorder="little")
+        self.selector = faiss.IDSelectorBitmap(len(self._bitmap), faiss.swig_ptr(self._bitmap))
+        self._lexical_mask = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def lexical_mask(self, lexical):
+        if self._lexical_mask is None:
+            self._lexical_mask = lexical.mask(self.ids)
+        return self._lexical_mask
+
+class PartitionIndex:
+    """Resolves metadata filters to chunk-id partitions for one loaded index.
+
+    Chunks share a small table of distinct metadata dicts (the chunk store
+    header), so a filter is evaluated once per distinct dict and mapped to
+    chunk ids with one vectorised lookup over the per-chunk meta rows.
+    """
+
+    def __init__(self, docs):
+        if hasattr(docs, "meta_rows"):
+            self.ids, self.meta_rows, self.metas = np.asarray(docs.ids), np.asarray(docs.meta_rows), docs.metas
+        else:  # legacy pickle: {id: {text, meta}}
+            ids = sorted(docs)
+            table, rows = {}, []
+            for i in ids:
+                meta = docs[i]["meta"]
+                rows.append(table.setdefault(id(meta), (len(table), meta))[0])
+            self.ids = np.asarray(ids, dtype="int64")
+            self.meta_rows = np.asarray(rows, dtype="int32")
+            self.metas = [meta for _, meta in sorted(table.values(), key=lambda t: t[0])]
+        # stores written before chunks carried a doc_type are typed by file extension
+        self.metas = [m if "doc_type" in m else {**m, "doc_type": doc_type_for(m.get("source", ""))} for m in self.metas]
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+
+    def get(self, where):
+        """Partition for a filter, or None when the filter is empty."""
+        key = normalize_where(where)
+        if key is None:
+            return None
+        with self._lock:
+            part = self._cache.get(key)
+            if part is not None:
+                self._cache.move_to_end(key)
+                return part
+        allowed = np.fromiter((_matches(m, key) for m in self.metas), dtype=bool, count=len(self.metas))
+        part = Partition(self.ids[allowed[self.meta_rows]] if len(self.metas) else self.ids[:0])
+        with self._lock:
+            self._cache[key] = part
+            while len(self._cache) > MAX_CACHED_PARTITIONS:
+                self._cache.popitem(last=False)
+        return part
@@ -0,0 +1,269 @@
+import os, re, json, asyncio, logging, threading
+from collections import OrderedDict, namedtuple
+import numpy as np
+from dotenv import load_dotenv
+from .answer_cache import normalize_question
+from .store import parse_request_line
+from .retriever import get_retriever
+from .llm_client import get_llm_client, get_async_llm_client
+
+log = logging.getLogger(__name__)
+
+load_dotenv()
+# The LLM tier runs only when both are set; without them unsure requests are classified 'other'
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+GROQ_MODEL = os.getenv("GROQ_MODEL")
+# Local predictions at least this confident skip the LLM
+CLASSIFY_LOCAL_THRESHOLD = float(os.getenv("CLASSIFY_LOCAL_THRESHOLD", "0.6"))
+
+# One pattern per category; a text matching exactly one of them is classified without a model call
+KEYWORD_RULES = {
+    "leave": r"\b(leaves?|days? off|weeks? off|time off|off for|vacation|holidays?|sick)\b",
+    "expense": r"\b(expenses?|reimburs\w*|receipts?|bills?)\b",
+    "attendance": r"\b(attendance|late arrival|(came|arrived|coming) late|check[- ]?(in|out)|biometric|punch\w*|left early|early departure)\b",
+    "overtime": r"\b(overtime|over time|extra hours?|after[- ]hours|weekend work)\b",
+    "promotion": r"\b(promot\w*|raise|increment|salary increase|appraisal)\b",
+    "transfer": r"\b(transfer\w*|relocat\w*|change (of )?(department|team|branch)|move to (the |another )?\w+ (department|team|branch|office))\b",
+    "resignation": r"\b(resign\w*|quit\w*|notice( period)?|last working day|leav\w* (the |this )?(organi[sz]ation|company|job))\b",
+    "travel": r"\b(business trip|conference|official (trip|tour|visit)|client visit|travel (to|for) (a |the )?(client|meeting|conference|training|site))\b",
+    "loan": r"\b(loans?|advance salary|salary advance|financial (assistance|help|issues?|problems?)|borrow\w*)\b",
+}
+# Seed phrases for the nearest-centroid tier, extended with labelled past requests
+SEED_EXAMPLES = {
+    "leave": ["I want 3 days off", "I need sick leave for two days", "Please approve my annual leave next week",
+              "I have to go to my village for a family wedding and need a week away from work"],
+    "expense": ["I want to claim travel expenses", "Please reimburse my taxi fare and hotel bill",
+                "Claim for meals during the client visit", "I paid for office supplies myself and want the money back"],
+    "attendance": ["I was marked absent although I came to office", "I forgot to check in this morning",
+                   "I arrived late due to traffic, please regularize", "My biometric entry is missing for Monday"],
+    "overtime": ["I want to claim my extra hours pay", "I worked on Saturday and want overtime",
+                 "Please approve the hours I worked after shift yesterday", "I stayed until midnight for the release"],
+    "promotion": ["I would like to be considered for promotion", "Requesting a salary increase after my appraisal",
+                  "I have been in the same grade for three years and want to move up", "Can I be promoted to team lead"],
+    "transfer": ["I want to transfer to the Lahore office", "Please move me to the finance department",
+                 "I am relocating and need a branch change", "I would like to join a different team"],
+    "resignation": ["I want to resign from my job", "This is my resignation, my last working day is the 30th",
+                    "I am leaving the company", "Please process my notice period"],
+    "travel": ["I need approval for a business trip to Karachi", "I am attending a conference in Dubai next month",
+               "Book my flight for the client meeting in Islamabad", "Official tour to the regional office"],
+    "loan": ["I need a loan of 10,000", "I am facing financial issues and need an advance salary",
+             "Please approve an emergency loan for my mother's surgery", "Can I borrow money from the company fund"],
+}
+
+Prediction = namedtuple("Prediction", "category confidence method confident")
+
+CLASSIFY_GUIDELINES = (
+    "Classification guidelines:\n"
+    "- leave: time off, vacation, sick days, absence, holidays\n"
+    "- expense: reimbursement, claims, travel costs, meals, accommodation\n"
+    "- attendance: late arrival, early departure, check-in/out issues\n"
+    "- overtime: extra hours, weekend work, after-hours work, overtime pay, extra hours pay\n"
+    "- promotion: career advancement, salary increase, raise\n"
+    "- transfer: department change, relocation, move to different role\n"
+    "- resignation: quitting, leaving job, termination\n"
+    "- travel: business trips, conferences, work-related travel\n"
+    "- loan: financial assistance, advance salary, emergency funds\n"
+    "- other: anything that doesn't fit the above categories\n\n"
+    "Examples:\n"
+    "- 'I want to claim my extra hours pay' → overtime\n"
+    "- 'I need a loan of 10,000' → loan\n"
+    "- 'I want 3 days off' → leave"
+)
+CLASSIFY_SYSTEM_PROMPT = (
+    "You are an HR request classifier. Your SOLE output MUST be a JSON object "
+    "with a single key named 'category'. The value must be ONE of these exact words: "
+    "leave, expense, attendance, overtime, promotion, transfer, resignation, travel, loan, other.\n\n"
+    + CLASSIFY_GUIDELINES
+)
+VALID_CATEGORIES = ['leave', 'expense', 'attendance', 'overtime', 'promotion', 'transfer', 'resignation', 'travel', 'loan', 'other']
+
+def load_labelled_requests(path: str, categories=tuple(KEYWORD_RULES)):
+    """(details, category) pairs from a requests.csv written by the app.
+
+    Rows whose type is not a known category (including 'other', which is
+    also what failed LLM calls produced) are skipped.
+    """
+    pairs = []
+    if not path or not os.path.exists(path):
+        return pairs
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            row = parse_request_line(line)
+            if row and row[2] in categories and row[1].strip():
+                pairs.append((row[1].strip(), row[2]))
+    return pairs
+
+class RequestClassifier:
+    """Local first tier for HR request classification.
+
+    classify() tries, in order: a memo of past classifications (keyed by
+    the normalized text), the keyword rules, and nearest-centroid matching
+    on sentence embeddings of the labelled examples. confidence is a
+    softmax over centroid similarities (restricted to the rule hits when
+    several rules matched); predictions below threshold are marked not
+    confident and the caller should ask the LLM, then remember() its answer.
+    """
+
+    def __init__(self, encode_fn, labelled_fn=None, threshold: float = 0.6,
+                 rule_confidence: float = 0.9, temperature: float = 0.05, max_memo: int = 4096):
+        self.encode_fn = encode_fn  # list[str] -> L2-normalized (n, d) array
+        self.labelled_fn = labelled_fn  # () -> [(details, category)] of past requests
+        self.threshold = threshold
+        self.rule_confidence = rule_confidence
+        self.temperature = temperature
+        self.max_memo = max_memo
+        self.rules = {c: re.compile(p) for c, p in KEYWORD_RULES.items()}
+        self._lock = threading.Lock()
+        self._memo = OrderedDict()  # normalized text -> category
+        self._centroids = None  # (categories, (c, d) matrix)
+        self.counts = {"memo": 0, "rules": 0, "embedding": 0, "deferred": 0, "remembered": 0}
+
+    def _count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+    def centroids(self):
+        if self._centroids is None:
+            with self._lock:
+                if self._centroids is None:
+                    examples = [(t, c) for c, texts in SEED_EXAMPLES.items() for t in texts]
+                    if self.labelled_fn is not None:
+                        examples += [(t, c) for t, c in self.labelled_fn() if c in SEED_EXAMPLES and t.strip()]
+                    vecs = np.asarray(self.encode_fn([t for t, _ in examples]), dtype="float32")
+                    labels = np.array([c for _, c in examples])
+                    categories = list(SEED_EXAMPLES)
+                    matrix = np.vstack([vecs[labels == c].mean(axis=0) for c in categories])
+                    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+                    self._centroids = (categories, matrix)
+        return self._centroids
+
+    def rule_hits(self, text: str):
+        return [c for c, rx in self.rules.items() if rx.search(text)]
+
+    def classify(self, details: str):
+        key = normalize_question(details)
+        with self._lock:
+            category = self._memo.get(key)
+            if category is not None:
+                self._memo.move_to_end(key)
+                self.counts["memo"] += 1
+                return Prediction(category, 1.0, "memo", True)
+        hits = self.rule_hits(key)
+        if len(hits) == 1:
+            self._count("rules")
+            return Prediction(hits[0], self.rule_confidence, "rules", self.rule_confidence >= self.threshold)
+        categories, matrix = self.centroids()
+        sims = matrix @ np.asarray(self.encode_fn([details]), dtype="float32").ravel()
+        if hits:  # several rules matched: let the embedding pick among them
+            keep = [categories.index(c) for c in hits]
+            categories, sims = [categories[i] for i in keep], sims[keep]
+        probs = np.exp((sims - sims.max()) / self.temperature)
+        probs /= probs.sum()
+        best = int(np.argmax(probs))
+        confidence = float(probs[best])
+        confident = confidence >= self.threshold
+        self._count("embedding" if confident else "deferred")
+        if confident:
+            self._memoize(key, categories[best])
+        return Prediction(categories[best], confidence, "embedding", confident)
+
+    def _memoize(self, key, category):
+        with self._lock:
+            self._memo[key] = category
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.max_memo:
+                self._memo.popitem(last=False)
+
+    def remember(self, details: str, category: str):
+        """Memoize an authoritative (LLM) classification."""
+        self._memoize(normalize_question(details), category)
+        self._count("remembered")
+        return category
+
+    def stats(self):
+        with self._lock:
+            local = self.counts["memo"] + self.counts["rules"] + self.counts["embedding"]
+            total = local + self.counts["deferred"]
+            return dict(self.counts, memo_entries=len(self._memo), local_rate=local / total if total else 0.0)
+
+def retriever_encoder(index_path: str, meta_path: str = None):
+    """encode_fn that reuses the chatbot's resident MiniLM encoder; single texts go through its micro-batcher."""
+    def encode(texts):
+        retriever = get_retriever(index_path, meta_path)
+        return retriever.embed_query(texts[0]) if len(texts) == 1 else retriever.encode(texts)
+    return encode
+
+def classify_messages(details):
+    return [
+        {"role": "system", "content": CLASSIFY_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Request to classify: {details}"}
+    ]
+
+def parse_category(result):
+    log.debug("Raw API response: %s", result)
+    try:
+        category = json.loads(result).get('category', '').strip().lower()
+    except json.JSONDecodeError as je:
+        log.debug("JSON decode error: %s", je)
+        return 'other'
+    if category not in VALID_CATEGORIES:
+        log.debug("Invalid category %r, returning 'other'", category)
+        return 'other'
+    return category
+
+def log_classification_error(details, e):
+    # Log error but continue with fallback
+    with open('groq_classification.log', 'a') as logf:
+        logf.write(f"Groq classification error: {e}\n")
+    log.warning("Classification failed (%s) for request: %s", e, details)
+
+def classify_locally(classifier: RequestClassifier, details):
+    local = classifier.classify(details)
+    return local.category if local.confident else None
+
+def classify_with_fallback(classifier: RequestClassifier, details):
+    """
+    Classify request locally, falling back to the Groq model API when unsure.
+    Returns: category string (leave, expense, attendance, overtime, promotion, transfer, resignation, travel, loan, other)
+    """
+    category = classify_locally(classifier, details)
+    if category:
+        return category
+
+    # Check if Groq API is available
+    if not GROQ_API_KEY or not GROQ_MODEL:
+        return 'other'
+
+    # Use the same pooled LLM client as the chatbot
+    try:
+        result = get_llm_client().chat(
+            classify_messages(details),
+            model=GROQ_MODEL,
+            response_format={"type": "json_object"},
+            max_tokens=50,
+            temperature=0.0
+        ).strip()
+        return classifier.remember(details, parse_category(result))
+    except Exception as e:
+        log_classification_error(details, e)
+        return 'other'
+
+async def aclassify_with_fallback(classifier: RequestClassifier, details):
+    """Same as classify_with_fallback, awaiting the LLM instead of blocking a thread."""
+    category = await asyncio.get_running_loop().run_in_executor(None, classify_locally, classifier, details)
+    if category:
+        return category
+    if not GROQ_API_KEY or not GROQ_MODEL:
+        return 'other'
+    try:
+        result = (await get_async_llm_client().chat(
+            classify_messages(details),
+            model=GROQ_MODEL,
+            response_format={"type": "json_object"},
+            max_tokens=50,
+            temperature=0.0
+        )).strip()
+        return classifier.remember(details, parse_category(result))
+    except Exception as e:
+        log_classification_error(details, e)
+        return 'other'
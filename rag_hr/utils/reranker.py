@@ -0,0 +1,115 @@
+import os, threading, time
+from collections import namedtuple
+import numpy as np
+from sentence_transformers import CrossEncoder
+from .context_packer import estimate_tokens
+
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+# Rerank retrieval hits before they go into the prompt: fetch RERANK_CANDIDATES, keep at
+# most RERANK_KEEP of them within RERANK_TOKEN_BUDGET context tokens (0 = no budget)
+RERANK = os.getenv("RERANK", "0") == "1"
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "30"))
+RERANK_KEEP = int(os.getenv("RERANK_KEEP", "4"))
+RERANK_TOKEN_BUDGET = int(os.getenv("RERANK_TOKEN_BUDGET", "1200"))
+
+RerankConfig = namedtuple("RerankConfig", "candidates keep token_budget")
+
+def default_config():
+    """RerankConfig from the environment, or None when RERANK is off."""
+    return RerankConfig(RERANK_CANDIDATES, RERANK_KEEP, RERANK_TOKEN_BUDGET) if RERANK else None
+
+class RerankStats:
+    """Counters for tuning the candidate count and budget."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.candidates = 0
+        self.kept = 0
+        self.tokens_kept = 0
+        self.tokens_dropped = 0
+        self.score_ms_total = 0.0
+        self.score_ms_max = 0.0
+
+    def record(self, timings):
+        with self._lock:
+            self.calls += 1
+            self.candidates += timings["candidates"]
+            self.kept += timings["kept"]
+            self.tokens_kept += timings["tokens_kept"]
+            self.tokens_dropped += timings["tokens_dropped"]
+            self.score_ms_total += timings["score_ms"]
+            self.score_ms_max = max(self.score_ms_max, timings["score_ms"])
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "avg_candidates": self.candidates / self.calls if self.calls else 0.0,
+                "avg_kept": self.kept / self.calls if self.calls else 0.0,
+                "avg_tokens_kept": self.tokens_kept / self.calls if self.calls else 0.0,
+                "avg_tokens_dropped": self.tokens_dropped / self.calls if self.calls else 0.0,
+                "avg_score_ms": self.score_ms_total / self.calls if self.calls else 0.0,
+                "max_score_ms": self.score_ms_max,
+            }
+
+class Reranker:
+    """Re-scores retrieval hits against the question with a small cross-encoder.
+
+    All candidates of a question are scored in one batched predict call on
+    the CPU; the model is loaded on first use. Safe to share between threads.
+    """
+
+    def __init__(self, model_name: str = RERANK_MODEL, max_length: int = 512):
+        self.model_name = model_name
+        self.max_length = max_length
+        self._model_lock = threading.Lock()
+        self._model = None
+        self.stats = RerankStats()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = CrossEncoder(self.model_name, max_length=self.max_length, device="cpu")
+        return self._model
+
+    def rerank(self, question: str, hits, keep: int, token_budget: int = None):
+        """Return (best hits, timings).
+
+        At most keep hits are returned, best first, with the cross-encoder
+        score as score (the retrieval score moves to retrieval_score). With
+        a token_budget, hits that would overflow it are skipped in favour of
+        smaller lower-ranked ones; the best hit is always kept.
+        """
+        timings = {"candidates": len(hits), "kept": 0, "score_ms": 0.0, "tokens_kept": 0, "tokens_dropped": 0}
+        if not hits:
+            return [], timings
+        start = time.perf_counter()
+        scores = np.asarray(self.model.predict([(question, h["text"]) for h in hits],
+                                               batch_size=len(hits), show_progress_bar=False), dtype="float32")
+        timings["score_ms"] = (time.perf_counter() - start) * 1000
+        kept = []
+        for i in np.argsort(-scores, kind="stable"):
+            tokens = estimate_tokens(hits[i]["text"])
+            if len(kept) < keep and (not token_budget or not kept or timings["tokens_kept"] + tokens <= token_budget):
+                kept.append({**hits[i], "score": float(scores[i]), "retrieval_score": hits[i]["score"]})
+                timings["tokens_kept"] += tokens
+            else:
+                timings["tokens_dropped"] += tokens
+        timings["kept"] = len(kept)
+        self.stats.record(timings)
+        return kept, timings
+
+_reranker = None
+_reranker_lock = threading.Lock()
+
+def get_reranker():
+    """Process-wide Reranker (the model is loaded once per worker)."""
+    global _reranker
+    if _reranker is None:
+        with _reranker_lock:
+            if _reranker is None:
+                _reranker = Reranker()
+    return _reranker
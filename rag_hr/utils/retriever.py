@@ -0,0 +1,175 @@
+import os, json, threading
+import faiss
+from sentence_transformers import SentenceTransformer
+from .embed_batcher import EmbeddingBatcher
+from .ann import apply_search_params, search_params
+from .chunk_store import open_chunks
+from .lexical import BM25Index, rrf
+from .partitions import PartitionIndex
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+# Query micro-batching: gather concurrent questions for up to this many ms / items
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "5"))
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "32"))
+# Hybrid retrieval: dense and BM25 candidates per list before reciprocal-rank fusion ("dense" turns BM25 off)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50"))
+RRF_K = 60
+
+def default_meta_path(index_path: str):
+    return index_path + ".chunks"
+
+def legacy_meta_path(index_path: str):
+    # pickled list/dict of {text, meta} written by older ingest runs
+    return index_path + ".meta.pkl"
+
+def find_meta_path(index_path: str):
+    path = default_meta_path(index_path)
+    if not os.path.exists(path) and os.path.exists(legacy_meta_path(index_path)):
+        return legacy_meta_path(index_path)
+    return path
+
+def default_manifest_path(index_path: str):
+    return index_path + ".manifest.json"
+
+def default_lexical_path(index_path: str):
+    return index_path + ".bm25.npz"
+
+class Retriever:
+    """Keeps the FAISS index, chunk metadata and query encoder resident.
+
+    The index and metadata are reloaded when either file changes on disk
+    (checked by mtime/size on every search); the encoder is loaded once.
+    Safe to share between Flask worker threads.
+    """
+
+    def __init__(self, index_path: str, meta_path: str = None, model_name: str = MODEL_NAME):
+        self.index_path = index_path
+        self._meta_path = meta_path
+        self.manifest_path = default_manifest_path(index_path)
+        self.lexical_path = default_lexical_path(index_path)
+        self.model_name = model_name
+        self._lock = threading.Lock()
+        self._model_lock = threading.Lock()
+        self._model = None
+        self.batcher = EmbeddingBatcher(self.encode, EMBED_MAX_BATCH, EMBED_BATCH_WINDOW_MS)
+        # (stamp, index, docs, lexical, partitions) swapped as one tuple so readers never see a half-reload
+        self._state = (None, None, None, None, None)
+
+    @property
+    def meta_path(self):
+        # resolved on every check so a first chunk store build replaces a legacy pickle
+        return self._meta_path or find_meta_path(self.index_path)
+
+    def _stamp(self):
+        stamp = []
+        for p in (self.index_path, self.meta_path, self.manifest_path, self.lexical_path):
+            if p in (self.manifest_path, self.lexical_path) and not os.path.exists(p):
+                stamp.append(None)  # indexes built before manifests / BM25 existed
+                continue
+            st = os.stat(p)
+            stamp.append((p, st.st_mtime_ns, st.st_size))
+        return tuple(stamp)
+
+    def _load(self):
+        stamp = self._stamp()
+        state = self._state
+        if state[0] == stamp:
+            return state
+        with self._lock:
+            state = self._state
+            if state[0] == stamp:
+                return state
+            index = faiss.read_index(self.index_path)
+            # memory-mapped ChunkStore; only hit texts are read
+            docs = open_chunks(stamp[1][0])
+            if os.path.exists(self.manifest_path):
+                # search parameters (nprobe/efSearch) recorded at ingest time
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    apply_search_params(index, json.load(f).get("index"))
+            lexical = BM25Index(self.lexical_path) if stamp[3] else None
+            self._state = (stamp, index, docs, lexical, PartitionIndex(docs))
+            return self._state
+
+    @property
+    def generation(self):
+        """Identifies the index build currently loaded (changes on reload)."""
+        return self._load()[0]
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    def encode(self, texts):
+        emb = self.model.encode(list(texts), convert_to_numpy=True)
+        faiss.normalize_L2(emb)
+        return emb
+
+    def embed_query(self, question: str):
+        """Normalized (1, dim) query vector, batched with concurrent callers."""
+        return self.batcher.encode(question).reshape(1, -1)
+
+    def search(self, question: str, k: int = 6, qemb=None, mode: str = None, where=None):
+        """Return up to k hits as dicts of {id, text, meta, score}, best first.
+
+        In hybrid mode (the default when ingest built a BM25 index) chunks that
+        contain every record id in the question (E1042, R5010) come first,
+        then dense and BM25 candidates merged by reciprocal-rank fusion; score
+        is then the fused score. mode="dense" is the plain FAISS search.
+
+        where restricts the search to chunks whose metadata matches (see
+        partitions.normalize_where), e.g. {"doc_type": "policy"}. The filter
+        is applied inside the FAISS and BM25 searches, not to their results,
+        so all k slots go to matching chunks.
+        """
+        _, index, docs, lexical, partitions = self._load()
+        part = partitions.get(where)
+        if part is not None and not len(part):
+            return []
+        params = search_params(index, part.selector) if part is not None else None
+        mask = part.lexical_mask(lexical) if part is not None and lexical is not None else None
+        if qemb is None:
+            qemb = self.embed_query(question)
+        if lexical is None or (mode or RETRIEVAL_MODE) == "dense":
+            D, I = index.search(qemb, k, params=params)
+            ranked = [(int(i), float(score)) for score, i in zip(D[0], I[0])]
+        else:
+            n = max(k, HYBRID_CANDIDATES)
+            _, I = index.search(qemb, n, params=params)
+            lex = lexical.search(question, n, mask=mask)
+            exact = lexical.exact(question, mask=mask)
+            if exact:
+                # exact matches ordered by their BM25 score, unscored ones after
+                lex_score = dict(lex)
+                exact.sort(key=lambda i: -lex_score.get(i, 0.0))
+            fused = rrf([[int(i) for i in I[0] if i >= 0], [i for i, _ in lex]], RRF_K)
+            top = fused[0][1] if fused else 0.0
+            seen = set(exact[:k])
+            ranked = [(i, top + 1.0) for i in exact[:k]] + [(i, s) for i, s in fused if i not in seen]
+        hits = []
+        for idx, score in ranked:
+            doc = docs.get(idx)
+            if doc is None:  # -1 padding, or index written before its metadata
+                continue
+            hits.append({"id": idx, "text": doc["text"], "meta": doc["meta"], "score": score})
+            if len(hits) == k:
+                break
+        return hits
+
+_retrievers = {}
+_retrievers_lock = threading.Lock()
+
+def get_retriever(index_path: str, meta_path: str = None):
+    """Process-wide Retriever for an index path (one per worker)."""
+    key = (os.path.abspath(index_path), meta_path and os.path.abspath(meta_path))
+    r = _retrievers.get(key)
+    if r is None:
+        with _retrievers_lock:
+            r = _retrievers.get(key)
+            if r is None:
+                r = _retrievers[key] = Retriever(index_path, meta_path)
+    return r
@@ -0,0 +1,386 @@
+"""SQLite (WAL) storage for the app's own data: accounts, requests and attendance.
+
+    python -m rag_hr.utils.store --db hr.db            # one-shot import of the CSVs
+    python -m rag_hr.utils.store --db hr.db --force    # import again, adding only CSV rows not stored yet
+
+The web app imports the CSVs automatically the first time it opens an
+empty database; afterwards the CSV files are no longer written.
+"""
+import os, csv, sqlite3, threading, argparse
+from collections import Counter
+from datetime import datetime, date, timedelta
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS users (
+    email TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    password TEXT NOT NULL,
+    role TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS requests (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    email TEXT NOT NULL,
+    details TEXT NOT NULL,
+    classified_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    approver TEXT NOT NULL DEFAULT 'HR',
+    created_at TEXT,
+    updated_at TEXT,
+    state TEXT
+);
+CREATE TABLE IF NOT EXISTS attendance (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    employee_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    check_in TEXT,
+    check_out TEXT,
+    late_arrival TEXT,
+    overtime_hours TEXT,
+    status TEXT
+);
+"""
+# Columns added after a table was first released: (table, column, type, backfill statement)
+MIGRATIONS = [
+    ("requests", "state", "TEXT", "UPDATE requests SET state = CASE WHEN instr(status, ' ') > 0"
+                                  " THEN substr(status, 1, instr(status, ' ') - 1) ELSE status END"),
+]
+# Every listing filter is paired with id so a filtered page is an index range scan in id order
+INDEXES = """
+DROP INDEX IF EXISTS requests_email;
+DROP INDEX IF EXISTS requests_status;
+CREATE INDEX IF NOT EXISTS requests_email_id ON requests (email, id);
+CREATE INDEX IF NOT EXISTS requests_state_id ON requests (state, id);
+CREATE INDEX IF NOT EXISTS requests_type_id ON requests (classified_type, id);
+CREATE INDEX IF NOT EXISTS requests_approver_id ON requests (approver, id);
+CREATE INDEX IF NOT EXISTS requests_created ON requests (created_at, id);
+CREATE INDEX IF NOT EXISTS attendance_employee ON attendance (employee_id, date);
+"""
+# query_requests filter -> SQL condition
+REQUEST_FILTERS = {
+    "status": "state = ?",
+    "type": "classified_type = ?",
+    "approver": "approver = ?",
+    "email": "email = ?",
+    "date_from": "created_at >= ?",
+    "date_to": "created_at < ?",
+}
+
+# Request types the app writes to requests.csv (request_classifier's categories, plus "other")
+REQUEST_TYPES = ("leave", "expense", "attendance", "overtime", "promotion", "transfer", "resignation", "travel",
+                 "loan", "other")
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+
+def request_state(status: str):
+    # "Pending (Manager > HR)" -> "Pending"
+    return (status or "").split(" ", 1)[0]
+
+def parse_request_line(line: str):
+    """(email, details, type, status, approver) from one requests.csv line, or None.
+
+    Rows are written unquoted as `email,details,type,status,approver`, so
+    details may contain commas; the earliest rows used `email,type,details,
+    status[,approver]` instead. Header and unparseable lines give None.
+    """
+    parts = line.rstrip("\r\n").split(",")
+    if len(parts) >= 5 and parts[-3].strip().lower() in REQUEST_TYPES:
+        return parts[0], ",".join(parts[1:-3]), parts[-3].strip().lower(), parts[-2], parts[-1]
+    if len(parts) >= 4 and parts[1].strip().lower() in REQUEST_TYPES:
+        if len(parts) == 4:
+            return parts[0], parts[2], parts[1].strip().lower(), parts[3], ""
+        return parts[0], ",".join(parts[2:-2]), parts[1].strip().lower(), parts[-2], parts[-1]
+    return None
+
+class HRStore:
+    """Thread-safe access to the SQLite database at path.
+
+    Each thread gets its own connection (WAL mode, so readers never block
+    the single writer and vice versa); every write is its own short
+    transaction. Rows are returned as plain dicts, shaped like the CSV rows
+    the templates already use.
+    """
+
+    def __init__(self, path: str, timeout: float = 10.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+            self._migrate(conn)
+            conn.executescript(INDEXES)
+
+    def _migrate(self, conn):
+        for table, column, sql_type, backfill in MIGRATIONS:
+            columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {sql_type}")
+            conn.execute(backfill + f" WHERE {column} IS NULL")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints; safe with WAL
+            self._local.conn = conn
+        return conn
+
+    def _all(self, sql, params=()):
+        return [dict(row) for row in self._conn().execute(sql, params)]
+
+    def _one(self, sql, params=()):
+        row = self._conn().execute(sql, params).fetchone()
+        return dict(row) if row else None
+
+    # --- meta ---
+
+    def get_meta(self, key):
+        row = self._one("SELECT value FROM meta WHERE key = ?", (key,))
+        return row["value"] if row else None
+
+    def set_meta(self, key, value):
+        with self._conn() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    # --- users ---
+
+    def get_user(self, email):
+        return self._one("SELECT name, email, password, role FROM users WHERE email = ?", (email,))
+
+    def add_user(self, name, email, password_hash, role):
+        """Insert an account; False if the email is already registered."""
+        try:
+            with self._conn() as conn:
+                conn.execute("INSERT INTO users (email, name, password, role) VALUES (?, ?, ?, ?)",
+                             (email, name, password_hash, role))
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    # --- requests ---
+
+    def add_request(self, email, details, classified_type, status, approver, created_at=None):
+        created_at = created_at or _now()
+        with self._conn() as conn:
+            cur = conn.execute(
+                "INSERT INTO requests (email, details, classified_type, status, state, approver, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (email, details, classified_type, status, request_state(status), approver, created_at, created_at))
+            return cur.lastrowid
+
+    def requests_for(self, email):
+        return self._all("SELECT * FROM requests WHERE email = ? ORDER BY id", (email,))
+
+    def all_requests(self):
+        return self._all("SELECT * FROM requests ORDER BY id")
+
+    def query_requests(self, before=None, limit=50, **filters):
+        """One page of requests, newest first, plus the cursor for the next page (None on the last one).
+
+        filters are the REQUEST_FILTERS keys: status is the state word
+        (Pending/Approved/Disapproved), dates are YYYY-MM-DD and inclusive.
+        Keyset pagination: pass the returned cursor back as before, so
+        every page costs the same however deep it is.
+        """
+        where, params = [], []
+        for key, value in filters.items():
+            if value in (None, ""):
+                continue
+            if key not in REQUEST_FILTERS:
+                raise ValueError(f"unknown request filter {key!r}")
+            if key == "date_from":
+                value = date.fromisoformat(value).isoformat()
+            elif key == "date_to":
+                value = (date.fromisoformat(value) + timedelta(days=1)).isoformat()
+            where.append(REQUEST_FILTERS[key])
+            params.append(value)
+        if before is not None:
+            where.append("id < ?")
+            params.append(int(before))
+        sql = "SELECT * FROM requests" + (" WHERE " + " AND ".join(where) if where else "")
+        rows = self._all(sql + " ORDER BY id DESC LIMIT ?", params + [int(limit) + 1])
+        next_cursor = rows[limit - 1]["id"] if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
+    def requests_after(self, after_id, limit):
+        """Up to limit requests with id > after_id, in id order (for streaming the whole table)."""
+        return self._all("SELECT * FROM requests WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit))
+
+    def labelled_requests(self):
+        """(details, classified_type) of stored requests, for the local request classifier."""
+        return [(r["details"], r["classified_type"]) for r in
+                self._all("SELECT details, classified_type FROM requests WHERE classified_type != 'other'")]
+
+    def get_request(self, request_id):
+        return self._one("SELECT * FROM requests WHERE id = ?", (request_id,))
+
+    def set_request_status(self, request_id, status):
+        """Update one request in place; False if there is no such id."""
+        with self._conn() as conn:
+            cur = conn.execute("UPDATE requests SET status = ?, state = ?, updated_at = ? WHERE id = ?",
+                               (status, request_state(status), _now(), request_id))
+            return cur.rowcount == 1
+
+    # --- attendance ---
+
+    def check_in(self, employee_id, when: str):
+        with self._conn() as conn:
+            conn.execute("INSERT INTO attendance (employee_id, date, check_in, overtime_hours, status)"
+                         " VALUES (?, ?, ?, '0.0', 'Present')", (employee_id, when[:10], when))
+
+    def check_out(self, employee_id, when: str):
+        # close today's open check-in if there is one, else record a bare check-out
+        with self._conn() as conn:
+            cur = conn.execute(
+                "UPDATE attendance SET check_out = ? WHERE id = (SELECT id FROM attendance"
+                " WHERE employee_id = ? AND date = ? AND check_out IS NULL ORDER BY id DESC LIMIT 1)",
+                (when, employee_id, when[:10]))
+            if cur.rowcount == 0:
+                conn.execute("INSERT INTO attendance (employee_id, date, check_out, overtime_hours, status)"
+                             " VALUES (?, ?, ?, '0.0', 'Present')", (employee_id, when[:10], when))
+
+    def attendance_for(self, employee_id):
+        return self._all("SELECT employee_id, date, check_in, check_out, late_arrival, overtime_hours, status"
+                         " FROM attendance WHERE employee_id = ? ORDER BY date, id", (employee_id,))
+
+    def attendance_after(self, after_id):
+        """(id, employee_id, status) of attendance rows with id > after_id, for incremental rollups."""
+        return self._all("SELECT id, employee_id, status FROM attendance WHERE id > ? ORDER BY id", (after_id,))
+
+    def attendance_stamp(self):
+        """(max id, row count) of attendance; changes whenever a row is added or removed."""
+        return tuple(self._conn().execute("SELECT MAX(id), COUNT(*) FROM attendance").fetchone())
+
+    def attendance_records(self, columns):
+        """Every attendance row as a tuple of the given columns, for bulk loading into a frame."""
+        return self._conn().execute(f"SELECT {', '.join(columns)} FROM attendance ORDER BY id").fetchall()
+
+    def present_days(self):
+        """{employee_id: number of Present rows}."""
+        rows = self._conn().execute(
+            "SELECT employee_id, COUNT(*) FROM attendance WHERE status = 'Present' GROUP BY employee_id")
+        return {emp: n for emp, n in rows}
+
+    def count(self, table):
+        return self._conn().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+def _attendance_fields(fields):
+    # the old check-out writer emitted one column too many, and some rows have no status
+    fields = [f.strip() for f in fields] + [""] * (7 - len(fields))
+    if len(fields) > 7:
+        fields = fields[:5] + fields[6:8]
+    employee_id, date, check_in, check_out, late, overtime, status = fields
+    if status and status.replace(".", "", 1).isdigit():
+        overtime, status = status, ""
+    return (employee_id, date, check_in or None, check_out or None, late, overtime, status)
+
+def _request_key(row):
+    # (email, details, type, ...); status and approver change once a request is stored
+    return tuple(row[:3])
+
+def _attendance_key(row):
+    # (employee_id, date, check_in, check_out, ...); check_out is filled in later for an open check-in
+    employee_id, date, check_in, check_out = row[:4]
+    return (employee_id, date, check_in) if check_in else (employee_id, date, None, check_out)
+
+def _new_rows(rows, key, stored):
+    # rows whose key is not stored yet, counted as a multiset (a row listed twice matches two stored rows)
+    seen = Counter(key(r) for r in stored)
+    out = []
+    for row in rows:
+        k = key(row)
+        if seen[k]:
+            seen[k] -= 1
+        else:
+            out.append(row)
+    return out
+
+def _import(conn, users_csv=None, requests_csv=None, attendance_csv=None, skip_existing=False):
+    # skip_existing: leave out CSV rows already stored (by natural key), for importing into a used database
+    counts = {"users": 0, "requests": 0, "attendance": 0}
+    if users_csv and os.path.exists(users_csv):
+        with open(users_csv, newline="", encoding="utf-8") as f:
+            rows = [(r["email"], r["name"], r["password"], r["role"]) for r in csv.DictReader(f) if r.get("email")]
+        counts["users"] = conn.executemany(
+            "INSERT OR IGNORE INTO users (email, name, password, role) VALUES (?, ?, ?, ?)", rows).rowcount
+    if requests_csv and os.path.exists(requests_csv):
+        with open(requests_csv, encoding="utf-8") as f:
+            rows = [row for row in map(parse_request_line, f) if row]
+        if skip_existing:
+            rows = _new_rows(rows, _request_key, conn.execute("SELECT email, details, classified_type FROM requests"))
+        conn.executemany("INSERT INTO requests (email, details, classified_type, status, state, approver)"
+                         " VALUES (?, ?, ?, ?, ?, ?)", [(e, d, t, s, request_state(s), a or "HR") for e, d, t, s, a in rows])
+        counts["requests"] = len(rows)
+    if attendance_csv and os.path.exists(attendance_csv):
+        with open(attendance_csv, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            rows = [_attendance_fields(r) for r in reader if r]
+        if skip_existing:
+            rows = _new_rows(rows, _attendance_key,
+                             conn.execute("SELECT employee_id, date, check_in, check_out FROM attendance"))
+        conn.executemany("INSERT INTO attendance (employee_id, date, check_in, check_out, late_arrival,"
+                         " overtime_hours, status) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        counts["attendance"] = len(rows)
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('csv_imported', ?)", (_now(),))
+    return counts
+
+def import_csvs(store: HRStore, skip_existing: bool = False, **csvs):
+    """Bulk-load the legacy CSV files in one transaction; returns {table: rows imported}.
+
+    Rows are appended. With skip_existing, CSV rows that are already stored
+    (requests by email, details and type; attendance by employee, date and
+    check-in) are left out, so importing again adds only what is missing:
+    nothing is deleted or renumbered, and rows made through the app stay.
+    """
+    conn = store._conn()
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        return _import(conn, skip_existing=skip_existing, **csvs)
+
+def import_once(store: HRStore, **csvs):
+    """import_csvs unless this database has been imported into already; returns the counts or None.
+
+    The check and the import share one write transaction, so several
+    workers starting against a new database import only once.
+    """
+    conn = store._conn()
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'csv_imported'").fetchone():
+            return None
+        return _import(conn, **csvs)
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_store(path: str):
+    """Process-wide HRStore for path."""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = HRStore(path)
+        return _stores[key]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", default=os.getenv("HR_DB_PATH", "hr.db"))
+    ap.add_argument("--users-csv", default="users.csv")
+    ap.add_argument("--requests-csv", default="requests.csv")
+    ap.add_argument("--attendance-csv", default="rag_hr/data/rag_seed_data/data/attendance_sample.csv")
+    ap.add_argument("--force", action="store_true",
+                    help="Import even if this database was imported into before, adding only CSV rows not stored yet")
+    args = ap.parse_args()
+    store = HRStore(args.db)
+    csvs = dict(users_csv=args.users_csv, requests_csv=args.requests_csv, attendance_csv=args.attendance_csv)
+    counts = import_csvs(store, skip_existing=True, **csvs) if args.force else import_once(store, **csvs)
+    if counts is None:
+        print(f"[Store] {args.db} was already imported into; use --force to import again")
+    else:
+        print(f"[Store] Imported into {args.db}: " + ", ".join(f"{n} {table}" for table, n in counts.items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""Answers entity questions ("who manages E1020", "how many leave requests did
+E1001 file", "status of R5010") from indexed lookups over the HR tables
+instead of the vector index.
+
+route() recognises the entity (an employee or request id, or "I/my" for the
+signed-in employee) and the kind of question, then returns the handful of
+matching rows plus counts as compact context for the LLM. Anything else is
+left to retrieval.
+"""
+import os, re
+from collections import Counter, namedtuple
+from .directory import IndexedCsv, EMPLOYEE_FIELDS
+from .partitions import matches
+
+DATA_DIR = "rag_hr/data/rag_seed_data/data"
+# name -> (file, fields, unique key columns, grouped key columns)
+TABLES = {
+    "employees": ("employees.csv", EMPLOYEE_FIELDS, ("employee_id",), ("manager_id",)),
+    "managers": ("managers.csv", ["employee_id", "name", "role", "department", "email"], ("employee_id",), ()),
+    "requests": ("requests_sample.csv", ["request_id", "employee_id", "type", "amount", "submitted_on", "status",
+                                         "current_approver_id", "comments"],
+                 ("request_id",), ("employee_id", "current_approver_id", "type")),
+    "attendance": ("attendance_sample.csv", ["employee_id", "date", "check_in", "check_out", "late_arrival",
+                                             "overtime_hours", "status"], (), ("employee_id",)),
+}
+# Files whose rows route() answers from; ingest can leave them out of the vector index
+ROUTED_FILES = tuple(spec[0] for spec in TABLES.values())
+MAX_ROWS = 15  # rows per entity sent to the LLM; counts always cover all of them
+# Fields of someone else's record shown when they are the asker's manager or a team member
+CONTACT_FIELDS = ("employee_id", "name", "role", "department", "email")
+
+EMPLOYEE_ID_RE = re.compile(r"\bE\d{3,}\b", re.I)
+REQUEST_ID_RE = re.compile(r"\bR\d{3,}\b", re.I)
+SELF_RE = re.compile(r"\b(i|me|my|mine|myself)\b")
+REQUEST_STATUSES = ("pending", "approved", "rejected")
+APPROVER_RE = re.compile(r"\b(approv\w*|waiting (on|for)|pending with|assigned to)\b")
+# First match wins
+INTENTS = [
+    ("team", re.compile(r"\b(who reports to|reports of|direct reports|reportees|team members|team of|"
+                        r"(who|which employees|whom) (does|do) \S+ (manage|supervise))\b")),
+    ("requests", re.compile(r"\brequests?\b")),
+    ("manager", re.compile(r"\b(manages|managed|manager|supervises|supervisor|reports? to|boss)\b")),
+    ("attendance", re.compile(r"\b(attendance|present|absent|absences?|late|check(ed)?[- ]?(in|out)|overtime hours|"
+                              r"days? worked)\b")),
+    ("profile", re.compile(r"\b(who is|department|role|email|phone|location|based|joining|joined|employment)\b")),
+]
+
+Routed = namedtuple("Routed", "intent answer context citations")
+
+def compact_row(source: str, row: dict, fields=None):
+    """One table row as 'file | col: value | ...', empty cells left out."""
+    cells = [(k, row.get(k)) for k in (fields or row)]
+    return f"{source} | " + " | ".join(f"{k}: {v}" for k, v in cells if v not in (None, ""))
+
+def _counts(counter: Counter):
+    return ", ".join(f"{name} {n}" for name, n in counter.most_common())
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _attendance_status(row):
+    # check-out rows from the old writer carry the overtime value in the status column
+    status = row.get("status") or ""
+    if _float(status) is not None:
+        return "", _float(status)
+    return status, _float(row.get("overtime_hours")) or 0.0
+
+class HRLookup:
+    """The HR tables in data_dir, indexed by employee and request id.
+
+    Tables are re-read when their file changes (IndexedCsv). With a store,
+    attendance comes from its attendance table (the live check-ins) instead
+    of attendance_sample.csv. Safe to share between threads.
+    """
+
+    def __init__(self, data_dir: str = DATA_DIR, store=None):
+        self.data_dir = data_dir
+        self.store = store
+        self.tables = {name: IndexedCsv(os.path.join(data_dir, spec[0]), spec[1], spec[2], spec[3])
+                       for name, spec in TABLES.items()}
+
+    def use_store(self, store):
+        self.store = store
+
+    def source(self, name):
+        return TABLES[name][0]
+
+    def employee(self, employee_id):
+        return self.tables["employees"].get("employee_id", employee_id)
+
+    def attendance(self, employee_id):
+        if self.store is not None:
+            return self.store.attendance_for(employee_id)
+        return self.tables["attendance"].get_all("employee_id", employee_id)
+
+    def intent(self, question: str):
+        q = question.lower()
+        for name, pattern in INTENTS:
+            if pattern.search(q):
+                return name
+        return None
+
+    def route(self, question: str, employee_id: str = None, where=None):
+        """A Routed answer for an entity question, or None to fall back to retrieval.
+
+        employee_id is the signed-in employee ("my requests"); where is the
+        caller's retrieval filter (query.scope_for). A record is shown when
+        a data chunk about the same employee would pass it, so the router
+        never reveals more than retrieval would. Routed.answer is set when
+        no LLM call is needed (unknown id, record not visible); otherwise
+        Routed.context holds the rows for the prompt.
+        """
+        question = question or ""
+        request_ids = list(dict.fromkeys(m.upper() for m in REQUEST_ID_RE.findall(question)))
+        employee_ids = list(dict.fromkeys(m.upper() for m in EMPLOYEE_ID_RE.findall(question)))
+        intent = self.intent(question)
+        if request_ids and not employee_ids:
+            intent = "request"
+        elif not employee_ids:
+            if not (employee_id and intent and SELF_RE.search(question.lower())):
+                return None
+            employee_ids = [employee_id]
+        elif intent is None:
+            intent = "profile"
+        visible = lambda emp: matches({"doc_type": "data", "employee_id": emp}, where)
+
+        if intent == "request":
+            return self._requests_by_id(request_ids, visible)
+        unknown = [e for e in employee_ids if self.employee(e) is None
+                   and self.tables["managers"].get("employee_id", e) is None]
+        if unknown:
+            return Routed(intent, f"No employee with id {', '.join(unknown)} in {self.source('employees')}.", None, [])
+        hidden = [e for e in employee_ids if not visible(e)]
+        if hidden:
+            return Routed(intent, f"You can only look up your own records ({', '.join(hidden)} is not yours).", None, [])
+        lines, citations = [], []
+        for emp in employee_ids:
+            block, sources = getattr(self, f"_{intent}")(emp, question)
+            lines.extend(block)
+            citations.extend(s for s in sources if s not in citations)
+        return Routed(intent, None, "\n".join(lines), citations)
+
+    def _person(self, employee_id, fields=None):
+        # (line, source) for someone's directory entry; managers.csv covers managers missing from employees.csv
+        row = self.employee(employee_id)
+        name = "employees"
+        if row is None:
+            row, name = self.tables["managers"].get("employee_id", employee_id), "managers"
+        if row is None:
+            return f"{employee_id}: not in {self.source('employees')}", None
+        return compact_row(self.source(name), row, fields), self.source(name)
+
+    def _profile(self, employee_id, question):
+        line, source = self._person(employee_id)
+        return [line], [s for s in (source,) if s]
+
+    def _manager(self, employee_id, question):
+        line, source = self._person(employee_id)
+        lines, sources = [line], [source]
+        row = self.employee(employee_id)
+        manager_id = row and row.get("manager_id")
+        if not manager_id:
+            return lines + [f"{employee_id} has no manager_id on record"], sources
+        line, source = self._person(manager_id, CONTACT_FIELDS)
+        lines.append(f"Manager of {employee_id}: {line}")
+        if source not in sources:
+            sources.append(source)
+        return lines, [s for s in sources if s]
+
+    def _team(self, employee_id, question):
+        line, source = self._person(employee_id, CONTACT_FIELDS)
+        team = self.tables["employees"].get_all("manager_id", employee_id)
+        lines = [line, f"Employees with manager_id {employee_id}: {len(team)}"]
+        lines += [compact_row(self.source("employees"), r, CONTACT_FIELDS) for r in team[:MAX_ROWS]]
+        if len(team) > MAX_ROWS:
+            lines.append(f"(showing {MAX_ROWS} of {len(team)})")
+        return lines, [s for s in (source, self.source("employees")) if s]
+
+    def _requests(self, employee_id, question):
+        q = question.lower().replace("_", " ")
+        table = self.tables["requests"]
+        # "pending with / approved by E1018" lists what the employee has to approve
+        as_approver = bool(APPROVER_RE.search(q) and re.search(r"\b(by|with|on|for|to)\s+" + employee_id.lower(), q))
+        rows = table.get_all("current_approver_id" if as_approver else "employee_id", employee_id)
+        types = [t for t in table.values("type") if t]
+        wanted_types = {t for t in types if re.search(r"\b" + re.escape(t.replace("_", " ").lower()) + r"s?\b", q)}
+        wanted_status = {s for s in REQUEST_STATUSES if s in q}
+        picked = [r for r in rows if (not wanted_types or r.get("type") in wanted_types)
+                  and (not wanted_status or (r.get("status") or "").lower() in wanted_status)]
+        role = "awaiting approval by" if as_approver else "filed by"
+        what = " ".join(sorted(wanted_status) + sorted(wanted_types)) or "all"
+        lines = [f"Requests {role} {employee_id} ({what}): {len(picked)}"]
+        if picked:
+            lines.append(f"by type: {_counts(Counter(r.get('type') for r in picked))}; "
+                         f"by status: {_counts(Counter(r.get('status') for r in picked))}")
+        if len(picked) != len(rows):
+            lines.append(f"All requests {role} {employee_id}: {len(rows)}")
+        lines += [compact_row(self.source("requests"), r) for r in picked[:MAX_ROWS]]
+        if len(picked) > MAX_ROWS:
+            lines.append(f"(showing {MAX_ROWS} of {len(picked)})")
+        return lines, [self.source("requests")]
+
+    def _requests_by_id(self, request_ids, visible):
+        table = self.tables["requests"]
+        rows = [table.get("request_id", r) for r in request_ids]
+        missing = [r for r, row in zip(request_ids, rows) if row is None]
+        if missing:
+            return Routed("request", f"No request with id {', '.join(missing)} in {self.source('requests')}.", None, [])
+        if not all(visible(row.get("employee_id")) for row in rows):
+            return Routed("request", "You can only look up your own requests.", None, [])
+        lines = [compact_row(self.source("requests"), row) for row in rows]
+        citations = [self.source("requests")]
+        for approver in dict.fromkeys(row.get("current_approver_id") for row in rows if row.get("current_approver_id")):
+            line, source = self._person(approver, CONTACT_FIELDS)
+            lines.append(f"Approver {approver}: {line}")
+            if source and source not in citations:
+                citations.append(source)
+        return Routed("request", None, "\n".join(lines), citations)
+
+    def _attendance(self, employee_id, question):
+        rows = self.attendance(employee_id)
+        statuses, overtime, days = Counter(), 0.0, set()
+        for row in rows:
+            status, hours = _attendance_status(row)
+            statuses[status or "no status"] += 1
+            overtime += hours
+            if row.get("date"):
+                days.add(row["date"])
+        late = sum(1 for row in rows if (row.get("late_arrival") or "").lower() == "yes")
+        source = "attendance table" if self.store is not None else self.source("attendance")
+        lines = [f"Attendance of {employee_id}: {len(rows)} records on {len(days)} days"]
+        if rows:
+            dates = sorted(days)
+            span = f"; from {dates[0]} to {dates[-1]}" if dates else ""
+            lines.append(f"by status: {_counts(statuses)}; late arrivals: {late}; overtime hours: {overtime:g}{span}")
+            lines.append(f"most recent {min(len(rows), MAX_ROWS)} records:")
+            lines += [compact_row(source, row) for row in rows[-MAX_ROWS:]]
+        return lines, [source]
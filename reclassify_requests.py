@@ -0,0 +1,202 @@
+"""Re-run request classification over the whole request history.
+
+    python reclassify_requests.py --output requests_reclassified.csv
+    python reclassify_requests.py --output out.csv --batch-size 25 --workers 4   # resumes if out.csv.ckpt.json exists
+
+Requests are streamed from the database in id order, --chunk-rows at a
+time. Identical details (after normalization) are classified once. Each new text goes to the
+local tier first (memo, keyword rules, embedding centroids), and only the
+unsure ones are sent to the LLM, --batch-size requests per prompt with at
+most --workers prompts in flight. After every chunk the output CSV is
+flushed and a checkpoint records the last request id done; rerunning the
+same command continues from there (pass --restart to start over). Stored
+requests are never modified.
+"""
+import argparse, csv, io, json, os, time
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from functools import partial
+from rag_hr.query import INDEX_PATH, META_PATH
+from rag_hr.utils.request_classifier import (RequestClassifier, retriever_encoder, CLASSIFY_LOCAL_THRESHOLD,
+                                            CLASSIFY_GUIDELINES, VALID_CATEGORIES, GROQ_API_KEY, GROQ_MODEL,
+                                            classify_messages, parse_category, log_classification_error)
+from rag_hr.utils.answer_cache import normalize_question
+from rag_hr.utils.llm_client import get_llm_client
+from rag_hr.utils.store import get_store
+
+BATCH_SYSTEM_PROMPT = (
+    "You are an HR request classifier. You receive a JSON object {\"requests\": [{\"id\": ..., \"text\": ...}]}. "
+    "Your SOLE output MUST be a JSON object {\"categories\": {\"<id>\": \"<category>\"}} with one entry per request id. "
+    "Each value must be ONE of these exact words: "
+    "leave, expense, attendance, overtime, promotion, transfer, resignation, travel, loan, other.\n\n"
+    + CLASSIFY_GUIDELINES
+)
+OUTPUT_FIELDS = ["id", "email", "details", "old_type", "new_type", "method", "status", "approver"]
+
+def classify_batch(texts):
+    """Categories for texts from one LLM prompt; ids missing from the reply are None."""
+    payload = json.dumps({"requests": [{"id": i + 1, "text": t} for i, t in enumerate(texts)]})
+    result = get_llm_client().chat(
+        [{"role": "system", "content": BATCH_SYSTEM_PROMPT}, {"role": "user", "content": payload}],
+        model=GROQ_MODEL,
+        response_format={"type": "json_object"},
+        max_tokens=20 + 12 * len(texts),
+        temperature=0.0
+    )
+    try:
+        categories = json.loads(result).get("categories") or {}
+    except (json.JSONDecodeError, AttributeError):
+        categories = {}
+    out = []
+    for i in range(len(texts)):
+        category = str(categories.get(str(i + 1), "")).strip().lower()
+        out.append(category if category in VALID_CATEGORIES else None)
+    return out
+
+def classify_single(text):
+    result = get_llm_client().chat(classify_messages(text), model=GROQ_MODEL,
+                                   response_format={"type": "json_object"}, max_tokens=50, temperature=0.0)
+    return parse_category(result.strip())
+
+def llm_classify(classifier, texts):
+    """[(category, method)] for texts: one batched prompt, single prompts for whatever it left out."""
+    try:
+        categories = classify_batch(texts)
+    except Exception as e:
+        log_classification_error(f"batch of {len(texts)}", e)
+        categories = [None] * len(texts)
+    out = []
+    for text, category in zip(texts, categories):
+        if category is not None:
+            out.append((classifier.remember(text, category), "llm-batch"))
+            continue
+        try:
+            out.append((classifier.remember(text, classify_single(text)), "llm"))
+        except Exception as e:
+            log_classification_error(text, e)
+            out.append(("other", "error"))
+    return out
+
+def classify_unique(classifier, texts, args, pool, counts):
+    """{normalized text: (category, method)} for texts not seen before."""
+    results, pending = {}, []
+    for text in texts:
+        local = classifier.classify(text) if not args.no_local else None
+        if local is not None and local.confident:
+            results[normalize_question(text)] = (local.category, local.method)
+        else:
+            pending.append(text)
+    if pending and not (GROQ_API_KEY and GROQ_MODEL):
+        # same behaviour as the web form without an API key
+        for text in pending:
+            results[normalize_question(text)] = ("other", "no-llm")
+        pending = []
+    batches = [pending[i:i + args.batch_size] for i in range(0, len(pending), args.batch_size)]
+    counts["llm_prompts"] += len(batches)
+    for batch, labels in zip(batches, pool.map(partial(llm_classify, classifier), batches)):
+        for text, label in zip(batch, labels):
+            results[normalize_question(text)] = label
+    return results
+
+def load_checkpoint(path, output):
+    if not os.path.exists(path) or not os.path.exists(output):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_checkpoint(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+def restore_results(output, output_bytes):
+    """Drop output written after the last checkpoint and rebuild the dedup map from the rest."""
+    with open(output, "r+", encoding="utf-8", newline="") as f:
+        f.truncate(output_bytes)
+    results = {}
+    with open(output, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            results.setdefault(normalize_question(row["details"]), (row["new_type"], row["method"]))
+    return results
+
+def iter_chunks(store, after_id, chunk_rows):
+    """Lists of up to chunk_rows stored requests with id > after_id (keyset pagination)."""
+    while True:
+        chunk = store.requests_after(after_id, chunk_rows)
+        if not chunk:
+            return
+        yield chunk
+        after_id = chunk[-1]["id"]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", default=os.getenv("HR_DB_PATH", "hr.db"))
+    ap.add_argument("--index-path", default=INDEX_PATH, help="Index whose encoder the local tier uses")
+    ap.add_argument("--output", default="requests_reclassified.csv")
+    ap.add_argument("--checkpoint", default=None, help="Default: <output>.ckpt.json")
+    ap.add_argument("--chunk-rows", type=int, default=1000, help="Requests per checkpoint")
+    ap.add_argument("--batch-size", type=int, default=20, help="Requests per LLM prompt")
+    ap.add_argument("--workers", type=int, default=int(os.getenv("LLM_MAX_CONCURRENCY", "8")), help="LLM prompts in flight")
+    ap.add_argument("--no-local", action="store_true", help="Send every distinct text to the LLM")
+    ap.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    args = ap.parse_args()
+    checkpoint = args.checkpoint or args.output + ".ckpt.json"
+    store = get_store(args.db)
+    classifier = RequestClassifier(retriever_encoder(args.index_path, META_PATH), labelled_fn=store.labelled_requests,
+                                   threshold=CLASSIFY_LOCAL_THRESHOLD)
+
+    state = None if args.restart else load_checkpoint(checkpoint, args.output)
+    if state and state["input"] != os.path.abspath(store.path):
+        raise SystemExit(f"{checkpoint} belongs to {state['input']}; pass --restart or another --output")
+    if state:
+        results = restore_results(args.output, state["output_bytes"])
+        print(f"[Reclassify] Resuming after request {state['last_id']} ({len(results)} distinct texts already classified)")
+    else:
+        results = {}
+        state = {"input": os.path.abspath(store.path), "last_id": 0, "output_bytes": 0}
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerow(OUTPUT_FIELDS)
+            state["output_bytes"] = f.tell()
+        save_checkpoint(checkpoint, state)
+
+    counts = Counter()
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool, \
+            open(args.output, "a", encoding="utf-8", newline="") as out:
+        for rows in iter_chunks(store, state["last_id"], args.chunk_rows):
+            new = {}
+            for row in rows:
+                key = normalize_question(row["details"])
+                if key not in results:
+                    new.setdefault(key, row["details"])
+            results.update(classify_unique(classifier, list(new.values()), args, pool, counts))
+
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            for row in rows:
+                new_type, method = results[normalize_question(row["details"])]
+                writer.writerow([row["id"], row["email"], row["details"], row["classified_type"], new_type, method,
+                                 row["status"], row["approver"]])
+                counts["rows"] += 1
+                counts["changed"] += new_type != row["classified_type"]
+            counts["distinct"] += len(new)
+            for key in new:
+                counts[results[key][1]] += 1
+            out.write(buf.getvalue())
+            out.flush()
+            os.fsync(out.fileno())
+            state["last_id"] = rows[-1]["id"]
+            state["output_bytes"] = out.tell()
+            save_checkpoint(checkpoint, state)
+            print(f"[Reclassify] Request {state['last_id']}: {counts['rows']} rows, {counts['distinct']} new distinct texts")
+
+    elapsed = time.time() - start
+    methods = {k: v for k, v in counts.items() if k not in ("rows", "changed", "distinct", "llm_prompts")}
+    print(f"[Reclassify] Done in {elapsed:.1f}s: {counts['rows']} rows, {counts['distinct']} distinct texts, "
+          f"{counts['changed']} changed category, {counts['llm_prompts']} LLM prompts")
+    print(f"[Reclassify] Decided by: {methods}")
+    print(f"[Reclassify] Wrote {args.output} (checkpoint {checkpoint})")
+
+if __name__ == "__main__":
+    main()